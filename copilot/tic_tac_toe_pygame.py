@@ -1,19 +1,27 @@
+import logging
+import os
 import pygame
 import sys
-import random
 
-# Initialize pygame
-pygame.init()
+# Make the shared engine package at the repository root importable
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from tictactoe import engines, gamelog, idle, linecount, log as log_setup, overlay, players, rules, sprites
+
+log = logging.getLogger(__name__)
+
+# Rules for the selected variant (TICTACTOE_VARIANT, default 3x3)
+RULES = rules.from_env()
 
 # Constants
 WIDTH, HEIGHT = 450, 450  # 50% bigger
 LINE_WIDTH = 8
-BOARD_ROWS = 3
-BOARD_COLS = 3
+BOARD_ROWS = RULES.size
+BOARD_COLS = RULES.size
 SQUARE_SIZE = WIDTH // BOARD_COLS
 CIRCLE_RADIUS = SQUARE_SIZE // 3
-CIRCLE_WIDTH = 14
-CROSS_WIDTH = 20
+# Stroke widths are tuned for 3x3 and shrink with the cell size
+CIRCLE_WIDTH = 14 * 3 // BOARD_COLS
+CROSS_WIDTH = 20 * 3 // BOARD_COLS
 SPACE = SQUARE_SIZE // 5
 
 # Colors
@@ -22,182 +30,194 @@ LINE_COLOR = (80, 200, 220)  # Bright cyan lines
 CIRCLE_COLOR = (255, 214, 10)  # Gold circle
 CROSS_COLOR = (255, 85, 85)  # Red cross
 
-# Screen
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption('Tic Tac Toe')
-screen.fill(BG_COLOR)
+# Rendering
+FPS = 60  # Used while an overlay fades, or always in continuous render mode
+REPAINT_EVENTS = (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED)
+MESSAGE_MS = 1500  # Result overlay, including the fade in and out
+INPUT_EVENTS = (pygame.MOUSEBUTTONDOWN, pygame.KEYDOWN)  # Queued or dropped during the overlay
+
+# Screen and font, created by init_display so the module imports without a window
+screen = None
+font = None
 
 # Board
 board = [[None for _ in range(BOARD_COLS)] for _ in range(BOARD_ROWS)]
+# Per-line mark counts, kept in step with the board by mark_square
+line_counts = linecount.LineCounter(RULES)
+
+# Grid and marks are rendered once and blitted every frame
+surfaces = sprites.SurfaceCache(
+    sprites.Layout(BOARD_ROWS, WIDTH, SQUARE_SIZE, LINE_WIDTH, CIRCLE_RADIUS, CIRCLE_WIDTH, CROSS_WIDTH, SPACE),
+    sprites.Theme(BG_COLOR, LINE_COLOR, CROSS_COLOR, CIRCLE_COLOR))
 
 # Functions
 def draw_lines():
-    # Horizontal
-    for i in range(1, BOARD_ROWS):
-        pygame.draw.line(screen, LINE_COLOR, (0, i * SQUARE_SIZE), (WIDTH, i * SQUARE_SIZE), LINE_WIDTH)
-    # Vertical
-    for i in range(1, BOARD_COLS):
-        pygame.draw.line(screen, LINE_COLOR, (i * SQUARE_SIZE, 0), (i * SQUARE_SIZE, HEIGHT), LINE_WIDTH)
+    screen.blit(surfaces.grid(), (0, 0))
 
 def draw_figures():
-    for row in range(BOARD_ROWS):
-        for col in range(BOARD_COLS):
-            if board[row][col] == 'O':
-                pygame.draw.circle(screen, CIRCLE_COLOR, (int(col * SQUARE_SIZE + SQUARE_SIZE // 2), int(row * SQUARE_SIZE + SQUARE_SIZE // 2)), CIRCLE_RADIUS, CIRCLE_WIDTH)
-            elif board[row][col] == 'X':
-                start_desc = (col * SQUARE_SIZE + SPACE, row * SQUARE_SIZE + SPACE)
-                end_desc = (col * SQUARE_SIZE + SQUARE_SIZE - SPACE, row * SQUARE_SIZE + SQUARE_SIZE - SPACE)
-                pygame.draw.line(screen, CROSS_COLOR, start_desc, end_desc, CROSS_WIDTH)
-                start_asc = (col * SQUARE_SIZE + SPACE, row * SQUARE_SIZE + SQUARE_SIZE - SPACE)
-                end_asc = (col * SQUARE_SIZE + SQUARE_SIZE - SPACE, row * SQUARE_SIZE + SPACE)
-                pygame.draw.line(screen, CROSS_COLOR, start_asc, end_asc, CROSS_WIDTH)
+    surfaces.draw_board(screen, board)
 
 def mark_square(row, col, player):
     board[row][col] = player
+    line_counts.mark(row * BOARD_COLS + col, player)
 
 def available_square(row, col):
     return board[row][col] is None
 
 def is_board_full():
-    for row in board:
-        for cell in row:
-            if cell is None:
-                return False
-    return True
+    return line_counts.is_full
 
 def check_win(player):
-    # Check rows
-    for row in board:
-        if all([cell == player for cell in row]):
-            return True
-    # Check columns
-    for col in range(BOARD_COLS):
-        if all([board[row][col] == player for row in range(BOARD_ROWS)]):
-            return True
-    # Check diagonals
-    if all([board[i][i] == player for i in range(BOARD_ROWS)]):
-        return True
-    if all([board[i][BOARD_ROWS - i - 1] == player for i in range(BOARD_ROWS)]):
-        return True
-    return False
-
-def minimax(board, depth, is_maximizing):
-    if check_win('O'):
-        return 1
-    if check_win('X'):
-        return -1
-    if is_board_full():
-        return 0
-    if is_maximizing:
-        best_score = -float('inf')
-        for r in range(BOARD_ROWS):
-            for c in range(BOARD_COLS):
-                if board[r][c] is None:
-                    board[r][c] = 'O'
-                    score = minimax(board, depth + 1, False)
-                    board[r][c] = None
-                    best_score = max(score, best_score)
-        return best_score
-    else:
-        best_score = float('inf')
-        for r in range(BOARD_ROWS):
-            for c in range(BOARD_COLS):
-                if board[r][c] is None:
-                    board[r][c] = 'X'
-                    score = minimax(board, depth + 1, True)
-                    board[r][c] = None
-                    best_score = min(score, best_score)
-        return best_score
+    return line_counts.has_won(player)
+
+# Perfect-play table with an alpha-beta fallback (or MCTS with TICTACTOE_ENGINE=mcts),
+# kept across moves and games so its tables stay warm. TICTACTOE_DIFFICULTY=easy,
+# medium or hard plays an anytime search with that level's latency budget instead,
+# and TICTACTOE_AI any registered engine
+ai_player = engines.from_env(RULES) or players.from_env(RULES)
 
 def ai_move():
-    best_score = -float('inf')
-    move = None
-    for r in range(BOARD_ROWS):
-        for c in range(BOARD_COLS):
-            if board[r][c] is None:
-                board[r][c] = 'O'
-                score = minimax(board, 0, False)
-                board[r][c] = None
-                if score > best_score:
-                    best_score = score
-                    move = (r, c)
-    if move:
-        mark_square(move[0], move[1], 'O')
-        return move
-    return None, None
-
-font = pygame.font.SysFont('arial', 64, bold=True)
-def draw_message(message):
-    # Blur effect: draw a semi-transparent surface over the board
-    blur_surface = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-    blur_surface.fill((30, 30, 30, 180))  # More opaque for stronger blur
-    screen.blit(blur_surface, (0, 0))
-    # Message background
-    text = font.render(message, True, (40, 44, 52))
-    text_rect = text.get_rect(center=(WIDTH // 2, HEIGHT // 2))
-    bg_rect = text_rect.inflate(60, 30)
-    pygame.draw.rect(screen, (255, 255, 255), bg_rect, border_radius=18)
-    # Add a subtle shadow
-    shadow_rect = bg_rect.move(4, 4)
-    pygame.draw.rect(screen, (200, 200, 200), shadow_rect, border_radius=18)
-    screen.blit(text, text_rect)
-    pygame.display.update()
-    pygame.time.wait(1500)
+    move = ai_player(engines.BoardView(board))
+    if move is None or not available_square(*move):
+        # Play the first empty cell rather than writing over a mark
+        fallback = RULES.empty_cells(*RULES.from_grid(board))[0]
+        log.warning("AI move invalid or cell occupied: %s; playing %s instead", move, fallback)
+        move = fallback
+    mark_square(move[0], move[1], 'O')
+    return move
+
+message_surfaces = {}
+def message_surface(message):
+    surface = message_surfaces.get(message)
+    if surface is None:
+        # Blur effect: a semi-transparent layer over the board
+        surface = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
+        surface.fill((30, 30, 30, 180))  # More opaque for stronger blur
+        # Message background
+        text = surfaces.text(font, message, (40, 44, 52))
+        text_rect = text.get_rect(center=(WIDTH // 2, HEIGHT // 2))
+        bg_rect = text_rect.inflate(60, 30)
+        pygame.draw.rect(surface, (255, 255, 255), bg_rect, border_radius=18)
+        # Add a subtle shadow
+        shadow_rect = bg_rect.move(4, 4)
+        pygame.draw.rect(surface, (200, 200, 200), shadow_rect, border_radius=18)
+        surface.blit(text, text_rect)
+        message_surfaces[message] = surface
+    return surface
+
+def draw_message(message, opacity=1.0):
+    surface = message_surface(message)
+    surface.set_alpha(int(255 * opacity))
+    screen.blit(surface, (0, 0))
 
 def restart():
     global board
     board = [[None for _ in range(BOARD_COLS)] for _ in range(BOARD_ROWS)]
+    line_counts.reset()
     screen.fill(BG_COLOR)
     draw_lines()
 
-draw_lines()
+def init_display():
+    global screen, font
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption('Tic Tac Toe')
+    screen.fill(BG_COLOR)
+    font = pygame.font.SysFont('arial', 64, bold=True)
+    draw_lines()
 
-player = 'X'  # Human is X, AI is O
-game_over = False
+def wait_events(timeout_ms):
+    # Block until something happens, then drain whatever else is queued
+    event = pygame.event.wait(timeout_ms)
+    if event.type == pygame.NOEVENT:
+        return []
+    return [event] + pygame.event.get()
 
 # Main loop
-while True:
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            pygame.quit()
-            sys.exit()
-        if event.type == pygame.MOUSEBUTTONDOWN and not game_over:
-            mouseX = event.pos[0]
-            mouseY = event.pos[1]
-            clicked_row = mouseY // SQUARE_SIZE
-            clicked_col = mouseX // SQUARE_SIZE
-            if available_square(clicked_row, clicked_col):
-                mark_square(clicked_row, clicked_col, player)
-                if check_win(player):
-                    draw_figures()
-                    draw_message('You win!')
-                    restart()
-                    game_over = False
-                    continue
-                elif is_board_full():
-                    draw_figures()
-                    draw_message('Tie!')
+def main():
+    log_setup.configure()
+    init_display()
+    player = 'X'  # Human is X, AI is O
+    game_over = False
+    render_on_change = idle.render_mode() == idle.ON_CHANGE
+    cpu = idle.CpuMeter()
+    clock = pygame.time.Clock()
+    message = overlay.Overlay(MESSAGE_MS)
+    # Finished games are appended to the game log (TICTACTOE_GAME_LOG_DIR)
+    recorder = gamelog.from_env(RULES, 'human', engines.spec_from_env() or ai_player.name)
+    pending = []  # Input queued during the last overlay
+    dirty = True
+
+    while True:
+        if pending:
+            events, pending = pending + pygame.event.get(), []
+        elif render_on_change and not message.active:
+            events = wait_events(int(cpu.interval * 1000))
+        else:
+            events = pygame.event.get()
+        for event in events:
+            if event.type == pygame.QUIT:
+                pygame.quit()
+                sys.exit()
+            if event.type in REPAINT_EVENTS:
+                dirty = True
+            if message.active:
+                if event.type in INPUT_EVENTS:
+                    message.intercept(event)
+                continue
+            if event.type == pygame.MOUSEBUTTONDOWN and not game_over:
+                mouseX = event.pos[0]
+                mouseY = event.pos[1]
+                # Clamp: WIDTH is not always a multiple of the cell size
+                clicked_row = min(mouseY // SQUARE_SIZE, BOARD_ROWS - 1)
+                clicked_col = min(mouseX // SQUARE_SIZE, BOARD_COLS - 1)
+                if available_square(clicked_row, clicked_col):
+                    dirty = True
+                    mark_square(clicked_row, clicked_col, player)
+                    recorder.move(clicked_row * BOARD_COLS + clicked_col)
+                    if check_win(player):
+                        result = 'You win!'
+                    elif is_board_full():
+                        result = 'Tie!'
+                    else:
+                        # AI turn
+                        result = None
+                        ai_row, ai_col = ai_move()
+                        recorder.move(ai_row * BOARD_COLS + ai_col)
+                        if check_win('O'):
+                            result = 'AI wins!'
+                        elif is_board_full():
+                            result = 'Tie!'
+                    if result:
+                        recorder.finish({'You win!': 'X', 'AI wins!': 'O'}.get(result))
+                        # The board stays visible under the overlay until it fades out
+                        message.show(result, pygame.time.get_ticks())
+                        game_over = True
+            if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_r:
                     restart()
+                    recorder.start()
                     game_over = False
-                    continue
-                else:
-                    # AI turn
-                    ai_row, ai_col = ai_move()
-                    if ai_row is not None and check_win('O'):
-                        draw_figures()
-                        draw_message('AI wins!')
-                        restart()
-                        game_over = False
-                        continue
-                    elif is_board_full():
-                        draw_figures()
-                        draw_message('Tie!')
-                        restart()
-                        game_over = False
-                        continue
-        if event.type == pygame.KEYDOWN:
-            if event.key == pygame.K_r:
+                    dirty = True
+        now = pygame.time.get_ticks()
+        if message.active:
+            queued = message.finished(now)
+            if queued is not None:
                 restart()
                 game_over = False
-    draw_figures()
-    pygame.display.update()
+                pending = queued
+            dirty = True
+        if dirty or not render_on_change:
+            draw_figures()
+            if message.active:
+                draw_message(message.message, message.opacity(now))
+            pygame.display.update()
+            dirty = False
+        if message.active or not render_on_change:
+            clock.tick(FPS)
+        usage = cpu.poll()
+        if usage is not None:
+            log.info("CPU usage %.1f%% over the last %.0fs", usage, cpu.interval)
+
+if __name__ == '__main__':
+    main()
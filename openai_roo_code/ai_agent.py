@@ -1,162 +1,216 @@
-import copy
+import logging
+import os
+import sys
+import time
+
+# Make the shared engine package at the repository root importable
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from tictactoe import bitboard, linecount, lookup, players, rules as rules_module, search, stats, transposition, worker
+from tictactoe.log import TRACE, trace_sample
+
 # Local AI opponent logic for Tic-Tac-Toe
 
-def get_ai_move(board):
-    print("[ai_agent.py] get_ai_move called")
-    print("[get_ai_move] Called with board:")
-    for row in board:
-        print("  ", row)
+log = logging.getLogger(__name__)
+
+# tictactoe.stats.SearchReport of the most recent move
+last_report = None
+
+# Minimax values shared across calls, keyed by the canonical Zobrist hash so
+# that move-order transpositions and rotated/reflected positions hit the same entry
+transposition_table = transposition.TranspositionTable(capacity=1 << 14)
+
+# Perfect-play table generated offline by tictactoe.lookup; None if missing or corrupt
+perfect_play = lookup.load()
+
+# Latency budget in ms from TICTACTOE_DIFFICULTY; None ('perfect', the default) searches to the end
+difficulty_ms = search.difficulty_from_env('perfect')
+# Anytime searchers for timed moves, one per variant; a process pool with TICTACTOE_SEARCH_WORKERS
+anytime_searchers = {}
+
+def get_ai_move(board, rules=None, cancel=None, time_ms=None):
     """
-    Determines the AI's move using the minimax algorithm for unbeatable play.
+    Determines the AI's move for unbeatable play. The move is read from the
+    precomputed perfect-play table when it is available, otherwise it is
+    searched with the minimax algorithm.
 
     Args:
-        board (list of list): 3x3 list of lists representing the current board state.
-            Each cell contains 'X', 'O', or '' (empty string) to indicate the state.
+        board (list of list or tictactoe.engines.BoardView): N x N board, read but
+            never written. Each cell contains 'X', 'O', or None or '' for empty.
+        rules (tictactoe.rules.Rules, optional): Board size and line length. Defaults
+            to the standard variant for the board's size.
+        cancel (threading.Event, optional): When set, the search stops by raising
+            tictactoe.worker.SearchCancelled.
+        time_ms (float, optional): Answer within this many milliseconds with the best
+            move an iterative-deepening search finds. Defaults to the TICTACTOE_DIFFICULTY
+            budget; boards beyond 3x3 always get a budget, as minimax cannot finish them.
 
     Returns:
         tuple: (row, col) indicating the AI's chosen move (0-based indices).
 
     The AI assumes it is playing as 'O' and the human is 'X'.
     The function ensures the returned move is valid (the cell is empty).
+    Its search report is left in last_report and passed to the tictactoe.stats hooks.
     """
+    global last_report
+    with stats.measure('openai') as search_stats:
+        move = _choose_move(board, rules, cancel, time_ms, search_stats)
+    last_report = search_stats.report
+    return move
+
+def _choose_move(board, rules, cancel, time_ms, search_stats):
+    # Read the levels once; the search below only tests these flags
+    debug = log.isEnabledFor(logging.DEBUG)
+    trace = log.isEnabledFor(TRACE)
+    sample = trace_sample()
+    if debug:
+        log.debug("Called with board: %s", board)
 
     AI = 'O'
     HUMAN = 'X'
     EMPTY = None
     EMPTY_ALT = ''  # Accept empty string as empty for compatibility
 
-    def is_moves_left(b):
-        for row in b:
-            if EMPTY in row or EMPTY_ALT in row:
-                return True
-        return False
-
-    def evaluate(b):
-        # Check rows and columns
-        for i in range(3):
-            if (
-                b[i][0] == b[i][1] == b[i][2]
-                and b[i][0] != EMPTY
-                and b[i][0] != EMPTY_ALT
-            ):
-                if b[i][0] == AI:
-                    print(f"[evaluate] Row {i} win for AI")
-                    return +10
-                elif b[i][0] == HUMAN:
-                    print(f"[evaluate] Row {i} win for HUMAN")
-                    return -10
-            if (
-                b[0][i] == b[1][i] == b[2][i]
-                and b[0][i] != EMPTY
-                and b[0][i] != EMPTY_ALT
-            ):
-                if b[0][i] == AI:
-                    print(f"[evaluate] Col {i} win for AI")
-                    return +10
-                elif b[0][i] == HUMAN:
-                    print(f"[evaluate] Col {i} win for HUMAN")
-                    return -10
-        # Check diagonals
-        if (
-            b[0][0] == b[1][1] == b[2][2]
-            and b[0][0] != EMPTY
-            and b[0][0] != EMPTY_ALT
-        ):
-            if b[0][0] == AI:
-                print("[evaluate] Main diagonal win for AI")
-                return +10
-            elif b[0][0] == HUMAN:
-                print("[evaluate] Main diagonal win for HUMAN")
-                return -10
-        if (
-            b[0][2] == b[1][1] == b[2][0]
-            and b[0][2] != EMPTY
-            and b[0][2] != EMPTY_ALT
-        ):
-            if b[0][2] == AI:
-                print("[evaluate] Anti-diagonal win for AI")
-                return +10
-            elif b[0][2] == HUMAN:
-                print("[evaluate] Anti-diagonal win for HUMAN")
-                return -10
-        print(f"[evaluate] Returning 0")
-        return 0
+    if rules is None:
+        rules = rules_module.for_size(len(board))
+    n = rules.size
 
-import time
+    mcts_engine = players.mcts_from_env(rules)
+    if mcts_engine is not None:
+        move = mcts_engine(board, cancel)
+        log.debug("MCTS move: %s, %s", move, mcts_engine.searcher.stats())
+        return move
+
+    if time_ms is None:
+        time_ms = difficulty_ms
+    if time_ms is None and rules is not rules_module.CLASSIC:
+        time_ms = search.SEARCH_BUDGET_MS
+    if time_ms is not None:
+        searcher = anytime_searchers.get(rules)
+        if searcher is None:
+            searcher = anytime_searchers[rules] = players.searcher_from_env(rules)
+        result = searcher.search(*rules.from_grid(board), transposition.O, time_ms, cancel=cancel)
+        log.debug("Anytime search: %s", result)
+        return None if result.cell is None else divmod(result.cell, n)
+
+    if perfect_play is not None:
+        entry = perfect_play.probe(*bitboard.from_grid(board), AI)
+        if entry is not None and entry[0] is not None:
+            move = divmod(entry[0], 3)
+            log.debug("Perfect-play table move: %s with value %d", move, entry[1])
+            return move
+        log.debug("Position not in perfect-play table, searching.")
+    else:
+        log.debug("Perfect-play table unavailable, searching.")
 
-minimax_call_count = 0
-
-def minimax(b, depth, is_max):
-    global minimax_call_count
-    minimax_call_count += 1
-    start_time = time.time()
-    score = evaluate(b)
-    if score == 10 or score == -10:
-        end_time = time.time()
-        print(f"[minimax] Terminal node at depth {depth}, time: {end_time - start_time:.4f}s, call count: {minimax_call_count}")
-        return score
-    if not is_moves_left(b):
-        end_time = time.time()
-        print(f"[minimax] No moves left at depth {depth}, time: {end_time - start_time:.4f}s, call count: {minimax_call_count}")
+    zobrist = transposition.zobrist_keys(n)
+    # Running per-line counts, marked and undone alongside the board below
+    counts = linecount.LineCounter.from_grid(board, rules)
+
+    def is_moves_left():
+        return counts.empty > 0
+
+    def evaluate(traced):
+        # A completed row, column or diagonal shows up in the line counts
+        if counts.has_won(AI):
+            if traced:
+                log.log(TRACE, "Win for AI")
+            return +10
+        elif counts.has_won(HUMAN):
+            if traced:
+                log.log(TRACE, "Win for HUMAN")
+            return -10
         return 0
 
+    def minimax(occupied, depth, is_max, keys):
+        search_stats.nodes += 1
+        if depth + 1 > search_stats.max_depth:
+            search_stats.max_depth = depth + 1
+        worker.check_cancelled(cancel)
+        traced = trace and search_stats.nodes % sample == 0
+        start_time = time.perf_counter() if traced else 0.0
+        score = evaluate(traced)
+        if score == 10 or score == -10:
+            search_stats.leaves += 1
+            if traced:
+                log.log(TRACE, "Terminal node at depth %d, time: %.6fs, call count: %d",
+                        depth, time.perf_counter() - start_time, search_stats.nodes)
+            return score
+        if not is_moves_left():
+            search_stats.leaves += 1
+            if traced:
+                log.log(TRACE, "No moves left at depth %d, time: %.6fs, call count: %d",
+                        depth, time.perf_counter() - start_time, search_stats.nodes)
+            return 0
+
+        key = transposition.canonical(keys, is_max)
+        entry = transposition_table.probe(key)
+        if entry is not None:
+            search_stats.tt_hits += 1
+            if traced:
+                log.log(TRACE, "Transposition hit at depth %d: %d, call count: %d", depth, entry[0], search_stats.nodes)
+            return entry[0]
+
+        empties = 0
         if is_max:
             best = -1000
-            for i in range(3):
-                for j in range(3):
-                    if b[i][j] == EMPTY or b[i][j] == EMPTY_ALT:
-                        original = b[i][j]
-                        b[i][j] = AI
-                        val = minimax(b, depth + 1, not is_max)
-                        best = max(best, val)
-                        b[i][j] = original
-            end_time = time.time()
-            print(f"[minimax] (is_max) Best value at depth {depth}: {best}, time: {end_time - start_time:.4f}s, call count: {minimax_call_count}")
-            return best
+            for cell in range(n * n):
+                if not occupied >> cell & 1:
+                    empties += 1
+                    counts.mark(cell, AI)
+                    child_keys = transposition.toggle(keys, transposition.O, cell, zobrist)
+                    val = minimax(occupied | 1 << cell, depth + 1, not is_max, child_keys)
+                    best = max(best, val)
+                    counts.undo(cell, AI)
+            if traced:
+                log.log(TRACE, "(is_max) Best value at depth %d: %d, time: %.6fs",
+                        depth, best, time.perf_counter() - start_time)
         else:
             best = 1000
-            for i in range(3):
-                for j in range(3):
-                    if b[i][j] == EMPTY or b[i][j] == EMPTY_ALT:
-                        original = b[i][j]
-                        b[i][j] = HUMAN
-                        val = minimax(b, depth + 1, not is_max)
-                        best = min(best, val)
-                        b[i][j] = original
-            end_time = time.time()
-            print(f"[minimax] (is_min) Best value at depth {depth}: {best}, time: {end_time - start_time:.4f}s, call count: {minimax_call_count}")
-            return best
+            for cell in range(n * n):
+                if not occupied >> cell & 1:
+                    empties += 1
+                    counts.mark(cell, HUMAN)
+                    child_keys = transposition.toggle(keys, transposition.X, cell, zobrist)
+                    val = minimax(occupied | 1 << cell, depth + 1, not is_max, child_keys)
+                    best = min(best, val)
+                    counts.undo(cell, HUMAN)
+            if traced:
+                log.log(TRACE, "(is_min) Best value at depth %d: %d, time: %.6fs",
+                        depth, best, time.perf_counter() - start_time)
+        transposition_table.store(key, best, empties)
+        return best
 
     best_val = -1000
     best_move = (-1, -1)
-    print("[get_ai_move] Searching for best move for AI...")
-    for i in range(3):
-        for j in range(3):
+    x, o = rules.from_grid(board)
+    root_keys = transposition.keys_from_masks(x, o, zobrist)
+    log.debug("Searching for best move for AI...")
+    for i in range(n):
+        for j in range(n):
             if board[i][j] == EMPTY or board[i][j] == EMPTY_ALT:
-                print(f"[get_ai_move] Trying move at ({i},{j})")
-                original = board[i][j]
-                board[i][j] = AI
-                start_time = time.time()
-                move_val = minimax(copy.deepcopy(board), 0, False)
-                end_time = time.time()
-                print(f"[get_ai_move] Move at ({i},{j}) has value {move_val}, time: {end_time - start_time:.4f}s, call count: {minimax_call_count}")
-                board[i][j] = original
-                print(f"[get_ai_move] Current best_val: {best_val}, move_val: {move_val}")
+                counts.mark(i * n + j, AI)
+                start_time = time.perf_counter()
+                child_keys = transposition.toggle(root_keys, transposition.O, i * n + j, zobrist)
+                # Occupied cells as a bitmask: the search never writes to the board
+                move_val = minimax(x | o | 1 << (i * n + j), 0, False, child_keys)
+                counts.undo(i * n + j, AI)
+                if debug:
+                    log.debug("Move at (%d,%d) has value %d, time: %.4fs, call count: %d",
+                              i, j, move_val, time.perf_counter() - start_time, search_stats.nodes)
                 if move_val > best_val:
-                    print(f"[get_ai_move] New best move found at ({i},{j}) with value {move_val}")
                     best_val = move_val
                     best_move = (i, j)
-                print(f"[get_ai_move] best_val after comparison: {best_val}")
+    if debug:
+        log.debug("Transposition table: %s", transposition_table.stats())
 
     # Fallback: if no move found (should not happen), pick first empty cell
     if best_move == (-1, -1):
-        print("[get_ai_move] No best move found, using fallback to first empty cell.")
-        for i in range(3):
-            for j in range(3):
+        log.warning("No best move found, using fallback to first empty cell.")
+        for i in range(n):
+            for j in range(n):
                 if board[i][j] == EMPTY or board[i][j] == EMPTY_ALT:
-                    print(f"[get_ai_move] Fallback move: ({i},{j})")
                     return (i, j)
-        print("[get_ai_move] No moves available, returning (-1, -1)")
+        log.warning("No moves available on board %s", board)
         return best_move if best_move != (-1, -1) else None
-    print(f"[get_ai_move] Returning best move: {best_move} with value {best_val}")
-    return best_move
\ No newline at end of file
+    log.debug("Returning best move: %s with value %d", best_move, best_val)
+    return best_move
@@ -1,18 +1,30 @@
 # Entry point for the Pygame Tic-Tac-Toe game
 
+import functools
+import logging
+import os
 import pygame
 import sys
+
+# Make the shared engine package at the repository root importable
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from tictactoe import engines, gamelog, idle, log as log_setup, mcts, ponder, rules, sprites, worker
 from ai_agent import get_ai_move  # Assumes this function exists and returns (row, col)
 
+log = logging.getLogger(__name__)
+
 # --- Game Constants ---
+RULES = rules.from_env()  # Variant from TICTACTOE_VARIANT, default 3x3
 WIDTH, HEIGHT = 400, 500
-GRID_SIZE = 3
+GRID_SIZE = RULES.size
 CELL_SIZE = WIDTH // GRID_SIZE
 LINE_WIDTH = 5
 CIRCLE_RADIUS = CELL_SIZE // 3
-CIRCLE_WIDTH = 10
-CROSS_WIDTH = 10
+CIRCLE_WIDTH = max(2, 10 * 3 // GRID_SIZE)
+CROSS_WIDTH = max(2, 10 * 3 // GRID_SIZE)
 SPACE = CELL_SIZE // 4
+FPS = 30  # While the AI is thinking, or always in continuous render mode
+AI_MIN_DELAY_MS = 300  # Small delay for UX, even when the search finishes sooner
 
 # Colors
 BG_COLOR = (28, 170, 156)
@@ -22,71 +34,48 @@ CROSS_COLOR = (84, 84, 84)
 TEXT_COLOR = (20, 20, 20)
 TURN_COLOR = (50, 50, 200)
 
-pygame.init()
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Tic-Tac-Toe: Human vs AI")
-font = pygame.font.SysFont(None, 48)
-small_font = pygame.font.SysFont(None, 32)
+REPAINT_EVENTS = (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED)
+# Window and fonts are created by init_display, so importing opens no window
+screen = None
+font = None
+small_font = None
+# Grid, marks and status labels are rendered once and blitted every frame
+surfaces = sprites.SurfaceCache(
+    sprites.Layout(GRID_SIZE, WIDTH, CELL_SIZE, LINE_WIDTH, CIRCLE_RADIUS, CIRCLE_WIDTH, CROSS_WIDTH, SPACE),
+    sprites.Theme(BG_COLOR, LINE_COLOR, CROSS_COLOR, CIRCLE_COLOR))
 
 # --- Game Logic ---
 
 def create_board():
-    print("[create_board] Creating a new empty board.")
+    log.debug("Creating a new empty board.")
     return [[None for _ in range(GRID_SIZE)] for _ in range(GRID_SIZE)]
 
 def is_board_full(board):
-    full = all(all(cell is not None for cell in row) for row in board)
-    print(f"[is_board_full] Board full: {full}")
+    full = RULES.is_full(*RULES.from_grid(board))
+    log.debug("Board full: %s", full)
     return full
 
 def check_winner(board):
-    # Rows, columns, diagonals
-    for i in range(GRID_SIZE):
-        if board[i][0] == board[i][1] == board[i][2] and board[i][0] is not None:
-            print(f"[check_winner] Winner found in row {i}: {board[i][0]}")
-            return board[i][0]
-        if board[0][i] == board[1][i] == board[2][i] and board[0][i] is not None:
-            print(f"[check_winner] Winner found in column {i}: {board[0][i]}")
-            return board[0][i]
-    # Diagonals
-    if board[0][0] == board[1][1] == board[2][2] and board[0][0] is not None:
-        print(f"[check_winner] Winner found in main diagonal: {board[0][0]}")
-        return board[0][0]
-    if board[0][2] == board[1][1] == board[2][0] and board[0][2] is not None:
-        print(f"[check_winner] Winner found in anti-diagonal: {board[0][2]}")
-        return board[0][2]
-    print("[check_winner] No winner found.")
-    return None
+    # Rows, columns, diagonals are checked against the precomputed line masks
+    winner = RULES.winner(*RULES.from_grid(board))
+    if winner:
+        log.debug("Winner found: %s", winner)
+    else:
+        log.debug("No winner found.")
+    return winner
 
 def get_empty_cells(board):
-    empty = [(r, c) for r in range(GRID_SIZE) for c in range(GRID_SIZE) if board[r][c] is None]
-    print(f"[get_empty_cells] Empty cells: {empty}")
+    empty = RULES.empty_cells(*RULES.from_grid(board))
+    log.debug("Empty cells: %s", empty)
     return empty
 
 # --- Rendering ---
 
 def draw_board(board):
     screen.fill(BG_COLOR)
-    # Draw grid lines
-    for i in range(1, GRID_SIZE):
-        pygame.draw.line(screen, LINE_COLOR, (0, i * CELL_SIZE), (WIDTH, i * CELL_SIZE), LINE_WIDTH)
-        pygame.draw.line(screen, LINE_COLOR, (i * CELL_SIZE, 0), (i * CELL_SIZE, WIDTH), LINE_WIDTH)
-    # Draw marks
-    for r in range(GRID_SIZE):
-        for c in range(GRID_SIZE):
-            center_x = c * CELL_SIZE + CELL_SIZE // 2
-            center_y = r * CELL_SIZE + CELL_SIZE // 2
-            if board[r][c] == "O":
-                pygame.draw.circle(screen, CIRCLE_COLOR, (center_x, center_y), CIRCLE_RADIUS, CIRCLE_WIDTH)
-            elif board[r][c] == "X":
-                start1 = (c * CELL_SIZE + SPACE, r * CELL_SIZE + SPACE)
-                end1 = (c * CELL_SIZE + CELL_SIZE - SPACE, r * CELL_SIZE + CELL_SIZE - SPACE)
-                start2 = (c * CELL_SIZE + SPACE, r * CELL_SIZE + CELL_SIZE - SPACE)
-                end2 = (c * CELL_SIZE + CELL_SIZE - SPACE, r * CELL_SIZE + SPACE)
-                pygame.draw.line(screen, CROSS_COLOR, start1, end1, CROSS_WIDTH)
-                pygame.draw.line(screen, CROSS_COLOR, start2, end2, CROSS_WIDTH)
-
-def draw_status(turn, winner, draw):
+    surfaces.draw_board(screen, board)
+
+def draw_status(turn, winner, draw, thinking=False):
     status_rect = pygame.Rect(0, WIDTH, WIDTH, HEIGHT - WIDTH)
     pygame.draw.rect(screen, BG_COLOR, status_rect)
     if winner:
@@ -95,21 +84,42 @@ def draw_status(turn, winner, draw):
     elif draw:
         text = "Draw!"
         color = TURN_COLOR
+    elif thinking:
+        # Animated dots show the loop is alive while the search runs
+        text = "AI is thinking" + "." * (pygame.time.get_ticks() // 300 % 4)
+        color = TURN_COLOR
     else:
         text = f"{turn}'s turn"
         color = TURN_COLOR if turn == "O" else CROSS_COLOR
-    label = font.render(text, True, color)
+    label = surfaces.text(font, text, color)
     label_rect = label.get_rect(center=(WIDTH // 2, WIDTH + (HEIGHT - WIDTH) // 2))
     screen.blit(label, label_rect)
     # Draw reset instruction
-    reset_label = small_font.render("Press R to reset", True, TEXT_COLOR)
+    reset_label = surfaces.text(small_font, "Press R to reset", TEXT_COLOR)
     reset_rect = reset_label.get_rect(center=(WIDTH // 2, HEIGHT - 30))
     screen.blit(reset_label, reset_rect)
 
 # --- Main Game Loop ---
 
+def init_display():
+    global screen, font, small_font
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Tic-Tac-Toe: Human vs AI")
+    font = pygame.font.SysFont(None, 48)
+    small_font = pygame.font.SysFont(None, 32)
+
+def wait_events(timeout_ms):
+    # Block until something happens, then drain whatever else is queued
+    event = pygame.event.wait(timeout_ms)
+    if event.type == pygame.NOEVENT:
+        return []
+    return [event] + pygame.event.get()
+
 def main():
-    print("[main] Starting main game loop.")
+    log_setup.configure()
+    init_display()
+    log.info("Starting main game loop.")
     board = create_board()
     human = "X"
     ai = "O"
@@ -117,92 +127,139 @@ def main():
     running = True
     winner = None
     draw = False
-    ai_thinking = False
+    ai_job = None  # SearchJob while the AI is thinking
+    search_worker = worker.SearchWorker()
+    clock = pygame.time.Clock()
+    render_on_change = idle.render_mode() == idle.ON_CHANGE
+    cpu = idle.CpuMeter()
+    # TICTACTOE_AI plays any registered engine instead of get_ai_move
+    ai_engine = engines.from_env(RULES) or functools.partial(get_ai_move, rules=RULES)
+    ai_name = engines.spec_from_env() or ('mcts' if mcts.from_env(RULES) else 'openai')
+    # Finished games are appended to the game log (TICTACTOE_GAME_LOG_DIR)
+    recorder = gamelog.from_env(RULES, 'human', ai_name)
+    # Replies to every human move are searched on the AI worker while the human thinks
+    ponderer = ponder.from_env(ai_engine, RULES, search_worker)
+    # AI_MIN_DELAY_MS paces searched moves; a pondered reply is played at once
+    ai_delay_ms = AI_MIN_DELAY_MS
+    dirty = True
 
     while running:
-        draw_board(board)
-        draw_status(turn, winner, draw)
-        pygame.display.flip()
-
-        if winner or draw:
-            print(f"[main] Game ended. Winner: {winner}, Draw: {draw}")
-            # Wait for reset
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    print("[main] Quit event received. Exiting game loop.")
-                    running = False
-                elif event.type == pygame.KEYDOWN and event.key == pygame.K_r:
-                    print("[main] Reset key pressed. Resetting game.")
-                    board = create_board()
-                    turn = human
-                    winner = None
-                    draw = False
-                    ai_thinking = False
-            continue
-
-        if turn == ai and not ai_thinking:
-            print("[main] AI's turn. Setting ai_thinking to True and starting timer.")
-            # AI's turn: call get_ai_move(board)
-            ai_thinking = True
-            pygame.time.set_timer(pygame.USEREVENT, 300)  # Small delay for UX
-
-        for event in pygame.event.get():
+        if dirty or not render_on_change:
+            draw_board(board)
+            draw_status(turn, winner, draw, thinking=ai_job is not None)
+            pygame.display.flip()
+            dirty = False
+
+        game_over = winner or draw
+        if turn == ai and ai_job is None and not game_over:
+            move = ponderer.reply(board) if ponderer else None
+            if move is not None:
+                log.debug("AI's turn. Pondered reply: %s (%s).", move, ponderer.stats())
+                ai_job = worker.SearchJob.completed(move)
+                ai_delay_ms = 0
+            else:
+                log.debug("AI's turn. Starting background search.")
+                # The engine reads the board through a view; nothing changes it until the job is done
+                log.debug("Submitting %s with board: %s", ai_name, board)
+                ai_job = search_worker.submit(ai_engine, engines.BoardView(board))
+                ai_delay_ms = AI_MIN_DELAY_MS
+        elif ponderer and turn == human and not game_over:
+            ponderer.start(board)
+        elif ponderer and game_over:
+            ponderer.stop()
+
+        if render_on_change and ai_job is None:
+            # Nothing changes on screen until the player does something
+            events = wait_events(int(cpu.interval * 1000))
+        else:
+            clock.tick(FPS)
+            events = pygame.event.get()
+
+        for event in events:
             if event.type == pygame.QUIT:
-                print("[main] Quit event received. Exiting game loop.")
+                log.info("Quit event received. Exiting game loop.")
                 running = False
 
+            elif event.type in REPAINT_EVENTS:
+                dirty = True
+
             elif event.type == pygame.KEYDOWN and event.key == pygame.K_r:
-                print("[main] Reset key pressed. Resetting game.")
+                log.info("Reset key pressed. Resetting game.")
+                if ai_job is not None:
+                    log.debug("Cancelling AI search.")
+                    ai_job.cancel()
+                    ai_job = None
+                if ponderer:
+                    ponderer.stop()
                 board = create_board()
+                recorder.start()
                 turn = human
                 winner = None
                 draw = False
-                ai_thinking = False
+                dirty = True
 
-            elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1 and turn == human:
+            elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1 and turn == human and not game_over:
                 x, y = event.pos
-                print(f"[main] Mouse click at ({x}, {y}) by human.")
+                log.debug("Mouse click at (%s, %s) by human.", x, y)
                 if y < WIDTH:  # Only allow clicks in grid area
-                    row = y // CELL_SIZE
-                    col = x // CELL_SIZE
-                    print(f"[main] Human attempting move at ({row}, {col}).")
-                    if board[row][col] is None and not winner:
+                    # Clamp: WIDTH is not always a multiple of the cell size
+                    row = min(y // CELL_SIZE, GRID_SIZE - 1)
+                    col = min(x // CELL_SIZE, GRID_SIZE - 1)
+                    log.debug("Human attempting move at (%s, %s).", row, col)
+                    if board[row][col] is None:
                         board[row][col] = human
-                        print(f"[main] Human placed at ({row}, {col}). Board now: {board}")
+                        recorder.move(row * GRID_SIZE + col)
+                        dirty = True
+                        log.debug("Human placed at (%s, %s). Board now: %s", row, col, board)
                         winner = check_winner(board)
                         if not winner and is_board_full(board):
-                            print("[main] Board is full after human move. Declaring draw.")
+                            log.debug("Board is full after human move. Declaring draw.")
                             draw = True
+                        if winner or draw:
+                            recorder.finish(winner)
                         else:
-                            print("[main] Switching turn to AI.")
+                            log.debug("Switching turn to AI.")
                             turn = ai
                     else:
-                        print(f"[main] Invalid move by human at ({row}, {col}). Cell occupied or game over.")
-
-            elif event.type == pygame.USEREVENT and turn == ai and ai_thinking:
-                print("[main] USEREVENT: AI's move about to be made.")
-                # AI move
-                # Convert board to AI-compatible format ('' for empty)
-                ai_board = [[cell if cell is not None else '' for cell in row] for row in board]
-                print(f"[main] Calling get_ai_move with board: {ai_board}")
-                move = get_ai_move(ai_board)
-                print(f"[main] AI selected move: {move}")
-                if move and board[move[0]][move[1]] is None:
-                    board[move[0]][move[1]] = ai
-                    print(f"[main] AI placed at ({move[0]}, {move[1]}). Board now: {board}")
-                    winner = check_winner(board)
-                    if not winner and is_board_full(board):
-                        print("[main] Board is full after AI move. Declaring draw.")
-                        draw = True
-                    else:
-                        print("[main] Switching turn to human.")
-                        turn = human
+                        log.info("Invalid move by human at (%s, %s). Cell occupied.", row, col)
+
+        if running and ai_job is not None:
+            dirty = True  # Keep the thinking indicator animated
+            if ai_job.done() and ai_job.elapsed * 1000 >= ai_delay_ms:
+                log.debug("AI search finished in %.3fs.", ai_job.elapsed)
+                move = ai_job.result()
+                ai_job = None
+                log.debug("AI selected move: %s", move)
+                if not move or board[move[0]][move[1]] is not None:
+                    # Play the first empty cell rather than asking the engine again forever
+                    fallback = RULES.empty_cells(*RULES.from_grid(board))[0]
+                    log.warning("AI move invalid or cell occupied: %s; playing %s instead", move, fallback)
+                    move = fallback
+                board[move[0]][move[1]] = ai
+                recorder.move(move[0] * GRID_SIZE + move[1])
+                log.debug("AI placed at (%s, %s). Board now: %s", move[0], move[1], board)
+                winner = check_winner(board)
+                if not winner and is_board_full(board):
+                    log.debug("Board is full after AI move. Declaring draw.")
+                    draw = True
+                if winner or draw:
+                    recorder.finish(winner)
                 else:
-                    print(f"[main] AI move invalid or cell occupied: {move}")
-                ai_thinking = False
-                pygame.time.set_timer(pygame.USEREVENT, 0)
+                    log.debug("Switching turn to human.")
+                    turn = human
+
+        usage = cpu.poll()
+        if usage is not None:
+            log.info("CPU usage %.1f%% over the last %.0fs", usage, cpu.interval)
 
-    print("[main] Exiting game. Quitting pygame.")
+    if ai_job is not None:
+        log.debug("Cancelling AI search.")
+        ai_job.cancel()
+    if ponderer:
+        ponderer.stop()
+        log.info("Pondering: %s", ponderer.stats())
+    search_worker.shutdown()
+    log.info("Exiting game. Quitting pygame.")
     pygame.quit()
     sys.exit()
 
@@ -0,0 +1,56 @@
+import random
+
+import pytest
+
+from tictactoe import rules as rules_module
+
+np = pytest.importorskip('numpy')
+batch = pytest.importorskip('tictactoe.batch')
+
+
+def random_positions(rules, count, seed=0):
+    """Bitboard pairs from random play, stopped at random plies, so some are won and some full."""
+    rng = random.Random(seed)
+    positions = []
+    for _ in range(count):
+        cells = list(range(rules.cells))
+        rng.shuffle(cells)
+        x = o = 0
+        for ply, cell in enumerate(cells[:rng.randint(0, rules.cells)]):
+            if ply % 2 == 0:
+                x |= 1 << cell
+            else:
+                o |= 1 << cell
+            if rules.winner(x, o) is not None:
+                break
+        positions.append((x, o))
+    return positions
+
+
+@pytest.mark.parametrize('variant', sorted(rules_module.VARIANTS))
+def test_batch_matches_the_rules_engine(variant):
+    rules = rules_module.variant(variant)
+    positions = random_positions(rules, 500)
+    boards = batch.from_grids([rules.to_grid(x, o) for x, o in positions])
+    result = batch.evaluate(boards, rules)
+    expected = [{'X': batch.X, 'O': batch.O}.get(rules.winner(x, o), batch.EMPTY) for x, o in positions]
+    assert result.winner.tolist() == expected
+    assert result.full.tolist() == [rules.is_full(x, o) for x, o in positions]
+    for (x, o), winner, legal in zip(positions, expected, result.legal.reshape(len(positions), -1)):
+        empty = [] if winner != batch.EMPTY else list(rules.empty_cells(x, o))
+        assert [divmod(int(cell), rules.size) for cell in np.nonzero(legal)[0]] == empty
+
+
+def test_expand_plays_every_legal_move_for_the_side_to_move():
+    children = batch.expand(np.zeros((1, 3, 3), dtype=np.int8))
+    assert len(children.boards) == 9
+    assert (children.parent == 0).all()
+    assert sorted(children.cell.tolist()) == list(range(9))
+    grandchildren = batch.expand(children.boards)
+    assert len(grandchildren.boards) == 9 * 8
+    assert (grandchildren.boards == batch.O).sum(axis=(1, 2)).tolist() == [1] * 72
+
+
+def test_rejects_boards_that_do_not_match_the_rules():
+    with pytest.raises(ValueError):
+        batch.winners(np.zeros((2, 4, 4), dtype=np.int8), rules_module.CLASSIC)
@@ -0,0 +1,63 @@
+import threading
+
+import pytest
+
+from tictactoe import engines, rules as rules_module
+
+RULES = rules_module.CLASSIC
+
+
+def first_empty(grid):
+    return next((r, c) for r, row in enumerate(grid) for c, cell in enumerate(row) if cell in (None, ''))
+
+
+def no_board():
+    return (0, 0)
+
+
+def test_board_view_reads_the_live_board():
+    board = [[None] * 3 for _ in range(3)]
+    view = engines.BoardView(board)
+    board[1][2] = 'X'
+    assert view[1][2] == 'X'
+    assert len(view) == 3 and len(view[0]) == 3
+    assert [list(row) for row in view] == board
+    assert RULES.from_grid(view) == RULES.from_grid(board)
+
+
+def test_board_view_is_read_only():
+    view = engines.BoardView([[None] * 3 for _ in range(3)])
+    with pytest.raises(TypeError):
+        view[0] = ['X', 'X', 'X']
+    with pytest.raises(TypeError):
+        view[0][0] = 'X'
+    with pytest.raises(AttributeError):
+        view.extra = 1
+
+
+def test_function_without_cancel_is_wrapped():
+    engine = engines.load('tests.test_engines:first_empty', RULES)
+    board = [['X', None, None], [None] * 3, [None] * 3]
+    assert engine(engines.BoardView(board), cancel=threading.Event()) == (0, 1)
+
+
+def test_function_without_a_board_is_rejected():
+    with pytest.raises(ValueError):
+        engines.load('tests.test_engines:no_board', RULES)
+
+
+def test_unknown_name_is_rejected():
+    with pytest.raises(ValueError):
+        engines.load('nosuch', RULES)
+
+
+@pytest.mark.parametrize('name', ['random', 'alphabeta', 'perfect', 'hard'])
+def test_registered_engines_play_a_legal_move(name):
+    engine = engines.load(name, RULES)
+    board = [['X', 'O', 'X'], [None, 'O', None], [None, 'X', None]]
+    row, col = engine(engines.BoardView(board))
+    assert board[row][col] is None
+
+
+def test_random_engine_passes_on_a_full_board():
+    assert engines.random_engine([['X', 'O', 'X'], ['X', 'O', 'O'], ['O', 'X', 'X']]) is None
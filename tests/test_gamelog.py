@@ -0,0 +1,73 @@
+import os
+
+import pytest
+
+from tictactoe import gamelog, rules as rules_module
+
+GAMES = [
+    ((4, 0, 2, 6, 8, 1, 3), 'X', False),
+    ((0, 4, 1, 2, 6, 3, 5, 7, 8), None, False),
+    ((4,), 'X', True),
+]
+
+
+def write_games(path, rules=rules_module.CLASSIC, games=GAMES):
+    with gamelog.GameLog(path, rules) as game_log:
+        for moves, winner, forfeit in games:
+            game_log.append(moves, winner, 'alphabeta', 'random', 1_700_000_000, 12.5, forfeit)
+
+
+def read_games(path):
+    with gamelog.GameLogReader(path) as reader:
+        return list(reader), reader.corrupt
+
+
+@pytest.mark.parametrize('variant', ['3x3', '7x7'])
+def test_records_round_trip(tmp_path, variant):
+    rules = rules_module.variant(variant)
+    games = GAMES + [(tuple(range(rules.cells)), 'O', False)]
+    path = str(tmp_path / 'games.tttg')
+    write_games(path, rules, games)
+    records, corrupt = read_games(path)
+    assert corrupt == 0
+    assert [(record.moves, record.result if record.result != 'draw' else None, record.forfeit)
+            for record in records] == games
+    assert {(record.engine_x, record.engine_o, record.started, record.duration_ms) for record in records} == {
+        ('alphabeta', 'random', 1_700_000_000, 12)}
+
+
+def test_reader_skips_records_that_fail_their_crc(tmp_path):
+    path = str(tmp_path / 'games.tttg')
+    write_games(path)
+    record_size = gamelog.record_size(rules_module.CLASSIC)
+    with open(path, 'r+b') as f:
+        # Flip a move byte in the second record
+        f.seek(gamelog.HEADER.size + record_size + gamelog.RECORD_HEAD.size)
+        byte = f.read(1)
+        f.seek(-1, os.SEEK_CUR)
+        f.write(bytes([byte[0] ^ 0xFF]))
+    records, corrupt = read_games(path)
+    assert corrupt == 1
+    assert [record.moves for record in records] == [GAMES[0][0], GAMES[2][0]]
+
+
+def test_torn_record_is_ignored_then_cut_off_by_the_next_writer(tmp_path):
+    path = str(tmp_path / 'games.tttg')
+    write_games(path)
+    record_size = gamelog.record_size(rules_module.CLASSIC)
+    with open(path, 'ab') as f:
+        f.write(b'\x07' * (record_size - 3))
+    records, corrupt = read_games(path)
+    assert (len(records), corrupt) == (len(GAMES), 0)
+
+    write_games(path, games=GAMES[:1])
+    assert os.path.getsize(path) == gamelog.HEADER.size + (len(GAMES) + 1) * record_size
+    records, corrupt = read_games(path)
+    assert (len(records), corrupt) == (len(GAMES) + 1, 0)
+
+
+def test_log_for_another_variant_is_refused(tmp_path):
+    path = str(tmp_path / 'games.tttg')
+    write_games(path)
+    with pytest.raises(ValueError):
+        gamelog.GameLog(path, rules_module.variant('4x4'))
@@ -0,0 +1,46 @@
+from tictactoe import mcts, rules as rules_module
+from tictactoe.transposition import O, X
+
+RULES = rules_module.CLASSIC
+
+
+def cells(*indices):
+    mask = 0
+    for cell in indices:
+        mask |= 1 << cell
+    return mask
+
+
+def test_takes_a_win_and_blocks_a_loss():
+    searcher = mcts.MCTS(RULES, playouts=2000, seed=1)
+    # O to move with 3 and 4 played: 5 wins
+    assert searcher.best_move(cells(0, 1, 8), cells(3, 4), O)[0] == 5
+    searcher = mcts.MCTS(RULES, playouts=2000, seed=1)
+    # X threatens 0-1-2: O must take 2
+    assert searcher.best_move(cells(0, 1), cells(4), O)[0] == 2
+
+
+def test_inline_search_spends_exactly_its_playout_budget():
+    searcher = mcts.MCTS(RULES, playouts=1000, seed=2)
+    searcher.best_move(0, 0, X)
+    assert searcher.playouts == 1000
+    assert searcher.root.visits == 1000
+    assert all(node.virtual == 0 for node in searcher.root.children)
+
+
+def test_expired_deadline_still_returns_a_move():
+    searcher = mcts.MCTS(RULES, playouts=0, time_ms=1e-6, seed=3)
+    cell, _ = searcher.best_move(cells(0), 0, O)
+    assert cell is not None and cell != 0
+
+
+def test_tree_is_reused_for_a_following_position():
+    searcher = mcts.MCTS(RULES, playouts=2000, seed=4)
+    cell, _ = searcher.best_move(cells(4), 0, O)
+    reply = next(c for c in range(9) if c not in (4, cell))
+    searcher.best_move(cells(4, reply), cells(cell), O)
+    assert searcher.reused > 0
+
+
+def test_finished_game_has_no_move():
+    assert mcts.MCTS(RULES, seed=5).best_move(cells(0, 1, 2), cells(3, 4), O) == (None, 0.0)
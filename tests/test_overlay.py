@@ -0,0 +1,52 @@
+import pytest
+
+from tictactoe import overlay
+
+
+def test_opacity_fades_in_holds_and_fades_out():
+    message = overlay.Overlay(1000, fade_ms=200, policy=overlay.DROP)
+    assert message.opacity(0) == 0.0
+    message.show('X wins', 1000)
+    assert message.active
+    assert message.opacity(1100) == pytest.approx(0.5)
+    assert message.opacity(1500) == 1.0
+    assert message.opacity(1900) == pytest.approx(0.5)
+    assert message.opacity(2000) == 0.0
+
+
+def test_finished_only_once_the_duration_has_run_out():
+    message = overlay.Overlay(1000, policy=overlay.DROP)
+    message.show('tie', 0)
+    assert message.finished(999) is None
+    assert message.finished(1000) == []
+    assert not message.active
+    assert message.finished(2000) is None
+
+
+def test_drop_policy_discards_input():
+    message = overlay.Overlay(1000, policy=overlay.DROP)
+    message.show('tie', 0)
+    message.intercept('click')
+    assert message.finished(1000) == []
+
+
+def test_queue_policy_hands_input_back_in_order_up_to_the_limit():
+    message = overlay.Overlay(1000, policy=overlay.QUEUE)
+    message.show('tie', 0)
+    events = list(range(overlay.QUEUE_LIMIT + 5))
+    for event in events:
+        message.intercept(event)
+    assert message.finished(1000) == events[:overlay.QUEUE_LIMIT]
+    # A new overlay starts with an empty queue
+    message.show('O wins', 2000)
+    message.intercept('click')
+    message.show('X wins', 2500)
+    assert message.finished(3500) == []
+
+
+def test_policy_comes_from_the_environment(monkeypatch):
+    monkeypatch.setenv('TICTACTOE_OVERLAY_INPUT', 'queue')
+    assert overlay.Overlay(1000).policy == overlay.QUEUE
+    monkeypatch.setenv('TICTACTOE_OVERLAY_INPUT', 'keep')
+    with pytest.raises(ValueError):
+        overlay.input_policy()
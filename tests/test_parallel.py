@@ -0,0 +1,35 @@
+import pytest
+
+from tictactoe import parallel, rules as rules_module, search, transposition
+from tictactoe.transposition import O, X
+
+
+@pytest.fixture(scope='module')
+def pool():
+    with parallel.ParallelSearch(rules_module.variant('4x4'), workers=2) as searcher:
+        yield searcher
+
+
+def serial(rules):
+    return search.AlphaBeta(transposition.TranspositionTable(capacity=1 << 16), rules)
+
+
+@pytest.mark.parametrize('x, o, player', [(0, 0, X), (1 << 5, 0, O), (1 << 0 | 1 << 5, 1 << 10, O)])
+def test_split_search_scores_like_the_serial_search(pool, x, o, player):
+    for depth in (1, 3, 4):
+        expected = serial(pool.rules).search(x, o, player, max_depth=depth)
+        result = pool.search(x, o, player, max_depth=depth)
+        assert result.score == expected.score
+        assert result.depth == depth
+
+
+def test_split_search_takes_a_win(pool):
+    # X has three of the top row and completes it
+    x, o = 0b0111, 1 << 5 | 1 << 6 | 1 << 9
+    assert pool.search(x, o, X, max_depth=2).cell == 3
+
+
+def test_speedup_report_starts_with_the_serial_search():
+    rows = list(parallel.speedup_report(rules_module.CLASSIC, 3, [1]))
+    assert [row[0] for row in rows] == [0, 1]
+    assert rows[0][2:4] == (1.0, 1.0)
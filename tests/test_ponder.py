@@ -0,0 +1,72 @@
+import threading
+import time
+
+import pytest
+
+from tictactoe import ponder, rules as rules_module, worker
+
+RULES = rules_module.CLASSIC
+
+
+def first_empty(grid, cancel=None):
+    return next((r, c) for r, row in enumerate(grid) for c, cell in enumerate(row) if cell in (None, ''))
+
+
+@pytest.fixture
+def search_worker():
+    search_worker = worker.SearchWorker()
+    yield search_worker
+    search_worker.shutdown()
+
+
+def test_pondered_reply_is_returned(search_worker):
+    ponderer = ponder.Ponderer(first_empty, RULES, search_worker, cpu=1)
+    ponderer.start(RULES.to_grid(0, 0))
+    ponderer.job.result()
+    grid = RULES.to_grid(1 << 4, 0)
+    assert ponderer.reply(grid) == first_empty(grid)
+    assert (ponderer.hits, ponderer.misses) == (1, 0)
+    assert ponderer.reply(RULES.to_grid(1 << 4 | 1 << 0, 1 << 8)) is None
+    assert (ponderer.hits, ponderer.misses) == (1, 1)
+
+
+def test_duty_cycle_bounds_cpu_use(search_worker):
+    def busy(grid, cancel=None):
+        end = time.thread_time() + 0.01
+        while time.thread_time() < end:
+            pass
+        return first_empty(grid)
+
+    ponderer = ponder.Ponderer(busy, RULES, search_worker, cpu=0.25)
+    start = time.perf_counter()
+    ponderer.start(RULES.to_grid(0, 0))
+    ponderer.job.result()
+    wall = time.perf_counter() - start
+    assert len(ponderer.cache) == 9
+    # busy() used 10 ms of CPU per reply; the job slept three times as long
+    assert 9 * 0.01 / wall <= 0.25 * 1.1
+
+
+def test_cancelled_job_does_not_write_to_the_next_cache(search_worker):
+    entered, release = threading.Event(), threading.Event()
+
+    def blocking(grid, cancel=None):
+        entered.set()
+        release.wait()
+        return first_empty(grid)
+
+    ponderer = ponder.Ponderer(blocking, RULES, search_worker, cpu=1)
+    ponderer.start(RULES.to_grid(0, 0))
+    assert entered.wait(5)
+    ponderer.stop()
+    # Queued behind the first job, which is still inside the engine
+    ponderer.start(RULES.to_grid(1 << 4, 1 << 0))
+    release.set()
+    ponderer.job.result()
+    assert ponderer.cache
+    assert all(o == 1 << 0 for _, o in ponderer.cache)
+
+
+def test_cpu_fraction_must_be_positive(search_worker):
+    with pytest.raises(ValueError):
+        ponder.Ponderer(first_empty, RULES, search_worker, cpu=0)
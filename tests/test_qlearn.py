@@ -0,0 +1,45 @@
+import pytest
+
+from tictactoe import qlearn
+
+
+def test_shipped_policy_plays_perfectly_as_either_side():
+    policy = qlearn.load()
+    assert policy is not None
+    try:
+        assert qlearn.check(policy) == []
+    finally:
+        policy.close()
+
+
+def test_damaged_policy_does_not_load(tmp_path):
+    with open(qlearn.DEFAULT_PATH, 'rb') as f:
+        data = bytearray(f.read())
+    data[-1] ^= 0xFF
+    path = tmp_path / 'policy.bin'
+    path.write_bytes(bytes(data))
+    assert qlearn.load(str(path)) is None
+    path.write_bytes(bytes(data[:qlearn.HEADER.size - 1]))
+    assert qlearn.load(str(path)) is None
+    assert qlearn.load(str(tmp_path / 'missing.bin')) is None
+
+
+def test_policy_file_round_trips(tmp_path):
+    entries = bytes(range(9)) * (qlearn.ENTRY_COUNT // 9)
+    path = qlearn.write(str(tmp_path / 'policy.bin'), entries)
+    policy = qlearn.LearnedPolicy(path)
+    try:
+        assert policy.probe(0, 0) == 0
+        assert policy.probe(1 << 0, 0) == 1
+    finally:
+        policy.close()
+
+
+def test_training_reports_progress():
+    pytest.importorskip('numpy')
+    reports = []
+    entries = qlearn.train(2000, batch=256, seed=0, report_every=1000,
+                           progress=lambda *report: reports.append(report))
+    assert len(entries) == qlearn.ENTRY_COUNT
+    assert reports and reports[-1][0] >= 2000
+    assert 0 < reports[-1][2] <= 1
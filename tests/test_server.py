@@ -0,0 +1,80 @@
+import asyncio
+import json
+import os
+import tempfile
+
+from tictactoe import server
+
+
+def converse(requests, **options):
+    """Send ``requests`` in order over one connection; return the responses."""
+
+    async def run():
+        game_server = server.GameServer(workers=1, **options)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'server.sock')
+            listener = await game_server.start(path=path)
+            try:
+                reader, writer = await asyncio.open_unix_connection(path)
+                responses = []
+                for request in requests:
+                    line = request if isinstance(request, bytes) else json.dumps(request).encode()
+                    writer.write(line + b'\n')
+                    await writer.drain()
+                    responses.append(json.loads(await reader.readline()))
+                writer.close()
+                return responses
+            finally:
+                listener.close()
+                game_server.close()
+
+    return asyncio.run(run())
+
+
+def test_new_game_is_empty_with_x_to_move():
+    (response,) = converse([{'op': 'new'}])
+    assert response == {'ok': True, 'board': ['...', '...', '...'], 'to_move': 'X', 'winner': None, 'draw': False}
+
+
+def test_move_gets_the_ai_reply_and_echoes_the_id():
+    _, response = converse([{'op': 'new'}, {'op': 'move', 'row': 1, 'col': 1, 'id': 7}])
+    assert response['ok'] and response['id'] == 7
+    row, col = response['ai_move']
+    assert response['board'][1][1] == 'X'
+    assert response['board'][row][col] == 'O'
+    assert response['to_move'] == 'X'
+
+
+def test_ai_moves_first_when_the_human_plays_o():
+    (response,) = converse([{'op': 'new', 'human': 'O'}])
+    assert response['ai_move'] is not None
+    assert ''.join(response['board']).count('X') == 1
+    assert response['to_move'] == 'O'
+
+
+def test_errors_leave_the_session_unchanged():
+    responses = converse([
+        {'op': 'new'},
+        {'op': 'move', 'row': 0, 'col': 0},
+        {'op': 'move', 'row': 0, 'col': 0},
+        {'op': 'move', 'row': 3, 'col': 0},
+        {'op': 'fly'},
+        b'not json',
+        {'op': 'new', 'engine': 'random'},
+        {'op': 'state'},
+    ])
+    errors = responses[2:7]
+    assert all(not response['ok'] and response['error'] for response in errors)
+    assert responses[-1] == {key: value for key, value in responses[1].items() if key != 'ai_move'}
+
+
+def test_game_plays_to_a_result_and_stats_count_it():
+    # Cells the AI took answer with an error; a result comes within 9 moves
+    moves = [{'op': 'move', 'row': cell // 3, 'col': cell % 3} for cell in range(9)]
+    responses = converse([{'op': 'new', 'engine': 'random'}] + moves + [{'op': 'stats'}],
+                         engines=('alphabeta', 'random'))
+    finished = [response for response in responses[1:-1] if response['ok'] and response['to_move'] is None]
+    assert finished and (finished[0]['winner'] or finished[0]['draw'])
+    stats = responses[-1]
+    assert stats['ok'] and stats['sessions'] == 1 and stats['ai_moves'] >= 1
+    assert stats['latency_ms']['p50'] is not None
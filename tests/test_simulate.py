@@ -0,0 +1,15 @@
+import pytest
+
+from tictactoe import simulate
+
+
+def test_bad_engine_spec_raises_before_the_pool_starts():
+    with pytest.raises(ValueError):
+        next(simulate.simulate('nosuch', 'random', 2, workers=1))
+
+
+def test_every_game_is_played_once():
+    results = list(simulate.simulate('random', 'alphabeta', 10, workers=2, chunk_size=3))
+    assert sorted(result.index for result in results) == list(range(10))
+    assert not any(result.forfeit for result in results)
+    assert all(result.winner in ('A', 'B', None) for result in results)
@@ -0,0 +1,63 @@
+import pytest
+
+pygame = pytest.importorskip('pygame')
+sprites = pytest.importorskip('tictactoe.sprites')
+
+LAYOUT = sprites.Layout(3, 300, 100, 5, 30, 5, 10, 25)
+THEME = sprites.Theme((0, 0, 0), (10, 10, 10), (200, 0, 0), (0, 0, 200))
+
+
+class CountingFont:
+    def __init__(self):
+        self.renders = 0
+
+    def render(self, message, antialias, color):
+        self.renders += 1
+        return pygame.Surface((len(message), 1))
+
+
+def test_text_is_rendered_once_per_label():
+    cache = sprites.SurfaceCache(LAYOUT, THEME)
+    font = CountingFont()
+    first = cache.text(font, 'X wins', (0, 0, 0))
+    assert cache.text(font, 'X wins', (0, 0, 0)) is first
+    cache.text(font, 'X wins', (255, 255, 255))
+    assert font.renders == 2
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_text_cache_evicts_the_least_recently_used_label():
+    cache = sprites.SurfaceCache(LAYOUT, THEME, text_capacity=2)
+    font = CountingFont()
+    cache.text(font, 'a', (0, 0, 0))
+    cache.text(font, 'b', (0, 0, 0))
+    cache.text(font, 'a', (0, 0, 0))
+    cache.text(font, 'c', (0, 0, 0))  # evicts 'b'
+    renders = font.renders
+    cache.text(font, 'a', (0, 0, 0))
+    assert font.renders == renders
+    cache.text(font, 'b', (0, 0, 0))
+    assert font.renders == renders + 1
+
+
+def test_surfaces_are_reused_until_invalidated():
+    cache = sprites.SurfaceCache(LAYOUT, THEME)
+    grid, cross = cache.grid(), cache.sprite('X')
+    assert cache.grid() is grid and cache.sprite('X') is cross
+    assert grid.get_size() == (300, 300)
+    assert cross.get_size() == (100, 100)
+
+
+def test_resize_and_theme_change_rerender():
+    cache = sprites.SurfaceCache(LAYOUT, THEME)
+    font = CountingFont()
+    grid = cache.grid()
+    cache.text(font, 'tie', (0, 0, 0))
+    cache.resize(LAYOUT._replace(width=450, square=150))
+    resized = cache.grid()
+    assert resized is not grid and resized.get_size() == (450, 450)
+    assert cache.sprite('O').get_size() == (150, 150)
+    cache.text(font, 'tie', (0, 0, 0))
+    assert font.renders == 2
+    cache.set_theme(THEME._replace(background=(255, 255, 255)))
+    assert cache.grid().get_at((1, 1))[:3] == (255, 255, 255)
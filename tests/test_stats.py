@@ -0,0 +1,58 @@
+from tictactoe import players, rules as rules_module, stats
+
+
+def test_nested_measures_report_once_with_the_inner_counts():
+    with stats.capture() as reports:
+        with stats.measure('outer') as outer:
+            outer.nodes += 1
+            outer.max_depth = 3
+            with stats.measure('inner') as inner:
+                inner.nodes += 10
+                inner.cutoffs += 2
+                inner.max_depth = 4
+    assert inner.report.nodes == 10
+    assert len(reports) == 1
+    report = reports[0]
+    assert report.engine == 'outer'
+    assert (report.nodes, report.cutoffs, report.max_depth) == (11, 2, 4)
+    assert report.wall_ms >= 0 and report.cpu_ms >= 0
+
+
+def test_each_move_reports_its_own_counters():
+    player = players.AnytimePlayer(rules_module.CLASSIC, time_ms=None)
+    with stats.capture() as reports:
+        player([[None] * 3 for _ in range(3)])
+        player([['X', None, None], [None, 'O', None], [None, None, 'X']])
+    assert [report.engine for report in reports] == ['alphabeta', 'alphabeta']
+    first, second = reports
+    assert player.last_report == second
+    assert first.nodes > second.nodes > 0
+    assert first.max_depth >= second.max_depth > 0
+
+
+def test_removed_hook_is_not_called():
+    calls = []
+    stats.add_hook(calls.append)
+    with stats.measure('a'):
+        pass
+    stats.remove_hook(calls.append)
+    with stats.measure('b'):
+        pass
+    assert [report.engine for report in calls] == ['a']
+
+
+def test_histogram_buckets_by_power_of_two():
+    histogram = stats.Histogram()
+    for nodes in (1, 3, 4, 5):
+        histogram(stats.SearchReport('e', nodes, 0, 0, 0, 1, 1.0, 1.0))
+    assert histogram.moves['e'] == 4
+    assert dict(histogram.buckets['e', 'nodes']) == {1.0: 1, 4.0: 2, 8.0: 1}
+    assert histogram.format('nodes').startswith('e: 4 moves, nodes')
+
+
+def test_percentile_is_nearest_rank():
+    values = list(range(1, 101))
+    assert stats.percentile(values, 50) == 50
+    assert stats.percentile(values, 99) == 99
+    assert stats.percentile([7], 99) == 7
+    assert stats.percentile([], 50) is None
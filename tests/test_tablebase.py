@@ -0,0 +1,70 @@
+import os
+
+import pytest
+
+from tictactoe import bitboard, lookup, rules as rules_module, tablebase
+
+pytest.importorskip('numpy')
+
+
+@pytest.fixture(scope='module')
+def classic_dir(tmp_path_factory):
+    directory = str(tmp_path_factory.mktemp('tablebase'))
+    tablebase.generate(rules_module.CLASSIC, directory, shard_positions=256)
+    return directory
+
+
+def reachable_positions():
+    """Yield ``(x, o, value, move)`` for every position of the perfect-play table."""
+    for rank, entry in enumerate(lookup.solve()):
+        if entry == lookup.UNREACHABLE:
+            continue
+        x = o = 0
+        for cell in range(bitboard.CELLS):
+            digit = rank // 3 ** cell % 3
+            x |= (digit == 1) << cell
+            o |= (digit == 2) << cell
+        move = entry & 0x0F
+        yield x, o, (entry >> 4) - 1, None if move == lookup.NO_MOVE else move
+
+
+def test_classic_tablebase_matches_the_lookup_table(classic_dir):
+    table = tablebase.Tablebase(rules_module.CLASSIC, classic_dir)
+    checked = 0
+    for x, o, value, move in reachable_positions():
+        result = table.probe(x, o)
+        assert result is not None and result[0] == value, (x, o)
+        best = table.best_move(x, o)
+        if move is None:
+            assert best is None and result[1] == 0
+        else:
+            # Both tables keep the game value; the lookup table also plays the fastest win
+            assert best is not None and best[1] == value
+            x_to_move = bin(x).count('1') == bin(o).count('1')
+            child = (x | 1 << best[0], o) if x_to_move else (x, o | 1 << best[0])
+            assert table.probe(*child)[0] == -value
+        checked += 1
+    table.close()
+    assert checked == 5478
+
+
+def test_incomplete_tablebase_does_not_load(tmp_path):
+    directory = str(tmp_path)
+    tablebase.generate(rules_module.CLASSIC, directory, shard_positions=256)
+    os.remove(tablebase.manifest_path(tablebase.table_dir(rules_module.CLASSIC, directory)))
+    assert tablebase.load(rules_module.CLASSIC, directory) is None
+
+
+def test_corrupt_shard_raises_on_probe(tmp_path):
+    directory = str(tmp_path)
+    tablebase.generate(rules_module.CLASSIC, directory, shard_positions=256)
+    path = tablebase.shard_path(tablebase.table_dir(rules_module.CLASSIC, directory), 0, 0)
+    with open(path, 'r+b') as f:
+        f.seek(-1, os.SEEK_END)
+        byte = f.read(1)
+        f.seek(-1, os.SEEK_END)
+        f.write(bytes([byte[0] ^ 0xFF]))
+    table = tablebase.load(rules_module.CLASSIC, directory)
+    assert table is not None
+    with pytest.raises(ValueError):
+        table.probe(0, 0)
@@ -0,0 +1,56 @@
+import threading
+
+import pytest
+
+from tictactoe import worker
+
+
+@pytest.fixture
+def search_worker():
+    search_worker = worker.SearchWorker()
+    yield search_worker
+    search_worker.shutdown()
+
+
+def test_check_cancelled_raises_once_set():
+    cancel = threading.Event()
+    worker.check_cancelled(cancel)
+    worker.check_cancelled(None)
+    cancel.set()
+    with pytest.raises(worker.SearchCancelled):
+        worker.check_cancelled(cancel)
+
+
+def test_finished_job_returns_the_move(search_worker):
+    job = search_worker.submit(lambda grid, cancel: (1, 2), None)
+    assert job.result(5) == (1, 2)
+    assert job.state == worker.DONE
+
+
+def test_cancelled_search_raises_search_cancelled(search_worker):
+    started = threading.Event()
+
+    def search(cancel):
+        started.set()
+        while True:
+            worker.check_cancelled(cancel)
+            cancel.wait(0.001)
+
+    job = search_worker.submit(search)
+    assert started.wait(5)
+    job.cancel()
+    assert isinstance(job.future.exception(5), worker.SearchCancelled)
+    assert job.state == worker.CANCELLED
+    assert job.result() is None
+
+
+def test_queued_job_never_runs(search_worker):
+    release, ran = threading.Event(), []
+    first = search_worker.submit(lambda cancel: release.wait(5))
+    second = search_worker.submit(lambda cancel: ran.append(True))
+    second.cancel()
+    release.set()
+    first.result(5)
+    search_worker.shutdown()
+    assert second.result() is None
+    assert not ran
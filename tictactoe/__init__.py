@@ -0,0 +1 @@
+"""Shared game engine used by the copilot, openai_roo_code and windsurf front ends."""
@@ -0,0 +1,328 @@
+"""Move-selection benchmarks for the three front-end AIs.
+
+Every engine is timed on a fixed corpus of 3x3 positions. Latency is the
+wall time of one move call; engines keep their caches between calls, the way
+they do in play, and a warm-up call is made before timing. Peak memory is
+measured separately with ``tracemalloc`` so tracing does not skew latency.
+Nodes come from the ``tictactoe.stats`` report the engine publishes for the
+move, and are ``null`` for engines that publish none.
+
+    python -m tictactoe.bench --output bench.json
+    python -m tictactoe.bench --compare bench.json --threshold 10
+
+Compare mode exits with status 1 if any p50/p99 latency or node count is more
+than ``--threshold`` percent above the saved baseline. Latencies under
+``--min-ms`` in both runs are ignored as timer noise.
+
+``--imports`` instead times importing each engine module in a fresh
+interpreter and exits with status 1 if one is over its budget in
+``CORE_MODULES`` (or ``--import-budget-ms``) or pulls in pygame:
+
+    python -m tictactoe.bench --imports
+
+``--deadlines`` checks the difficulty levels' latency promise: it plays the
+anytime search at every level from random positions on each variant and
+exits with status 1 if a p99 move time is over the level's budget plus
+``--slack-ms``:
+
+    python -m tictactoe.bench --deadlines --positions 100
+
+``--profile SPEC`` runs one move from ``--position`` under cProfile and
+prints the hot spots along with the move's search report:
+
+    python -m tictactoe.bench --profile openai_roo_code/ai_agent.py:get_ai_move --position empty
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from tictactoe import engines, players, rules as rules_module, search, stats
+
+DEFAULT_ENGINES = (
+    'copilot',
+    'openai_roo_code/ai_agent.py:get_ai_move',
+    'windsurf/ai.py:make_decision',
+)
+
+# Positions with the engine to move as 'O'
+CORPUS = {
+    'empty': [[None, None, None],
+              [None, None, None],
+              [None, None, None]],
+    'one_move': [['X', None, None],
+                 [None, None, None],
+                 [None, None, None]],
+    'mid_game': [['X', None, None],
+                 [None, 'O', None],
+                 [None, None, 'X']],
+    'forced_win': [['O', 'O', None],
+                   ['X', 'X', None],
+                   ['X', None, None]],
+    'forced_block': [['X', 'X', None],
+                     [None, 'O', None],
+                     [None, None, None]],
+}
+
+METRICS = ('p50_ms', 'p99_ms', 'nodes')
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Import-time budgets in ms for the modules workers, benchmarks and the server
+# load; none of them may need pygame. The runners pay for multiprocessing and asyncio.
+CORE_MODULES = {
+    'tictactoe.rules': 60,
+    'tictactoe.search': 60,
+    'tictactoe.lookup': 60,
+    'tictactoe.mcts': 60,
+    'tictactoe.players': 60,
+    'tictactoe.qlearn': 60,
+    'tictactoe.engines': 60,
+    'tictactoe.ponder': 60,
+    'openai_roo_code/ai_agent.py': 60,
+    'windsurf/ai.py': 60,
+    'tictactoe.simulate': 120,
+    'tictactoe.server': 200,
+}
+
+# Allowed overrun of a difficulty's budget at p99: the deadline is only checked
+# every search.CHECK_EVERY nodes, and the scheduler adds its own jitter
+DEADLINE_SLACK_MS = 5
+
+_IMPORT_PROBE = (
+    "import sys, time; sys.path.insert(0, {directory!r}); t = time.perf_counter(); import {module}; "
+    "print((time.perf_counter() - t) * 1000, 'pygame' in sys.modules)"
+)
+
+
+def bench_engine(spec, repeat=50, rules=None):
+    """Return ``{position: {p50_ms, p99_ms, mean_ms, nodes, peak_kib}}`` for one engine."""
+    rules = rules or rules_module.CLASSIC
+    fn = engines.load(spec, rules)
+    results = {}
+    for name, grid in CORPUS.items():
+        fn([list(row) for row in grid])  # Warm-up
+        timings = []
+        nodes = None
+        for _ in range(repeat):
+            board = [list(row) for row in grid]
+            with stats.capture() as reports:
+                t0 = time.perf_counter()
+                fn(board)
+                timings.append((time.perf_counter() - t0) * 1000)
+            if reports:
+                nodes = sum(report.nodes for report in reports)
+        tracemalloc.start()
+        fn([list(row) for row in grid])
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        timings.sort()
+        results[name] = {
+            'p50_ms': stats.percentile(timings, 50),
+            'p99_ms': stats.percentile(timings, 99),
+            'mean_ms': sum(timings) / len(timings),
+            'nodes': nodes,
+            'peak_kib': peak / 1024,
+        }
+    return results
+
+
+def run(engines=DEFAULT_ENGINES, repeat=50):
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'repeat': repeat,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        },
+        'results': {},
+    }
+    # Engines print progress; keep the benchmark output readable
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for spec in engines:
+            report['results'][spec] = bench_engine(spec, repeat)
+    return report
+
+
+def compare(current, baseline, threshold, min_ms=0.5):
+    """Return a list of regression messages; empty if within ``threshold`` percent.
+
+    Latencies below ``min_ms`` in both runs are too noisy to compare.
+    """
+    regressions = []
+    for spec, positions in current['results'].items():
+        for name, metrics in positions.items():
+            base = baseline.get('results', {}).get(spec, {}).get(name)
+            if base is None:
+                continue
+            for metric in METRICS:
+                new, old = metrics.get(metric), base.get(metric)
+                if new is None or old is None:
+                    continue
+                if metric.endswith('_ms') and max(new, old) < min_ms:
+                    continue
+                if new > old * (1 + threshold / 100):
+                    change = (new / old - 1) if old else float('inf')
+                    regressions.append(f"{spec} {name} {metric}: {old:.4g} -> {new:.4g} (+{change:.0%})")
+    return regressions
+
+
+def import_time(target, repeat=5):
+    """Return ``(best_ms, pygame_loaded)`` for importing a module name or ``.py`` path in a fresh interpreter."""
+    if target.endswith('.py'):
+        directory, module = os.path.dirname(os.path.join(REPO_ROOT, target)), os.path.basename(target)[:-3]
+    else:
+        directory, module = REPO_ROOT, target
+    code = _IMPORT_PROBE.format(directory=directory, module=module)
+    best, pygame_loaded = float('inf'), False
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', code], cwd=REPO_ROOT, check=True,
+                                capture_output=True, text=True).stdout.split()
+        best = min(best, float(output[-2]))
+        pygame_loaded = output[-1] == 'True'
+    return best, pygame_loaded
+
+
+def check_imports(modules=CORE_MODULES, budget_ms=None, repeat=5):
+    """Print each module's import time; return the list of budget or pygame violations.
+
+    ``budget_ms`` replaces the per-module budgets in ``modules`` when given.
+    """
+    failures = []
+    print(f"{'Module':<34}{'Import ms':>10}{'Budget':>8}  pygame")
+    for target, budget in modules.items():
+        limit = budget_ms or budget
+        ms, pygame_loaded = import_time(target, repeat)
+        print(f"{target:<34}{ms:>10.1f}{limit:>8.0f}  {'yes' if pygame_loaded else 'no'}")
+        if pygame_loaded:
+            failures.append(f"{target} imports pygame")
+        if ms > limit:
+            failures.append(f"{target} took {ms:.1f} ms to import (budget {limit:.0f} ms)")
+    return failures
+
+
+def random_positions(rules, count, rng):
+    """Return ``count`` unfinished grids reached by random play, with 'O' to move."""
+    grids = []
+    while len(grids) < count:
+        x = o = 0
+        cells = list(range(rules.cells))
+        rng.shuffle(cells)
+        plies = 2 * rng.randrange((rules.cells - 1) // 2) + 1
+        for ply, cell in enumerate(cells[:plies]):
+            if ply % 2:
+                o |= 1 << cell
+            else:
+                x |= 1 << cell
+        if rules.winner(x, o) is None and not rules.is_full(x, o):
+            grids.append(rules.to_grid(x, o))
+    return grids
+
+
+def check_deadlines(variants=tuple(rules_module.VARIANTS), positions=50, slack_ms=DEADLINE_SLACK_MS, seed=0):
+    """Print move latency per variant and difficulty; return the list of p99 budget violations."""
+    rng = random.Random(seed)
+    failures = []
+    print(f"{'Variant':<10}{'Level':<8}{'Budget':>8}{'p50 ms':>9}{'p99 ms':>9}{'Depth':>7}")
+    for name in variants:
+        rules = rules_module.variant(name)
+        grids = random_positions(rules, positions, rng)
+        for level, budget in search.DIFFICULTIES.items():
+            if budget is None:
+                continue
+            player = players.AnytimePlayer(rules, budget)
+            timings, depths = [], []
+            for grid in grids:
+                t0 = time.perf_counter()
+                player(grid)
+                timings.append((time.perf_counter() - t0) * 1000)
+                depths.append(player.last.depth)
+            timings.sort()
+            p99 = stats.percentile(timings, 99)
+            print(f"{name:<10}{level:<8}{budget:>8}{stats.percentile(timings, 50):>9.1f}{p99:>9.1f}"
+                  f"{sum(depths) / len(depths):>7.1f}")
+            if p99 > budget + slack_ms:
+                failures.append(f"{name} {level}: p99 {p99:.1f} ms over the {budget} ms budget")
+    return failures
+
+
+def profile_move(spec, position='empty', rules=None, sort='cumulative', limit=25):
+    """Return the move, its search report and cProfile stats for one cold move by ``spec``."""
+    rules = rules or rules_module.CLASSIC
+    fn = engines.load(spec, rules)
+    with stats.capture() as reports:
+        move, profile = stats.profile(fn, [list(row) for row in CORPUS[position]], sort=sort, limit=limit)
+    return move, reports[-1] if reports else None, profile
+
+
+def format_report(report):
+    lines = [f"{'Engine':<42}{'Position':<14}{'p50 ms':>9}{'p99 ms':>9}{'Nodes':>8}{'Peak KiB':>10}"]
+    for spec, positions in report['results'].items():
+        for name, m in positions.items():
+            nodes = '-' if m['nodes'] is None else m['nodes']
+            lines.append(f"{spec:<42}{name:<14}{m['p50_ms']:>9.3f}{m['p99_ms']:>9.3f}{nodes:>8}{m['peak_kib']:>10.1f}")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark AI move selection.")
+    parser.add_argument('--engines', nargs='+', default=list(DEFAULT_ENGINES), help="engine specs")
+    parser.add_argument('--repeat', type=int, default=50, help="timed calls per position")
+    parser.add_argument('--output', help="write the JSON report to this file")
+    parser.add_argument('--compare', metavar='BASELINE', help="fail if slower than this JSON report")
+    parser.add_argument('--threshold', type=float, default=10.0, help="allowed regression in percent")
+    parser.add_argument('--min-ms', type=float, default=0.5, help="ignore latencies below this in both runs")
+    parser.add_argument('--imports', action='store_true', help="check engine import times and pygame use instead")
+    parser.add_argument('--import-budget-ms', type=float, default=None, help="one budget for every module")
+    parser.add_argument('--deadlines', action='store_true', help="check the difficulty levels' p99 move times instead")
+    parser.add_argument('--positions', type=int, default=50, help="random positions per variant for --deadlines")
+    parser.add_argument('--slack-ms', type=float, default=DEADLINE_SLACK_MS, help="allowed p99 overrun per move")
+    parser.add_argument('--profile', metavar='SPEC', help="profile one move by this engine instead")
+    parser.add_argument('--position', default='empty', choices=sorted(CORPUS), help="position for --profile")
+    parser.add_argument('--sort', default='cumulative', help="pstats sort key for --profile")
+    args = parser.parse_args(argv)
+
+    if args.profile:
+        move, report, profile = profile_move(args.profile, args.position, sort=args.sort)
+        print(f"Move {move}, {report}")
+        print(profile)
+        return
+
+    if args.deadlines:
+        failures = check_deadlines(positions=args.positions, slack_ms=args.slack_ms)
+        for message in failures:
+            print(f"FAIL {message}")
+        sys.exit(1 if failures else 0)
+
+    if args.imports:
+        failures = check_imports(budget_ms=args.import_budget_ms)
+        for message in failures:
+            print(f"FAIL {message}")
+        sys.exit(1 if failures else 0)
+
+    report = run(args.engines, args.repeat)
+    print(format_report(report))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.output}")
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold, args.min_ms)
+        for message in regressions:
+            print(f"REGRESSION {message}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions above {args.threshold}% against {args.compare}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""Packed-integer (bitboard) representation of a 3x3 Tic Tac Toe position.
+
+A position is a pair of 9-bit masks, one per player. Bit ``row * 3 + col`` is
+set when that player owns the cell, so win detection is a mask comparison and
+move generation walks the set bits of the empty mask.
+"""
+
+SIZE = 3
+CELLS = SIZE * SIZE
+FULL_MASK = (1 << CELLS) - 1
+
+WIN_MASKS = tuple(
+    sum(1 << (r * SIZE + c) for r, c in line)
+    for line in (
+        # Rows
+        *[[(r, c) for c in range(SIZE)] for r in range(SIZE)],
+        # Columns
+        *[[(r, c) for r in range(SIZE)] for c in range(SIZE)],
+        # Diagonals
+        [(i, i) for i in range(SIZE)],
+        [(i, SIZE - i - 1) for i in range(SIZE)],
+    )
+)
+
+# is_win() answer for every possible 9-bit mask
+_WINNING = bytes(
+    any(mask & line == line for line in WIN_MASKS) for mask in range(1 << CELLS)
+)
+
+# For every mask, the cells that would complete one of its lines (occupied or not)
+_COMPLETING = tuple(
+    sum({line & ~mask for line in WIN_MASKS if bin(line & ~mask).count('1') == 1})
+    for mask in range(1 << CELLS)
+)
+
+# Number of winning lines through each cell: centre 4, corners 3, edges 2
+LINES_THROUGH = tuple(sum(line >> cell & 1 for line in WIN_MASKS) for cell in range(CELLS))
+
+
+def bit(row, col):
+    return 1 << (row * SIZE + col)
+
+
+def from_grid(grid):
+    """Pack a 3x3 list of lists into ``(x_mask, o_mask)``.
+
+    Empty cells may be ``None`` or ``''``; anything other than 'X' or 'O' is
+    treated as empty.
+    """
+    x = o = 0
+    for r, row in enumerate(grid):
+        for c, cell in enumerate(row):
+            if cell == 'X':
+                x |= 1 << (r * SIZE + c)
+            elif cell == 'O':
+                o |= 1 << (r * SIZE + c)
+    return x, o
+
+
+def to_grid(x, o, empty=None):
+    return [
+        ['X' if x >> (r * SIZE + c) & 1 else 'O' if o >> (r * SIZE + c) & 1 else empty
+         for c in range(SIZE)]
+        for r in range(SIZE)
+    ]
+
+
+def is_win(mask):
+    return bool(_WINNING[mask])
+
+
+def winner(x, o):
+    if _WINNING[x]:
+        return 'X'
+    if _WINNING[o]:
+        return 'O'
+    return None
+
+
+def winning_cells(mask, empty):
+    """Return the mask of empty cells that would complete a line for ``mask``."""
+    return _COMPLETING[mask] & empty
+
+
+def is_full(x, o):
+    return x | o == FULL_MASK
+
+
+def empty_mask(x, o):
+    return ~(x | o) & FULL_MASK
+
+
+def iter_cells(mask):
+    """Yield the index of every set bit in ``mask``, lowest first."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def empty_cells(x, o):
+    """Return the empty cells as a list of ``(row, col)`` tuples."""
+    return [divmod(i, SIZE) for i in iter_cells(empty_mask(x, o))]
@@ -0,0 +1,199 @@
+"""Engine protocol, engine registry and a read-only board view.
+
+An engine is a callable ``engine(board, cancel=None)`` that returns the
+``(row, col)`` to play for 'O', or ``None`` if no move is possible.
+``board`` is indexed ``board[row][col]`` and iterated row by row; 'X' and
+'O' are marks and ``None`` or '' an empty cell. An engine only reads the
+board. ``cancel`` is an optional ``threading.Event`` that, when set, stops a
+search by raising ``tictactoe.worker.SearchCancelled``; engines that cannot
+stop early may ignore it.
+
+The front ends hand their engine a ``BoardView`` of the live board instead
+of a converted or copied grid, so a move allocates nothing for the board.
+
+Engines are created by name, or from a ``file.py:function`` or
+``package.module:function`` spec:
+
+    from tictactoe import engines
+    engine = engines.load('hard', rules)
+    move = engine(engines.BoardView(board))
+
+``TICTACTOE_AI`` names the engine the three front ends play with instead
+of their own AI (see ``from_env``).
+"""
+
+import importlib
+import importlib.util
+import os
+import random
+import sys
+
+from tictactoe import search, transposition
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class BoardView:
+    """Read-only view of a front end's board (a list of lists).
+
+    Nothing is copied: every read goes to the board itself, so the view
+    always shows its current state. The board must not change while an
+    engine is reading it.
+    """
+
+    __slots__ = ('_grid',)
+
+    def __init__(self, grid):
+        self._grid = grid
+
+    def __len__(self):
+        return len(self._grid)
+
+    def __getitem__(self, row):
+        return _RowView(self._grid[row])
+
+    def __iter__(self):
+        return map(_RowView, self._grid)
+
+    def __repr__(self):
+        return f'BoardView({self._grid!r})'
+
+
+class _RowView:
+    __slots__ = ('_row',)
+
+    def __init__(self, row):
+        self._row = row
+
+    def __len__(self):
+        return len(self._row)
+
+    def __getitem__(self, col):
+        return self._row[col]
+
+    def __iter__(self):
+        return iter(self._row)
+
+    def __repr__(self):
+        return repr(self._row)
+
+
+def random_engine(grid, cancel=None):
+    moves = [(r, c) for r, row in enumerate(grid) for c, cell in enumerate(row) if cell in (None, '')]
+    return random.choice(moves) if moves else None
+
+
+def alphabeta_engine_factory(rules):
+    searcher = search.AlphaBeta(transposition.TranspositionTable(capacity=1 << 16), rules)
+
+    def alphabeta_engine(grid, cancel=None):
+        x, o = rules.from_grid(grid)
+        cell = searcher.search(x, o, transposition.O, cancel=cancel).cell
+        return None if cell is None else divmod(cell, rules.size)
+
+    alphabeta_engine.searcher = searcher
+    return alphabeta_engine
+
+
+# Engine factories by name: factory(rules) -> engine
+ENGINES = {}
+
+
+def register(name, factory):
+    """Make ``factory(rules)`` the engine called ``name``; return the factory."""
+    ENGINES[name] = factory
+    return factory
+
+
+def _lazy(module, attr, **kwargs):
+    """Return a factory for ``tictactoe.<module>.<attr>(rules, **kwargs)`` that imports the module on first use."""
+    def factory(rules):
+        return getattr(importlib.import_module('tictactoe.' + module), attr)(rules, **kwargs)
+
+    return factory
+
+
+# Most engines are imported on first use: one process plays one or two of them
+register('random', lambda rules: random_engine)
+register('alphabeta', alphabeta_engine_factory)
+register('mcts', _lazy('mcts', 'engine_factory'))
+register('perfect', _lazy('players', 'PerfectPlayer'))
+register('learned', _lazy('qlearn', 'engine_factory'))
+for _level, _budget in search.DIFFICULTIES.items():
+    if _budget is not None:
+        register(_level, _lazy('players', 'AnytimePlayer', time_ms=_budget))
+# The three front ends' own AIs
+register('copilot', _lazy('players', 'from_env'))
+register('windsurf', lambda rules: load('windsurf/ai.py:make_decision', rules))
+register('openai', lambda rules: load('openai_roo_code/ai_agent.py:get_ai_move', rules))
+
+
+def _load_module(path):
+    path = path if os.path.exists(path) else os.path.join(REPO_ROOT, path)
+    path = os.path.abspath(path)
+    directory = os.path.dirname(path)
+    # Front-end modules import their siblings and the shared package
+    for entry in (directory, REPO_ROOT):
+        if entry not in sys.path:
+            sys.path.insert(0, entry)
+    # Front ends only open a window from their entry point, but keep pygame headless regardless
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+    name = '_engine_' + os.path.relpath(path, REPO_ROOT).replace(os.sep, '_').replace('.', '_').replace('-', '_')
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def engine_module(spec):
+    """Return the module an engine spec's function lives in, or ``None`` for registered names."""
+    if spec in ENGINES:
+        return None
+    target, _, attr = spec.rpartition(':')
+    if not target:
+        raise ValueError(f"Engine {spec!r} must be one of {', '.join(sorted(ENGINES))} or 'module:function'")
+    if target.endswith('.py'):
+        return _load_module(target)
+    return importlib.import_module(target)
+
+
+def load(spec, rules):
+    """Return the engine for a registered name or a ``module:function`` spec.
+
+    Functions without a ``cancel`` parameter are wrapped to accept one.
+    Zero-argument functions like the copilot ``ai_move`` play from their
+    module's own game state rather than a board, so they are rejected; the
+    copilot AI is the registered ``copilot`` engine.
+    """
+    if spec in ENGINES:
+        return ENGINES[spec](rules)
+    # Imported here: inspect is most of this module's import time, and registered engines do not need it
+    import inspect
+
+    module = engine_module(spec)
+    fn = getattr(module, spec.rpartition(':')[2])
+    parameters = inspect.signature(fn).parameters
+    if 'cancel' in parameters:
+        return fn
+    if not parameters:
+        raise ValueError(f"Engine {spec!r} takes no board; engines are called as engine(board)")
+
+    def uncancellable_engine(grid, cancel=None):
+        return fn(grid)
+
+    return uncancellable_engine
+
+
+def spec_from_env():
+    """Return ``TICTACTOE_AI``, or '' if unset."""
+    return os.environ.get('TICTACTOE_AI', '')
+
+
+def from_env(rules):
+    """Return the engine named by ``TICTACTOE_AI``, or ``None`` if unset (the front end plays its own AI)."""
+    spec = spec_from_env()
+    return load(spec, rules) if spec else None
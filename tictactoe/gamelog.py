@@ -0,0 +1,324 @@
+"""Append-only binary log of finished games, with a memory-mapped reader.
+
+A log file holds one variant. After a 16-byte header every game is one
+fixed-size record::
+
+    B    number of moves
+    B    result: X_WIN, O_WIN or DRAW, plus FORFEIT if a move was illegal
+    I    engine id for X     (crc32 of the engine name)
+    I    engine id for O
+    I    start time, Unix seconds
+    I    duration, milliseconds
+    ...  moves as cell indices, two per byte on boards of up to 16 cells
+    I    crc32 of everything above
+
+Writers append a whole record with a single ``write`` on an ``O_APPEND``
+descriptor, so concurrent writers never interleave. A crash can leave at
+most one torn record at the end of the file; it fails its CRC, and the next
+writer to open the file cuts it off. Engine names are kept in a
+``<log>.names`` sidecar file, one per line.
+
+``GameLogReader`` maps the file and decodes records in place;
+``GameLogReader.array`` is a zero-copy NumPy view for scanning millions of
+records at memory speed.
+
+    python -m tictactoe.gamelog logs/games-3x3k3.tttg
+"""
+
+import logging
+import mmap
+import os
+import struct
+import time
+import zlib
+from collections import Counter, namedtuple
+
+from tictactoe import rules as rules_module
+
+log = logging.getLogger(__name__)
+
+MAGIC = b'TTTG'
+FORMAT_VERSION = 1
+# magic, version, size, k, record size, padding
+HEADER = struct.Struct('<4sHBBH6x')
+RECORD_HEAD = struct.Struct('<BBIIII')
+CRC = struct.Struct('<I')
+
+DRAW, X_WIN, O_WIN = 0, 1, 2
+FORFEIT = 0x80
+RESULT_MASK = 0x7F
+RESULT_NAMES = {DRAW: 'draw', X_WIN: 'X', O_WIN: 'O'}
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_DIR = os.path.join(REPO_ROOT, 'logs')
+
+GameRecord = namedtuple('GameRecord', 'moves result forfeit engine_x engine_o started duration_ms')
+
+
+def engine_id(name):
+    return zlib.crc32(name.encode())
+
+
+def _packed_moves(cells):
+    # Boards of up to 16 cells fit a cell index in a nibble
+    return (cells + 1) // 2 if cells <= 16 else cells
+
+
+def record_size(rules):
+    return RECORD_HEAD.size + _packed_moves(rules.cells) + CRC.size
+
+
+def pack_moves(moves, cells):
+    if cells > 16:
+        return bytes(moves).ljust(cells, b'\0')
+    packed = bytearray(_packed_moves(cells))
+    for i, cell in enumerate(moves):
+        packed[i // 2] |= cell << (4 * (i % 2))
+    return bytes(packed)
+
+
+def unpack_moves(data, count, cells):
+    if cells > 16:
+        return tuple(data[:count])
+    return tuple(data[i // 2] >> (4 * (i % 2)) & 0xF for i in range(count))
+
+
+def default_path(rules):
+    return os.path.join(DEFAULT_DIR, f"games-{rules.size}x{rules.size}k{rules.k}.tttg")
+
+
+class GameLog:
+    """Appends game records to one log file."""
+
+    def __init__(self, path, rules=None, sync=False):
+        self.path = path
+        self.rules = rules or rules_module.CLASSIC
+        self.sync = sync
+        self.record_size = record_size(self.rules)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_APPEND, 0o644)
+        self._check_header()
+        self._names = _read_names(path)
+
+    def _check_header(self):
+        header = HEADER.pack(MAGIC, FORMAT_VERSION, self.rules.size, self.rules.k, self.record_size)
+        size = os.fstat(self._fd).st_size
+        if size == 0:
+            os.write(self._fd, header)
+            return
+        existing = os.pread(self._fd, HEADER.size, 0)
+        if existing != header:
+            os.close(self._fd)
+            raise ValueError(f"{self.path} is not a game log for {self.rules.name}")
+        torn = (size - HEADER.size) % self.record_size
+        if torn:
+            # A writer died mid-record; drop the partial record
+            log.warning("Truncating %d bytes of a torn record from %s", torn, self.path)
+            os.ftruncate(self._fd, size - torn)
+
+    def _register(self, name):
+        key = engine_id(name)
+        if self._names.get(key) != name:
+            with open(self.path + '.names', 'a') as f:
+                f.write(name + '\n')
+            self._names[key] = name
+        return key
+
+    def append(self, moves, winner, engine_x, engine_o, started, duration_ms, forfeit=False):
+        """Write one game; ``winner`` is 'X', 'O' or ``None`` for a draw."""
+        result = X_WIN if winner == 'X' else O_WIN if winner == 'O' else DRAW
+        if forfeit:
+            result |= FORFEIT
+        body = RECORD_HEAD.pack(len(moves), result, self._register(engine_x), self._register(engine_o),
+                                int(started), min(int(duration_ms), 0xFFFFFFFF))
+        body += pack_moves(moves, self.rules.cells)
+        os.write(self._fd, body + CRC.pack(zlib.crc32(body)))
+        if self.sync:
+            os.fsync(self._fd)
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _read_names(path):
+    names = {}
+    try:
+        with open(path + '.names') as f:
+            for line in f:
+                name = line.rstrip('\n')
+                names[engine_id(name)] = name
+    except OSError:
+        pass
+    return names
+
+
+class GameRecorder:
+    """Collects one game's moves and timing for a front end, then logs it."""
+
+    def __init__(self, game_log, engine_x, engine_o):
+        self.log = game_log
+        self.engine_x = engine_x
+        self.engine_o = engine_o
+        self.start()
+
+    def start(self):
+        self.moves = []
+        self.started = time.time()
+        self._t0 = time.monotonic()
+
+    def move(self, cell):
+        self.moves.append(cell)
+
+    def finish(self, winner, forfeit=False):
+        """Log the game (if logging is enabled) and start recording the next one."""
+        if self.log is not None and self.moves:
+            duration_ms = (time.monotonic() - self._t0) * 1000
+            try:
+                self.log.append(self.moves, winner, self.engine_x, self.engine_o, self.started, duration_ms, forfeit)
+            except OSError as exc:
+                log.warning("Could not record game: %s", exc)
+        self.start()
+
+
+def from_env(rules, engine_x, engine_o):
+    """Return a ``GameRecorder`` for a front end.
+
+    Games go to ``TICTACTOE_GAME_LOG_DIR`` (default ``logs/`` in the
+    repository). Set it to an empty string to turn recording off; the
+    recorder then only tracks moves.
+    """
+    directory = os.environ.get('TICTACTOE_GAME_LOG_DIR', DEFAULT_DIR)
+    game_log = None
+    if directory:
+        path = os.path.join(directory, os.path.basename(default_path(rules)))
+        try:
+            game_log = GameLog(path, rules)
+        except (OSError, ValueError) as exc:
+            log.warning("Game recording disabled: %s", exc)
+    return GameRecorder(game_log, engine_x, engine_o)
+
+
+class GameLogReader:
+    """Read-only, memory-mapped view of a game log."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < HEADER.size:
+                raise ValueError(f"{path} is too short to be a game log")
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, board_size, k, self.record_size = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self._map.close()
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} game log")
+        self.rules = rules_module.get(board_size, k)
+        self.count = (size - HEADER.size) // self.record_size
+        self.names = _read_names(path)
+        self.corrupt = 0
+
+    def __len__(self):
+        return self.count
+
+    def close(self):
+        try:
+            self._map.close()
+        except BufferError:
+            # Arrays from array() still point into the mapping; it closes when they are freed
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def raw(self):
+        """Yield a zero-copy memoryview of each record, valid or not."""
+        view = memoryview(self._map)
+        size = self.record_size
+        for offset in range(HEADER.size, HEADER.size + self.count * size, size):
+            yield view[offset:offset + size]
+
+    def __iter__(self):
+        """Yield a ``GameRecord`` per record; records failing their CRC are counted in ``corrupt``."""
+        cells = self.rules.cells
+        body_size = self.record_size - CRC.size
+        names = self.names
+        self.corrupt = 0
+        for record in self.raw():
+            if zlib.crc32(record[:body_size]) != CRC.unpack_from(record, body_size)[0]:
+                self.corrupt += 1
+                continue
+            count, result, engine_x, engine_o, started, duration_ms = RECORD_HEAD.unpack_from(record)
+            yield GameRecord(
+                unpack_moves(record[RECORD_HEAD.size:body_size], count, cells),
+                RESULT_NAMES.get(result & RESULT_MASK), bool(result & FORFEIT),
+                names.get(engine_x, engine_x), names.get(engine_o, engine_o), started, duration_ms,
+            )
+
+    def array(self):
+        """Return every record as a NumPy structured array sharing the mapped memory."""
+        import numpy as np
+
+        dtype = np.dtype([
+            ('count', 'u1'), ('result', 'u1'), ('engine_x', '<u4'), ('engine_o', '<u4'),
+            ('started', '<u4'), ('duration_ms', '<u4'),
+            ('moves', 'u1', (self.record_size - RECORD_HEAD.size - CRC.size,)), ('crc', '<u4'),
+        ])
+        return np.frombuffer(self._map, dtype=dtype, count=self.count, offset=HEADER.size)
+
+
+def summary(reader):
+    """Count results per (engine X, engine O) pair in a few linear NumPy passes."""
+    import numpy as np
+
+    records = reader.array()
+    if not len(records):
+        return Counter(), 0
+    results = records['result']
+    pair = records['engine_x'].astype(np.uint64) << np.uint64(32) | records['engine_o']
+    # Logs hold long runs of the same pairing, so only the run starts need sorting
+    starts = np.flatnonzero(np.concatenate(([True], pair[1:] != pair[:-1])))
+    pairs, run_pair = np.unique(pair[starts], return_inverse=True)
+    record_pair = np.repeat(run_pair, np.diff(np.append(starts, len(records))))
+    counts = np.bincount(record_pair * 4 + (results & RESULT_MASK), minlength=len(pairs) * 4)
+    tally = Counter()
+    for index, count in enumerate(counts.tolist()):
+        if count:
+            key = int(pairs[index // 4])
+            names = (reader.names.get(key >> 32, key >> 32), reader.names.get(key & 0xFFFFFFFF, key & 0xFFFFFFFF))
+            tally[names, RESULT_NAMES.get(index % 4, index % 4)] += count
+    return tally, int(np.count_nonzero(results & FORFEIT))
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Summarise a game log.")
+    parser.add_argument('path')
+    parser.add_argument('--verify', action='store_true', help="also check every record's CRC")
+    args = parser.parse_args(argv)
+
+    with GameLogReader(args.path) as reader:
+        t0 = time.perf_counter()
+        pairs, forfeits = summary(reader)
+        elapsed = time.perf_counter() - t0
+        print(f"{len(reader):,} games ({reader.rules.name}) scanned in {elapsed * 1000:.1f} ms, {forfeits} forfeits")
+        for (pair, result), count in sorted(pairs.items(), key=lambda item: -item[1]):
+            print(f"  X {pair[0]} vs O {pair[1]}: {result} {count:,}")
+        if args.verify:
+            valid = sum(1 for _ in reader)
+            print(f"{valid:,} valid records, {reader.corrupt} failed their CRC")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+"""Render-on-change support for the front ends: mode selection and CPU usage reporting.
+
+In ``on-change`` mode (the default) a front end blocks in
+``pygame.event.wait`` while nothing is happening and repaints only after its
+state changes. ``continuous`` restores a fixed-rate redraw loop. The mode is
+read from ``TICTACTOE_RENDER_MODE``.
+"""
+
+import os
+import time
+
+ON_CHANGE = 'on-change'
+CONTINUOUS = 'continuous'
+RENDER_MODES = (ON_CHANGE, CONTINUOUS)
+
+# How often an idle loop wakes up to report CPU usage
+REPORT_INTERVAL = 10.0
+
+
+def render_mode(default=ON_CHANGE):
+    mode = os.environ.get('TICTACTOE_RENDER_MODE', default)
+    if mode not in RENDER_MODES:
+        raise ValueError(f"TICTACTOE_RENDER_MODE must be one of {', '.join(RENDER_MODES)}, got {mode!r}")
+    return mode
+
+
+class CpuMeter:
+    """Process CPU time as a percentage of wall time, over fixed intervals."""
+
+    def __init__(self, interval=REPORT_INTERVAL):
+        self.interval = interval
+        self._reset()
+
+    def _reset(self):
+        self._wall = time.monotonic()
+        self._cpu = time.process_time()
+
+    def poll(self):
+        """Return the CPU percentage once per ``interval``, otherwise ``None``."""
+        wall = time.monotonic() - self._wall
+        if wall < self.interval:
+            return None
+        percent = 100.0 * (time.process_time() - self._cpu) / wall
+        self._reset()
+        return percent
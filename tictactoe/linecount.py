@@ -0,0 +1,87 @@
+"""Incremental win and tie detection: running per-line counts updated on every mark and undo.
+
+A ``LineCounter`` keeps, for each player, how many of their marks lie on
+every k-cell line of the board, plus the number of empty cells. Marking or
+undoing a cell touches only the lines through that cell; ``winner``,
+``is_full`` and ``is_tie`` are then constant-time reads instead of a rescan
+of every row, column and diagonal.
+"""
+
+from tictactoe import rules as rules_module
+
+PLAYERS = ('X', 'O')
+
+
+def _line_ids(rules):
+    index = {line: i for i, line in enumerate(rules.lines)}
+    return tuple(tuple(index[line] for line in through) for through in rules.lines_through)
+
+
+class LineCounter:
+    """Per-line mark counts for both players on one board."""
+
+    __slots__ = ('rules', 'k', 'through', 'counts', 'completed', 'empty')
+
+    def __init__(self, rules=None):
+        self.rules = rules or rules_module.CLASSIC
+        self.k = self.rules.k
+        # Indices of the lines through each cell
+        self.through = _line_ids(self.rules)
+        self.reset()
+
+    @classmethod
+    def from_grid(cls, grid, rules=None):
+        """Build the counts for a grid of 'X', 'O' and empty cells."""
+        counter = cls(rules or rules_module.for_size(len(grid)))
+        size = counter.rules.size
+        for row, cells in enumerate(grid):
+            for col, cell in enumerate(cells):
+                if cell in PLAYERS:
+                    counter.mark(row * size + col, cell)
+        return counter
+
+    def reset(self):
+        lines = len(self.rules.lines)
+        self.counts = {player: [0] * lines for player in PLAYERS}
+        # Lines each player has filled; non-zero means that player has won
+        self.completed = {player: 0 for player in PLAYERS}
+        self.empty = self.rules.cells
+
+    def mark(self, cell, player):
+        counts = self.counts[player]
+        k = self.k
+        for line in self.through[cell]:
+            counts[line] += 1
+            if counts[line] == k:
+                self.completed[player] += 1
+        self.empty -= 1
+
+    def undo(self, cell, player):
+        """Take back ``player``'s mark on ``cell``; moves may be undone in any order."""
+        counts = self.counts[player]
+        k = self.k
+        for line in self.through[cell]:
+            if counts[line] == k:
+                self.completed[player] -= 1
+            counts[line] -= 1
+        self.empty += 1
+
+    @property
+    def winner(self):
+        """'X' or 'O' if that player has a full line, otherwise ``None``."""
+        if self.completed['X']:
+            return 'X'
+        if self.completed['O']:
+            return 'O'
+        return None
+
+    def has_won(self, player):
+        return self.completed[player] > 0
+
+    @property
+    def is_full(self):
+        return self.empty == 0
+
+    @property
+    def is_tie(self):
+        return self.empty == 0 and self.winner is None
@@ -0,0 +1,132 @@
+"""Load generator for ``tictactoe.server``: many concurrent sessions playing random moves.
+
+Every client opens its connection first and waits until all of them are
+connected, so the server really holds ``--sessions`` sessions at once. Then
+each plays ``--games`` games with random legal moves and times every
+request. The client's round-trip percentiles are printed with the server's
+own stats.
+
+    python -m tictactoe.loadgen --port 8765 --sessions 10000 --games 2
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from tictactoe.server import raise_fd_limit
+from tictactoe.stats import percentile
+
+# Connections opened at once while ramping up
+CONNECT_CONCURRENCY = 500
+
+
+class Stats:
+    def __init__(self):
+        self.latencies = []
+        self.games = 0
+        self.errors = 0
+        self.connected = 0
+        self.connect_failures = 0
+
+
+async def request(reader, writer, message):
+    writer.write(json.dumps(message).encode() + b'\n')
+    await writer.drain()
+    line = await reader.readline()
+    if not line:
+        raise ConnectionError("server closed the connection")
+    return json.loads(line)
+
+
+async def connect(args):
+    if args.unix:
+        return await asyncio.open_unix_connection(args.unix)
+    return await asyncio.open_connection(args.host, args.port)
+
+
+async def client(args, stats, connect_slots, ramped, all_connected, rng):
+    try:
+        async with connect_slots:
+            reader, writer = await connect(args)
+        stats.connected += 1
+    except OSError:
+        stats.connect_failures += 1
+        return
+    finally:
+        if stats.connected + stats.connect_failures == args.sessions:
+            ramped.set()
+    try:
+        await all_connected.wait()
+        for _ in range(args.games):
+            state = await request(reader, writer, {'op': 'new', 'variant': args.variant})
+            while state.get('ok') and state['to_move'] is not None:
+                empty = [(r, c) for r, row in enumerate(state['board']) for c, cell in enumerate(row) if cell == '.']
+                row, col = rng.choice(empty)
+                start = time.perf_counter()
+                state = await request(reader, writer, {'op': 'move', 'row': row, 'col': col})
+                stats.latencies.append((time.perf_counter() - start) * 1000)
+            if not state.get('ok'):
+                stats.errors += 1
+            stats.games += 1
+    except (OSError, ValueError):
+        stats.errors += 1
+    finally:
+        writer.close()
+
+
+async def run(args):
+    stats = Stats()
+    connect_slots = asyncio.Semaphore(CONNECT_CONCURRENCY)
+    ramped = asyncio.Event()
+    all_connected = asyncio.Event()
+    rng = random.Random(args.seed)
+    started = time.monotonic()
+    clients = [
+        asyncio.ensure_future(client(args, stats, connect_slots, ramped, all_connected, random.Random(rng.random())))
+        for _ in range(args.sessions)
+    ]
+
+    await ramped.wait()
+    ramp = time.monotonic() - started
+    # One more connection for stats; the server counts it too
+    reader, writer = await connect(args)
+    held = (await request(reader, writer, {'op': 'stats'}))['sessions'] - 1
+    print(f"{stats.connected} sessions connected in {ramp:.1f}s ({stats.connect_failures} failed), "
+          f"server holds {held}", flush=True)
+
+    started = time.monotonic()
+    all_connected.set()
+    await asyncio.gather(*clients)
+    elapsed = time.monotonic() - started
+    server_stats = await request(reader, writer, {'op': 'stats'})
+    writer.close()
+    return stats, elapsed, server_stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrent random-move clients for tictactoe.server.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', metavar='PATH', help="connect to a Unix socket instead of TCP")
+    parser.add_argument('--sessions', type=int, default=1000, help="concurrent connections")
+    parser.add_argument('--games', type=int, default=1, help="games per session")
+    parser.add_argument('--variant', default='3x3')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    raise_fd_limit()
+    stats, elapsed, server_stats = asyncio.run(run(args))
+    latencies = sorted(stats.latencies)
+    moves = len(latencies)
+    print(f"{stats.games} games, {moves} moves in {elapsed:.1f}s ({moves / elapsed if elapsed else 0:,.0f} moves/sec), "
+          f"{stats.errors} errors")
+    if latencies:
+        print(f"Round trip ms: p50 {percentile(latencies, 50):.2f}  p90 {percentile(latencies, 90):.2f}  "
+              f"p99 {percentile(latencies, 99):.2f}  max {latencies[-1]:.2f}")
+    print(f"Server: {json.dumps(server_stats)}")
+
+
+if __name__ == '__main__':
+    main()
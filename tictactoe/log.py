@@ -0,0 +1,57 @@
+"""Levelled logging for the engines and front ends, built on the standard ``logging`` module.
+
+Search code logs per-node detail at the ``TRACE`` level, below ``DEBUG``. Hot
+paths read ``logger.isEnabledFor(TRACE)`` once per search into a local flag
+and pass arguments %-style, so with tracing off a node pays one boolean test
+and no string is ever formatted.
+
+Configuration comes from the environment (or ``configure`` arguments):
+
+* ``TICTACTOE_LOG_LEVEL`` - console level name, default ``WARNING``.
+* ``TICTACTOE_TRACE_FILE`` - enable ``TRACE`` records and write them to this file.
+* ``TICTACTOE_TRACE_SAMPLE`` - trace only every Nth search node (default 1).
+"""
+
+import logging
+import os
+
+TRACE = 5
+logging.addLevelName(TRACE, 'TRACE')
+
+FORMAT = '%(asctime)s %(levelname)s %(name)s.%(funcName)s: %(message)s'
+
+_trace_sample = 1
+
+
+def configure(level=None, trace_file=None, trace_sample=None):
+    """Install console (and optional trace file) handlers on the root logger.
+
+    Safe to call more than once; handlers installed by an earlier call are replaced.
+    """
+    global _trace_sample
+    level = level or os.environ.get('TICTACTOE_LOG_LEVEL', 'WARNING')
+    trace_file = trace_file or os.environ.get('TICTACTOE_TRACE_FILE')
+    _trace_sample = max(1, int(trace_sample or os.environ.get('TICTACTOE_TRACE_SAMPLE', 1)))
+
+    root = logging.getLogger()
+    for handler in [h for h in root.handlers if getattr(h, '_tictactoe', False)]:
+        root.removeHandler(handler)
+        handler.close()
+
+    console = logging.StreamHandler()
+    console.setLevel(logging.getLevelName(level.upper()) if isinstance(level, str) else level)
+    handlers = [console]
+    if trace_file:
+        file_handler = logging.FileHandler(trace_file)
+        file_handler.setLevel(TRACE)
+        handlers.append(file_handler)
+    for handler in handlers:
+        handler._tictactoe = True
+        handler.setFormatter(logging.Formatter(FORMAT))
+        root.addHandler(handler)
+    root.setLevel(min(handler.level for handler in handlers))
+
+
+def trace_sample():
+    """Return N: searches should emit TRACE records for every Nth node only."""
+    return _trace_sample
@@ -0,0 +1,153 @@
+"""Precomputed perfect-play table for 3x3 Tic Tac Toe.
+
+Every reachable position is solved offline and stored as one byte per
+base-3 board rank, so answering a move is a single indexed read::
+
+    python -m tictactoe.lookup            # regenerate data/perfect_play.bin
+
+File layout (little endian):
+
+    magic    4s   b'TTTL'
+    version  H    FORMAT_VERSION
+    size     H    board side length (3)
+    count    I    number of entries (3 ** 9)
+    crc32    I    zlib.crc32 of the entries
+    entries  count bytes
+
+Each entry holds the best move in its low nibble (15 when the game is over)
+and the game value for the side to move in bits 4-5 (0 loss, 1 draw, 2 win).
+Positions that cannot arise in play are stored as ``UNREACHABLE``.
+"""
+
+import mmap
+import os
+import struct
+import zlib
+
+from tictactoe import bitboard
+
+MAGIC = b'TTTL'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<4sHHII')
+ENTRY_COUNT = 3 ** bitboard.CELLS
+UNREACHABLE = 0xFF
+NO_MOVE = 0x0F
+LOSS, DRAW, WIN = -1, 0, 1
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'perfect_play.bin')
+
+# Base-3 rank contribution of each 9-bit mask: empty = 0, X = 1, O = 2
+_RANK_X = tuple(sum(3 ** i for i in bitboard.iter_cells(mask)) for mask in range(1 << bitboard.CELLS))
+_RANK_O = tuple(2 * r for r in _RANK_X)
+
+
+def rank(x, o):
+    return _RANK_X[x] + _RANK_O[o]
+
+
+def solve():
+    """Solve every reachable position; return ``bytes`` of ``ENTRY_COUNT`` entries.
+
+    Wins are scored by the number of empty cells left so the stored move is
+    the fastest win (or the slowest loss).
+    """
+    table = bytearray([UNREACHABLE]) * ENTRY_COUNT
+    memo = {}
+
+    def negamax(me, opp, x_to_move):
+        key = (me, opp, x_to_move)
+        if key in memo:
+            return memo[key]
+        empty = bitboard.empty_mask(me, opp)
+        if bitboard.is_win(opp):
+            score, move = -(bin(empty).count('1') + 1), NO_MOVE
+        elif not empty:
+            score, move = 0, NO_MOVE
+        else:
+            score, move = None, NO_MOVE
+            for cell in bitboard.iter_cells(empty):
+                child = -negamax(opp, me | 1 << cell, not x_to_move)[0]
+                if score is None or child > score:
+                    score, move = child, cell
+        memo[key] = score, move
+        x, o = (me, opp) if x_to_move else (opp, me)
+        value = WIN if score > 0 else LOSS if score < 0 else DRAW
+        table[rank(x, o)] = move | (value + 1) << 4
+        return score, move
+
+    negamax(0, 0, True)
+    return bytes(table)
+
+
+def write(path=DEFAULT_PATH, entries=None):
+    if entries is None:
+        entries = solve()
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, bitboard.SIZE, len(entries), zlib.crc32(entries))
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(header)
+        f.write(entries)
+    os.replace(tmp_path, path)
+    return path
+
+
+class PerfectPlayTable:
+    """Read-only, memory-mapped view of a perfect-play file."""
+
+    def __init__(self, path=DEFAULT_PATH):
+        with open(path, 'rb') as f:
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._data) < HEADER.size:
+            self.close()
+            raise ValueError(f"{path}: truncated header")
+        magic, version, size, count, crc = HEADER.unpack_from(self._data)
+        if magic != MAGIC or version != FORMAT_VERSION or size != bitboard.SIZE or count != ENTRY_COUNT:
+            self.close()
+            raise ValueError(f"{path}: unsupported table (magic={magic!r}, version={version}, size={size})")
+        if len(self._data) != HEADER.size + count or zlib.crc32(self._data[HEADER.size:]) != crc:
+            self.close()
+            raise ValueError(f"{path}: checksum mismatch")
+        self.path = path
+
+    def probe(self, x, o, player=None):
+        """Return ``(cell, value)`` for the side to move, or ``None``.
+
+        ``cell`` is ``None`` when the game is already over. ``None`` is
+        returned for positions that cannot arise in play, and when ``player``
+        ('X' or 'O') is given but is not the side to move (X moves first).
+        """
+        if player is not None and (player == 'X') != (bin(x).count('1') == bin(o).count('1')):
+            return None
+        entry = self._data[HEADER.size + _RANK_X[x] + _RANK_O[o]]
+        if entry == UNREACHABLE:
+            return None
+        move = entry & 0x0F
+        return (None if move == NO_MOVE else move), (entry >> 4) - 1
+
+    def close(self):
+        self._data.close()
+
+
+def load(path=DEFAULT_PATH):
+    """Open the table at ``path``; return ``None`` if it is missing or invalid."""
+    try:
+        return PerfectPlayTable(path)
+    except (OSError, ValueError):
+        return None
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generate the perfect-play lookup table.")
+    parser.add_argument('--output', default=DEFAULT_PATH, help="destination file")
+    args = parser.parse_args(argv)
+    entries = solve()
+    reachable = sum(entry != UNREACHABLE for entry in entries)
+    path = write(args.output, entries)
+    print(f"Wrote {reachable} reachable positions ({HEADER.size + len(entries)} bytes) to {path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,365 @@
+"""Monte Carlo tree search (UCT) over bitboards, for boards too large to search exhaustively.
+
+Each iteration walks the tree by UCB1, expands one untried move and scores
+the new leaf with a uniformly random playout on a pair of bitmasks. A
+search runs until it has made ``playouts`` playouts or spent ``time_ms``
+milliseconds, whichever comes first, and plays the most visited move.
+
+The tree is kept between calls: when the next position is a descendant of
+the last search's root (our move plus the opponent's reply), that subtree
+becomes the new root and its statistics are reused.
+
+With ``workers`` > 1, leaves are selected in batches and their playouts run
+on a process pool. Every node on a selected path carries a virtual loss
+until its playout is backed up, which steers the rest of the batch onto
+other paths.
+
+    python -m tictactoe.mcts --variant 5x5 --playouts 20000 --workers 4
+"""
+
+import logging
+import math
+import os
+import random
+import time
+from collections import deque
+
+from tictactoe import rules as rules_module, stats, worker
+from tictactoe.transposition import O, X
+
+log = logging.getLogger(__name__)
+
+EXPLORATION = math.sqrt(2)
+DEFAULT_PLAYOUTS = 5000
+# Leaves sent to a worker process in one batch
+LEAVES_PER_WORKER = 32
+# Playouts between cancellation and deadline checks in an inline search
+CHECK_EVERY = 64
+
+
+class Node:
+    """``wins`` are from the point of view of the player who made ``move``."""
+
+    __slots__ = ('move', 'parent', 'children', 'untried', 'visits', 'wins', 'virtual', 'terminal')
+
+    def __init__(self, move=None, parent=None):
+        self.move = move
+        self.parent = parent
+        self.children = []
+        self.untried = None
+        self.visits = 0
+        self.wins = 0.0
+        self.virtual = 0
+        # 1.0 if ``move`` won the game, 0.5 if it filled the board, else None
+        self.terminal = None
+
+
+def playout(me, opp, rules, rng=random):
+    """Play random moves to the end with ``me`` to move; return 1, 0.5 or 0 for ``me``."""
+    cells = [cell for cell in range(rules.cells) if not (me | opp) >> cell & 1]
+    rng.shuffle(cells)
+    is_win_at = rules.is_win_at
+    mine = True
+    for cell in cells:
+        if mine:
+            me |= 1 << cell
+            if is_win_at(me, cell):
+                return 1.0
+        else:
+            opp |= 1 << cell
+            if is_win_at(opp, cell):
+                return 0.0
+        mine = not mine
+    return 0.5
+
+
+def _playout_batch(task):
+    size, k, positions, seed = task
+    rules = rules_module.get(size, k)
+    rng = random.Random(seed)
+    return [playout(me, opp, rules, rng) for me, opp in positions]
+
+
+class MCTS:
+    """UCT searcher with a playout/time budget, tree reuse and batched parallel playouts.
+
+    ``playouts``, ``elapsed`` and ``playouts_per_sec`` describe the most
+    recent search; ``reused`` is how many visits its root inherited.
+    ``report`` is its ``tictactoe.stats.SearchReport``, counting the tree
+    nodes walked through as nodes and playouts as leaves.
+    """
+
+    def __init__(self, rules=None, playouts=DEFAULT_PLAYOUTS, time_ms=None, workers=1,
+                 exploration=EXPLORATION, seed=None):
+        if not playouts and not time_ms:
+            raise ValueError("MCTS needs a playout budget, a time budget or both")
+        self.rules = rules or rules_module.CLASSIC
+        self.budget = playouts
+        self.time_ms = time_ms
+        self.workers = workers
+        self.exploration = exploration
+        self.rng = random.Random(seed) if seed is not None else random
+        self.executor = None
+        self.batch = 1
+        if workers > 1:
+            # Imported here: multiprocessing is the bulk of this module's import time
+            from concurrent.futures import ProcessPoolExecutor
+
+            self.executor = ProcessPoolExecutor(workers)
+            self.batch = LEAVES_PER_WORKER
+            # Start the worker processes now rather than inside the first timed search
+            list(self.executor.map(_playout_batch, [(self.rules.size, self.rules.k, [], 0)] * workers))
+        self.root = None
+        self.root_position = (0, 0)
+        self.playouts = 0
+        self.nodes = 0
+        self.elapsed = 0.0
+        self.reused = 0
+        self.steps = 0
+        self.max_depth = 0
+        self.report = None
+
+    @property
+    def playouts_per_sec(self):
+        return self.playouts / self.elapsed if self.elapsed > 0 else 0.0
+
+    def stats(self):
+        return {
+            'playouts': self.playouts,
+            'elapsed_ms': self.elapsed * 1000,
+            'playouts_per_sec': self.playouts_per_sec,
+            'reused_visits': self.reused,
+            'root_visits': self.root.visits if self.root else 0,
+        }
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+
+    def best_move(self, x, o, player=O, cancel=None):
+        """Return ``(cell, win_rate)`` for ``player`` to move, or ``(None, 0.0)`` if no move is possible.
+
+        Raises ``tictactoe.worker.SearchCancelled`` once ``cancel`` is set.
+        """
+        with stats.measure('mcts') as counters:
+            try:
+                result = self._search(x, o, player, cancel)
+            finally:
+                counters.nodes, counters.leaves, counters.tt_hits = self.steps, self.playouts, self.reused
+                counters.max_depth = self.max_depth
+        self.report = counters.report
+        return result
+
+    def _search(self, x, o, player, cancel):
+        self.playouts = self.nodes = self.reused = self.steps = self.max_depth = 0
+        me, opp = (x, o) if player == X else (o, x)
+        if self.rules.winner(x, o) is not None or not self.rules.empty_mask(x, o):
+            return None, 0.0
+        start = time.perf_counter()
+        deadline = start + self.time_ms / 1000 if self.time_ms else None
+        root = self._root_for(me, opp)
+        self.reused = root.visits
+        if self.executor is None:
+            done = self._search_inline(root, me, opp, deadline, cancel)
+        else:
+            done = self._search_parallel(root, me, opp, deadline, cancel)
+        self.playouts = self.nodes = done
+        self.elapsed = time.perf_counter() - start
+        log.debug("MCTS %d playouts in %.3fs (%.0f playouts/sec), %d visits reused",
+                  done, self.elapsed, self.playouts_per_sec, self.reused)
+        best = max(root.children, key=lambda child: child.visits)
+        return best.move, best.wins / best.visits if best.visits else 0.0
+
+    def _remaining(self, done, deadline):
+        # The first batch always runs, so the root has a child to play even on an expired deadline
+        if done and deadline is not None and time.perf_counter() >= deadline:
+            return 0
+        return self.budget - done if self.budget else self.batch * CHECK_EVERY
+
+    def _search_inline(self, root, me, opp, deadline, cancel):
+        done = 0
+        while True:
+            worker.check_cancelled(cancel)
+            count = min(CHECK_EVERY, self._remaining(done, deadline))
+            if count <= 0:
+                return done
+            # One leaf at a time, backed up before the next selection: with nothing
+            # in flight, virtual losses would only skew the statistics
+            for _ in range(count):
+                node, position = self._select(root, me, opp)
+                scores = () if position is None else (playout(*position, self.rules, self.rng),)
+                self._backup([(node, position)], scores)
+            done += count
+
+    def _search_parallel(self, root, me, opp, deadline, cancel):
+        # One batch per worker stays in flight; the virtual losses on its paths
+        # steer the next batch's selections elsewhere while it plays out
+        in_flight = deque()
+        done = 0
+        try:
+            while True:
+                worker.check_cancelled(cancel)
+                while len(in_flight) < self.workers:
+                    count = min(self.batch, self._remaining(done, deadline))
+                    if count <= 0:
+                        break
+                    leaves, positions = self._select_batch(root, me, opp, count)
+                    task = (self.rules.size, self.rules.k, positions, self.rng.getrandbits(32))
+                    in_flight.append((self.executor.submit(_playout_batch, task), leaves))
+                    done += count
+                if not in_flight:
+                    return done
+                future, leaves = in_flight.popleft()
+                self._backup(leaves, future.result())
+        finally:
+            # Back up whatever is still in flight so no virtual loss is left behind
+            for future, leaves in in_flight:
+                self._backup(leaves, future.result())
+
+    def _root_for(self, me, opp):
+        """Reuse the subtree for (me, opp) if it descends from the previous root."""
+        node = self.root
+        mover, other = self.root_position
+        if (mover | other) & ~(me | opp):
+            # Not a descendant (a new game, or a position from another game)
+            node = None
+        if node is not None:
+            added = (me | opp) & ~(mover | other)
+            # The previous root's side to move is ``me`` again after an even number of moves
+            mover_is_me = bin(added).count('1') % 2 == 0
+            while node is not None and (mover, other) != (me, opp):
+                new = (me if mover_is_me else opp) & ~mover
+                if bin(new).count('1') != 1:
+                    node = None
+                    break
+                cell = new.bit_length() - 1
+                node = next((child for child in node.children if child.move == cell), None)
+                mover, other = other, mover | new
+                mover_is_me = not mover_is_me
+        if node is None:
+            node = Node()
+        node.parent = None
+        self.root = node
+        self.root_position = (me, opp)
+        return node
+
+    def _select_batch(self, root, me, opp, count):
+        leaves = [self._select(root, me, opp) for _ in range(count)]
+        return leaves, [position for _, position in leaves if position is not None]
+
+    def _backup(self, leaves, scores):
+        scores = iter(scores)
+        for node, position in leaves:
+            # Playouts score the side to move at the leaf, the opponent of the node's mover
+            value = node.terminal if position is None else 1.0 - next(scores)
+            while node is not None:
+                node.visits += 1
+                node.virtual -= 1
+                node.wins += value
+                value = 1.0 - value
+                node = node.parent
+
+    def _walked(self, depth):
+        self.steps += depth
+        if depth > self.max_depth:
+            self.max_depth = depth
+
+    def _select(self, node, me, opp):
+        """Walk down by UCB1 and expand one move; return ``(leaf, position or None if terminal)``."""
+        rules = self.rules
+        log_total = math.log
+        c = self.exploration
+        depth = 0
+        while True:
+            depth += 1
+            node.virtual += 1
+            if node.terminal is not None:
+                self._walked(depth)
+                return node, None
+            if node.untried is None:
+                node.untried = [cell for cell in range(rules.cells) if not (me | opp) >> cell & 1]
+                self.rng.shuffle(node.untried)
+            if node.untried:
+                cell = node.untried.pop()
+                child = Node(cell, node)
+                node.children.append(child)
+                me |= 1 << cell
+                if rules.is_win_at(me, cell):
+                    child.terminal = 1.0
+                elif rules.is_full(me, opp):
+                    child.terminal = 0.5
+                child.virtual += 1
+                self._walked(depth + 1)
+                return child, (None if child.terminal is not None else (opp, me))
+            # Virtual losses count as visits that scored nothing
+            log_n = log_total(node.visits + node.virtual)
+            node = max(node.children, key=lambda child: (
+                child.wins / (child.visits + child.virtual)
+                + c * math.sqrt(log_n / (child.visits + child.virtual))))
+            me |= 1 << node.move
+            me, opp = opp, me
+
+
+def engine_factory(rules, playouts=DEFAULT_PLAYOUTS, time_ms=None, workers=1):
+    """Return a move function ``fn(grid, cancel=None) -> (row, col)`` backed by one ``MCTS``."""
+    searcher = MCTS(rules, playouts, time_ms, workers)
+
+    def mcts_engine(grid, cancel=None):
+        x, o = rules.from_grid(grid)
+        cell, _ = searcher.best_move(x, o, O, cancel)
+        return None if cell is None else divmod(cell, rules.size)
+
+    mcts_engine.searcher = searcher
+    return mcts_engine
+
+
+# Engines created by from_env, one per rules
+_env_engines = {}
+
+
+def from_env(rules):
+    """Return the shared MCTS engine for ``rules`` if ``TICTACTOE_ENGINE=mcts``, otherwise ``None``.
+
+    The budget comes from ``TICTACTOE_MCTS_PLAYOUTS`` and ``TICTACTOE_MCTS_MS``,
+    and ``TICTACTOE_MCTS_WORKERS`` sets the number of playout processes.
+    """
+    if os.environ.get('TICTACTOE_ENGINE') != 'mcts':
+        return None
+    engine = _env_engines.get(rules)
+    if engine is None:
+        time_ms = os.environ.get('TICTACTOE_MCTS_MS')
+        engine = _env_engines[rules] = engine_factory(
+            rules,
+            int(os.environ.get('TICTACTOE_MCTS_PLAYOUTS', 0 if time_ms else DEFAULT_PLAYOUTS)),
+            float(time_ms) if time_ms else None,
+            int(os.environ.get('TICTACTOE_MCTS_WORKERS', 1)),
+        )
+    return engine
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Measure MCTS playouts/sec from the empty board.")
+    parser.add_argument('--variant', default='3x3', choices=sorted(rules_module.VARIANTS))
+    parser.add_argument('--playouts', type=int, default=None, help=f"default {DEFAULT_PLAYOUTS}, unlimited with --time-ms")
+    parser.add_argument('--time-ms', type=float, default=None)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    rules = rules_module.variant(args.variant)
+    playouts = args.playouts if args.playouts is not None else (0 if args.time_ms else DEFAULT_PLAYOUTS)
+    searcher = MCTS(rules, playouts, args.time_ms, args.workers, seed=args.seed)
+    try:
+        cell, win_rate = searcher.best_move(0, 0, X)
+    finally:
+        searcher.close()
+    stats = searcher.stats()
+    print(f"{rules.name}: move {divmod(cell, rules.size)} (win rate {win_rate:.2f}), "
+          f"{stats['playouts']} playouts in {stats['elapsed_ms']:.0f} ms, "
+          f"{stats['playouts_per_sec']:,.0f} playouts/sec with {args.workers} worker(s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""Timed result overlays that fade in and out while the event loop keeps running.
+
+An ``Overlay`` replaces a blocking ``pygame.time.wait``: the loop calls
+``show`` when a game ends, keeps drawing frames and pumping events, and reads
+``opacity`` each frame until ``finished`` reports the overlay is over. It only
+tracks time, so the front end decides what the overlay looks like.
+
+Input that arrives while an overlay is up is handled by ``intercept``
+according to a policy read from ``TICTACTOE_OVERLAY_INPUT``:
+
+* ``drop`` (default) - discard clicks and keys until the overlay is gone.
+* ``queue`` - hold them and hand them back from ``finished``, so a click
+  made during the overlay lands on the next game's board.
+"""
+
+import os
+
+DROP = 'drop'
+QUEUE = 'queue'
+INPUT_POLICIES = (DROP, QUEUE)
+
+FADE_MS = 200
+# Longest backlog kept in queue mode; later events are dropped
+QUEUE_LIMIT = 32
+
+
+def input_policy(default=DROP):
+    policy = os.environ.get('TICTACTOE_OVERLAY_INPUT', default)
+    if policy not in INPUT_POLICIES:
+        raise ValueError(f"TICTACTOE_OVERLAY_INPUT must be one of {', '.join(INPUT_POLICIES)}, got {policy!r}")
+    return policy
+
+
+class Overlay:
+    """One message at a time: fade in, hold, fade out over ``duration_ms``."""
+
+    def __init__(self, duration_ms, fade_ms=FADE_MS, policy=None):
+        self.duration_ms = duration_ms
+        self.fade_ms = min(fade_ms, duration_ms // 2)
+        self.policy = policy or input_policy()
+        self.message = None
+        self.started_ms = None
+        self._queued = []
+
+    @property
+    def active(self):
+        return self.message is not None
+
+    def show(self, message, now_ms):
+        self.message = message
+        self.started_ms = now_ms
+        self._queued = []
+
+    def opacity(self, now_ms):
+        """Return 0.0 - 1.0 for the current frame; 0.0 when no overlay is shown."""
+        if not self.active:
+            return 0.0
+        elapsed = now_ms - self.started_ms
+        remaining = self.duration_ms - elapsed
+        if elapsed <= 0 or remaining <= 0:
+            return 0.0
+        if self.fade_ms and elapsed < self.fade_ms:
+            return elapsed / self.fade_ms
+        if self.fade_ms and remaining < self.fade_ms:
+            return remaining / self.fade_ms
+        return 1.0
+
+    def intercept(self, event):
+        """Take an input event that arrived during the overlay (queued or dropped)."""
+        if self.policy == QUEUE and len(self._queued) < QUEUE_LIMIT:
+            self._queued.append(event)
+
+    def finished(self, now_ms):
+        """Return the queued events once the overlay has run out, otherwise ``None``."""
+        if not self.active or now_ms - self.started_ms < self.duration_ms:
+            return None
+        queued, self._queued = self._queued, []
+        self.message = None
+        self.started_ms = None
+        return queued
@@ -0,0 +1,257 @@
+"""Root-split alpha-beta search on a persistent process pool.
+
+The first root move in move order (the eldest brother) is searched in this
+process to get an alpha bound; only then are the remaining root moves
+handed to the pool, Young Brothers Wait style. Each worker keeps its own
+``AlphaBeta`` and transposition table between searches, reads the best
+score found so far from a shared value before it starts a move, and
+publishes its own score there when it beats it. A move that fails low is
+known to be no better and needs no exact score.
+
+With ``time_ms`` the search deepens one ply at a time, like
+``AlphaBeta.search``; every worker stops at the same wall-clock deadline.
+
+``TICTACTOE_SEARCH_WORKERS`` > 1 makes the front ends' alpha-beta searches
+use a shared pool of that many processes (see ``from_env``).
+
+``python -m tictactoe.parallel`` reports the speedup over the serial
+search for a range of worker counts. With fewer cores than workers the
+measured speedup is capped by the machine, so the report also gives an
+estimate, not measured, of the speedup the node counts would allow with
+one core per worker:
+
+    python -m tictactoe.parallel --variant 5x5 --depth 7 --workers 1 2 4 8 16
+"""
+
+import os
+import time
+from concurrent.futures import wait
+
+from tictactoe import rules as rules_module, search, stats, transposition, worker
+from tictactoe.search import SearchResult, SearchTimeout
+from tictactoe.transposition import O, X
+
+# How often a search waiting on the pool checks its cancel event
+CANCEL_POLL_SECONDS = 0.01
+
+# Worker-process state, set up by _init_worker
+_searcher = None
+_shared_alpha = None
+
+
+def _init_worker(size, k, table_capacity, shared_alpha, cancel):
+    global _searcher, _shared_alpha
+    _searcher = search.AlphaBeta(transposition.TranspositionTable(capacity=table_capacity), rules_module.get(size, k))
+    _searcher.cancel = cancel
+    _shared_alpha = shared_alpha
+
+
+def _score_move(task):
+    """Score one root move in a worker; return ``(cell, score or None if stopped, alpha used, report)``."""
+    x, o, player, cell, depth, deadline = task
+    with _shared_alpha.get_lock():
+        alpha = _shared_alpha.value
+    time_ms = None if deadline is None else (deadline - time.time()) * 1000
+    with stats.measure('alphabeta') as counters:
+        _searcher.reset_counters()
+        try:
+            score = _searcher.score_move(x, o, player, cell, alpha, depth, time_ms)
+        except (SearchTimeout, worker.SearchCancelled):
+            score = None
+        finally:
+            _searcher.copy_counters(counters)
+    if score is not None and score > alpha:
+        with _shared_alpha.get_lock():
+            if score > _shared_alpha.value:
+                _shared_alpha.value = score
+    return cell, score, alpha, counters.report
+
+
+class ParallelSearch:
+    """Alpha-beta search with the root moves split across ``workers`` processes.
+
+    The pool starts, and every worker builds its tables, in the constructor,
+    so no search pays for process start-up. ``search`` has the signature and
+    result of ``AlphaBeta.search``; ``close`` shuts the pool down. Cancelling
+    a search stops the workers' moves too, through a shared event.
+    """
+
+    def __init__(self, rules=None, workers=os.cpu_count(), table_capacity=1 << 16):
+        # Imported here: multiprocessing is the bulk of this module's import time
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        self.rules = rules or rules_module.CLASSIC
+        self.workers = workers
+        self.local = search.AlphaBeta(transposition.TranspositionTable(capacity=table_capacity), self.rules)
+        self.shared_alpha = multiprocessing.Value('d', -self.local.infinity)
+        self.cancel_workers = multiprocessing.Event()
+        self.executor = ProcessPoolExecutor(
+            workers, initializer=_init_worker,
+            initargs=(self.rules.size, self.rules.k, table_capacity, self.shared_alpha, self.cancel_workers))
+        # Warm up: start every worker process now
+        list(self.executor.map(_score_move, [(0, 0, X, 0, 1, None)] * workers))
+
+    def close(self):
+        self.executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def search(self, x, o, player=O, time_ms=None, max_depth=None, cancel=None):
+        """Return a ``SearchResult`` for ``player`` to move; see ``AlphaBeta.search``."""
+        with stats.measure('parallel') as counters:
+            result = self._deepen(x, o, player, time_ms, max_depth, cancel, counters)
+        return result._replace(report=counters.report)
+
+    def best_move(self, x, o, player=O):
+        result = self.search(x, o, player)
+        return result.cell, result.score
+
+    def _deepen(self, x, o, player, time_ms, max_depth, cancel, counters):
+        deadline = None if time_ms is None else time.time() + time_ms / 1000
+        me, opp = (x, o) if player == X else (o, x)
+        empty = self.rules.empty_mask(me, opp)
+        if self.rules.winner(x, o) is not None or not empty:
+            # Game over: the serial search scores it
+            return self.local.search(x, o, player)
+        remaining = bin(empty).count('1')
+        if time_ms is None and max_depth is None:
+            depths = (remaining,)
+        else:
+            depths = range(1, min(max_depth or remaining, remaining) + 1)
+        order = self.local.order_moves(me, opp, empty, 0)
+        cell, score, reached = order[0], None, 0
+        for depth in depths:
+            best, finished = self._split(x, o, player, order, None if depth == remaining else depth,
+                                         deadline, cancel, counters)
+            if best is not None:
+                cell, score = best
+            if not finished:
+                break
+            reached = depth
+            if abs(score) >= 1:
+                break
+            order.remove(cell)
+            order.insert(0, cell)
+        complete = score is not None and (reached == remaining or abs(score) >= 1)
+        return SearchResult(cell, score, reached, complete, None)
+
+    def _split(self, x, o, player, order, depth, deadline, cancel, counters):
+        """Search one iteration; return ``(best (cell, score) or None, finished)``."""
+        eldest = order[0]
+        self.local.cancel = cancel
+        try:
+            with stats.measure('alphabeta') as eldest_counters:
+                self.local.reset_counters()
+                try:
+                    time_ms = None if deadline is None else (deadline - time.time()) * 1000
+                    eldest_score = self.local.score_move(x, o, player, eldest, None, depth, time_ms)
+                finally:
+                    self.local.copy_counters(eldest_counters)
+        except SearchTimeout:
+            return None, False
+        finally:
+            self.local.cancel = None
+        best = (eldest, eldest_score)
+        with self.shared_alpha.get_lock():
+            self.shared_alpha.value = eldest_score
+        futures = [self.executor.submit(_score_move, (x, o, player, cell, depth, deadline)) for cell in order[1:]]
+        finished = True
+        try:
+            for future in futures:
+                while cancel is not None and not future.done():
+                    if cancel.wait(CANCEL_POLL_SECONDS):
+                        self.cancel_workers.set()
+                        break
+                cell, score, alpha, report = future.result()
+                counters.add(report)
+                if score is None:
+                    finished = False
+                elif score > alpha and score > best[1]:
+                    # Only a score above its window is exact
+                    best = (cell, score)
+        finally:
+            for future in futures:
+                future.cancel()
+            if self.cancel_workers.is_set():
+                wait(futures)
+                self.cancel_workers.clear()
+        worker.check_cancelled(cancel)
+        return best, finished
+
+
+# Pools created by from_env, one per rules
+_env_searchers = {}
+
+
+def from_env(rules):
+    """Return the shared ``ParallelSearch`` for ``rules`` if ``TICTACTOE_SEARCH_WORKERS`` > 1, otherwise ``None``.
+
+    Always ``None`` inside a worker process: the simulator and server already
+    spread games across the cores, and a pool nested in a pool worker keeps
+    it from exiting.
+    """
+    workers = int(os.environ.get('TICTACTOE_SEARCH_WORKERS', 1))
+    if workers <= 1:
+        return None
+    import multiprocessing
+
+    if multiprocessing.parent_process() is not None:
+        return None
+    searcher = _env_searchers.get(rules)
+    if searcher is None:
+        searcher = _env_searchers[rules] = ParallelSearch(rules, workers)
+    return searcher
+
+
+def speedup_report(rules, depth, worker_counts, positions=None):
+    """Yield ``(workers, seconds, speedup, node_speedup, nodes)``; workers 0 is the serial search.
+
+    ``speedup`` is the wall-clock speedup measured on this machine.
+    ``node_speedup`` is an estimate, not a measurement: the speedup with one
+    core per worker if time were proportional to nodes. It counts the extra
+    nodes a split search visits but not the cores the machine lacks, nor
+    any pool overhead.
+    """
+    positions = positions or [(0, 0, X)]
+
+    def timed(searcher):
+        nodes = 0
+        start = time.perf_counter()
+        for x, o, player in positions:
+            nodes += searcher.search(x, o, player, max_depth=depth).report.nodes
+        return time.perf_counter() - start, nodes
+
+    serial, serial_nodes = timed(search.AlphaBeta(transposition.TranspositionTable(capacity=1 << 16), rules))
+    yield 0, serial, 1.0, 1.0, serial_nodes
+    for workers in worker_counts:
+        with ParallelSearch(rules, workers) as searcher:
+            seconds, nodes = timed(searcher)
+        yield workers, seconds, serial / seconds, serial_nodes * workers / nodes, nodes
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Measure parallel root-split speedup over the serial search.")
+    parser.add_argument('--variant', default='5x5', choices=sorted(rules_module.VARIANTS))
+    parser.add_argument('--depth', type=int, default=7, help="search depth in plies from the empty board")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8, 16])
+    args = parser.parse_args(argv)
+
+    rules = rules_module.variant(args.variant)
+    print(f"{rules.name}, depth {args.depth}, {os.cpu_count()} CPU core(s) available")
+    print(f"{'Workers':>8}{'Seconds':>10}{'Speedup':>9}{'Efficiency':>12}{'Est. speedup':>14}{'Nodes':>10}")
+    for workers, seconds, speedup, node_speedup, nodes in speedup_report(rules, args.depth, args.workers):
+        label = 'serial' if workers == 0 else workers
+        efficiency = speedup / max(workers, 1)
+        print(f"{label:>8}{seconds:>10.3f}{speedup:>9.2f}{efficiency:>12.0%}{node_speedup:>14.2f}{nodes:>10}")
+    print("Speedup is measured; Est. speedup is projected from node counts, assuming one core per worker")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+"""Front-end AIs as plain move functions on a grid, importable without pygame.
+
+A player is an engine in the sense of ``tictactoe.engines``: it is called
+with a grid (list of lists of 'X', 'O' and empty cells, or a ``BoardView``)
+and an optional cancel event, and returns ``(row, col)`` for 'O', or
+``None`` if no move is possible. It never touches the grid, so workers,
+benchmarks and the server can share the front ends' AIs without opening a
+window.
+
+    from tictactoe import players
+    move = players.PerfectPlayer()([['X', None, None], [None, None, None], [None, None, None]])
+
+Each call leaves its ``tictactoe.stats.SearchReport`` in ``last_report``
+and passes it to the report hooks.
+
+Difficulty levels (``TICTACTOE_DIFFICULTY``) are latency budgets for an
+anytime search, see ``tictactoe.search.DIFFICULTIES``; ``from_env`` picks
+the player for one.
+"""
+
+import os
+
+from tictactoe import bitboard, lookup, rules as rules_module, search, stats, transposition
+
+
+def mcts_from_env(rules):
+    """``tictactoe.mcts.from_env``, without importing the MCTS engine unless it is selected."""
+    if os.environ.get('TICTACTOE_ENGINE') != 'mcts':
+        return None
+    # Imported here: the MCTS engine is a large share of this module's import time
+    from tictactoe import mcts
+
+    return mcts.from_env(rules)
+
+
+def searcher_from_env(rules, table_capacity=1 << 14):
+    """The shared ``tictactoe.parallel`` pool with ``TICTACTOE_SEARCH_WORKERS``, otherwise a new ``search.AlphaBeta``."""
+    if int(os.environ.get('TICTACTOE_SEARCH_WORKERS', 1)) > 1:
+        # Imported here: most runs search on one core
+        from tictactoe import parallel
+
+        searcher = parallel.from_env(rules)
+        if searcher is not None:
+            return searcher
+    return search.AlphaBeta(transposition.TranspositionTable(capacity=table_capacity), rules)
+
+
+class PerfectPlayer:
+    """The copilot AI: the perfect-play table on 3x3, a retrograde tablebase on
+    larger boards when one has been generated, alpha-beta search otherwise.
+    Beyond 3x3 the search stops after ``search.SEARCH_BUDGET_MS`` with the best move
+    found so far.
+
+    The searcher is kept across moves and games so its transposition, killer
+    and history tables stay warm; with ``TICTACTOE_SEARCH_WORKERS`` it is
+    the shared ``tictactoe.parallel`` pool. With ``TICTACTOE_ENGINE=mcts`` the move
+    comes from Monte Carlo tree search instead.
+    """
+
+    def __init__(self, rules=None, table_capacity=1 << 14):
+        self.rules = rules or rules_module.CLASSIC
+        self.searcher = searcher_from_env(self.rules, table_capacity)
+        # None if missing or corrupt, and on other variants
+        self.perfect_play = lookup.load() if (self.rules.size, self.rules.k) == (3, 3) else None
+        self.tablebase = None
+        if self.perfect_play is None:
+            # Imported here: only boards beyond 3x3 have a tablebase
+            from tictactoe import tablebase
+
+            self.tablebase = tablebase.load(self.rules)
+        self.mcts_engine = mcts_from_env(self.rules)
+        self.time_ms = None if self.rules.cells <= bitboard.CELLS else search.SEARCH_BUDGET_MS
+        self.last_report = None
+
+    @property
+    def name(self):
+        return 'mcts' if self.mcts_engine else 'copilot'
+
+    def __call__(self, grid, cancel=None):
+        with stats.measure(self.name) as counters:
+            move = self._move(grid, cancel)
+        self.last_report = counters.report
+        return move
+
+    def _move(self, grid, cancel):
+        if self.mcts_engine:
+            return self.mcts_engine(grid, cancel)
+        x, o = self.rules.from_grid(grid)
+        entry = self.perfect_play.probe(x, o, 'O') if self.perfect_play else None
+        if entry is not None and entry[0] is not None:
+            return divmod(entry[0], self.rules.size)
+        best = None
+        if self.tablebase:
+            try:
+                best = self.tablebase.best_move(x, o)
+            except (OSError, ValueError):
+                # A shard went missing or is corrupt: search from now on
+                self.tablebase.close()
+                self.tablebase = None
+        if best is not None:
+            return divmod(best[0], self.rules.size)
+        cell = self.searcher.search(x, o, transposition.O, self.time_ms, cancel=cancel).cell
+        return None if cell is None else divmod(cell, self.rules.size)
+
+
+class AnytimePlayer:
+    """Alpha-beta search that answers within ``time_ms`` with the best move
+    found so far; the latency budget sets the playing strength.
+
+    ``last`` is the ``SearchResult`` of the most recent move, and
+    ``last_report`` its report.
+    """
+
+    def __init__(self, rules=None, time_ms=search.DIFFICULTIES[search.DEFAULT_DIFFICULTY], table_capacity=1 << 14):
+        self.rules = rules or rules_module.CLASSIC
+        self.time_ms = time_ms
+        self.searcher = searcher_from_env(self.rules, table_capacity)
+        self.last = None
+        self.last_report = None
+
+    @property
+    def name(self):
+        return 'alphabeta' if self.time_ms is None else f'alphabeta-{self.time_ms}ms'
+
+    def __call__(self, grid, cancel=None):
+        x, o = self.rules.from_grid(grid)
+        with stats.measure(self.name) as counters:
+            self.last = self.searcher.search(x, o, transposition.O, self.time_ms, cancel=cancel)
+        self.last_report = counters.report
+        return None if self.last.cell is None else divmod(self.last.cell, self.rules.size)
+
+
+def from_env(rules=None, default='perfect'):
+    """Return the player for ``TICTACTOE_DIFFICULTY`` (``default`` if unset).
+
+    'perfect' is the ``PerfectPlayer``; the other levels are an
+    ``AnytimePlayer`` with that level's latency budget. ``TICTACTOE_ENGINE=mcts``
+    takes precedence, with its own budget.
+    """
+    time_ms = search.difficulty_from_env(default)
+    if time_ms is None or mcts_from_env(rules or rules_module.CLASSIC):
+        return PerfectPlayer(rules)
+    return AnytimePlayer(rules, time_ms)
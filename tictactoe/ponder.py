@@ -0,0 +1,178 @@
+"""Pondering: search the AI's replies while the human is thinking.
+
+When it becomes the human's turn, ``Ponderer.start`` queues one background
+job on the front end's ``SearchWorker``. It plays each legal human move in
+turn, cells on the most lines first, asks the engine for its reply and
+caches it. When the human moves, ``reply`` stops the job and answers from
+the cache; a miss means the front end searches as before. The engine never
+runs on two threads at once, since the ponder job and the front end's own
+searches share the worker thread.
+
+CPU use is bounded by a duty cycle: after a search that used ``t`` seconds
+of CPU the job sleeps ``t * (1 - cpu) / cpu``, so it uses at most ``cpu``
+of one core on average. ``TICTACTOE_PONDER_CPU`` sets the fraction for the
+front ends (default 0.5); 0 turns pondering off. Only the worker thread's
+own CPU time is counted: engines that search on a process pool (MCTS with
+``TICTACTOE_MCTS_WORKERS``, ``tictactoe.parallel`` with
+``TICTACTOE_SEARCH_WORKERS``) use more than the fraction suggests, since
+their workers' time is not seen.
+
+``python -m tictactoe.ponder`` plays an engine against a random human who
+thinks for ``--think-ms`` per move and reports the hit rate and the AI's
+reply latency on hits and misses:
+
+    python -m tictactoe.ponder --engine hard --variant 5x5 --think-ms 2000
+"""
+
+import os
+import random
+import time
+
+from tictactoe import rules as rules_module, worker
+
+DEFAULT_CPU = 0.5
+
+
+class Ponderer:
+    """Cache of ``engine``'s replies to each human move, filled while the human thinks.
+
+    ``hits`` and ``misses`` count the human moves that were and were not in
+    the cache when ``reply`` was called.
+    """
+
+    def __init__(self, engine, rules, search_worker, cpu=DEFAULT_CPU):
+        if not 0 < cpu <= 1:
+            raise ValueError(f"cpu must be in (0, 1], got {cpu}")
+        self.engine = engine
+        self.rules = rules
+        self.search_worker = search_worker
+        self.cpu = cpu
+        self.cache = {}
+        self.job = None
+        self.hits = self.misses = 0
+
+    @property
+    def active(self):
+        return self.job is not None
+
+    @property
+    def hit_rate(self):
+        asked = self.hits + self.misses
+        return self.hits / asked if asked else 0.0
+
+    def start(self, grid):
+        """Start pondering the position in ``grid``, with the human to move; no-op if already pondering.
+
+        The grid is read here, on the caller's thread; the job never touches it.
+        """
+        if self.job is not None:
+            return
+        x, o = self.rules.from_grid(grid)
+        # A cancelled job may still be finishing a search; it writes to its own cache
+        self.cache = {}
+        self.job = self.search_worker.submit(self._ponder, x, o, self.cache)
+
+    def stop(self):
+        if self.job is not None:
+            self.job.cancel()
+            self.job = None
+
+    def reply(self, grid):
+        """Stop pondering; return the cached reply to the position in ``grid``, or ``None`` on a miss."""
+        self.stop()
+        move = self.cache.get(self.rules.from_grid(grid))
+        if move is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return move
+
+    def stats(self):
+        return f"{self.hits} hits, {self.misses} misses ({self.hit_rate:.0%})"
+
+    def _ponder(self, x, o, cache, cancel):
+        rules = self.rules
+        cells = sorted(rules.empty_cells(x, o), key=lambda move: -rules.line_counts[move[0] * rules.size + move[1]])
+        for row, col in cells:
+            child = x | 1 << (row * rules.size + col)
+            if rules.is_full(child, o) or rules.winner(child, o) is not None:
+                continue
+            # Pool workers of MCTS or parallel engines are not counted (see above)
+            cpu = time.thread_time()
+            try:
+                move = self.engine(rules.to_grid(child, o), cancel=cancel)
+            except worker.SearchCancelled:
+                return
+            if cancel.is_set():
+                return
+            cache[child, o] = move
+            used = time.thread_time() - cpu
+            if cancel.wait(used * (1 - self.cpu) / self.cpu):
+                return
+
+
+def from_env(engine, rules, search_worker):
+    """Return a ``Ponderer`` at the ``TICTACTOE_PONDER_CPU`` fraction, or ``None`` if it is 0."""
+    cpu = float(os.environ.get('TICTACTOE_PONDER_CPU', DEFAULT_CPU))
+    return Ponderer(engine, rules, search_worker, cpu) if cpu > 0 else None
+
+
+def play(engine, rules, games, think_ms, cpu, seed=None):
+    """Play ``games`` games against a random human; return ``(ponderer, hit_ms, miss_ms)`` reply latencies."""
+    rng = random.Random(seed)
+    search_worker = worker.SearchWorker()
+    ponderer = Ponderer(engine, rules, search_worker, cpu)
+    hit_ms, miss_ms = [], []
+    try:
+        for _ in range(games):
+            x = o = 0
+            while rules.winner(x, o) is None and not rules.is_full(x, o):
+                grid = rules.to_grid(x, o)
+                ponderer.start(grid)
+                time.sleep(think_ms / 1000)
+                row, col = rng.choice(rules.empty_cells(x, o))
+                x |= 1 << (row * rules.size + col)
+                if rules.winner(x, o) is not None or rules.is_full(x, o):
+                    ponderer.stop()
+                    break
+                grid = rules.to_grid(x, o)
+                start = time.perf_counter()
+                move = ponderer.reply(grid)
+                if move is None:
+                    move = search_worker.submit(engine, grid).result()
+                    miss_ms.append((time.perf_counter() - start) * 1000)
+                else:
+                    hit_ms.append((time.perf_counter() - start) * 1000)
+                o |= 1 << (move[0] * rules.size + move[1])
+    finally:
+        ponderer.stop()
+        search_worker.shutdown()
+    return ponderer, hit_ms, miss_ms
+
+
+def main(argv=None):
+    import argparse
+
+    # Imported here: the front ends only need Ponderer
+    from tictactoe import engines
+
+    parser = argparse.ArgumentParser(description="Measure the pondering hit rate against a random human.")
+    parser.add_argument('--engine', default='hard', help="engine name or module:function spec")
+    parser.add_argument('--variant', default='3x3', choices=sorted(rules_module.VARIANTS))
+    parser.add_argument('--games', type=int, default=10)
+    parser.add_argument('--think-ms', type=float, default=1000, help="human thinking time per move")
+    parser.add_argument('--cpu', type=float, default=DEFAULT_CPU, help="share of one core for pondering")
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    rules = rules_module.variant(args.variant)
+    engine = engines.load(args.engine, rules)
+    ponderer, hit_ms, miss_ms = play(engine, rules, args.games, args.think_ms, args.cpu, args.seed)
+    print(f"{args.engine} on {rules.name}, {args.think_ms:g} ms to think, {args.cpu:.0%} CPU: {ponderer.stats()}")
+    for label, latencies in (('hits', hit_ms), ('misses', miss_ms)):
+        if latencies:
+            print(f"  reply on {label}: mean {sum(latencies) / len(latencies):.2f} ms, max {max(latencies):.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,330 @@
+"""Self-play Q-learning for 3x3 with a one-byte-per-position greedy policy.
+
+Action values live in a NumPy array of shape ``(3 ** 9, 9)`` indexed by the
+base-3 board rank of ``tictactoe.lookup`` and the cell played. Both sides
+share the table: a value is always for the side to move, so the target for
+a move that does not end the game is minus the opponent's best value in the
+position it leads to (negamax Q-learning). Thousands of games advance
+together, one ply per step, with every selection, win check and update a
+batched array operation; finished games restart at once.
+
+Training reports games/sec and the share of reachable positions where the
+greedy move keeps the perfect-play game value, then checks the greedy
+policy as an engine, playing either side, and only replaces the policy
+file if it passes (``--check`` only checks)::
+
+    python -m tictactoe.qlearn --games 500000 --batch 4096
+
+File layout (little endian):
+
+    magic    4s   b'TTTQ'
+    version  H    FORMAT_VERSION
+    size     H    board side length (3)
+    count    I    number of entries (3 ** 9)
+    crc32    I    zlib.crc32 of the entries
+    entries  count bytes
+
+Each entry is the greedy move, or ``NO_MOVE`` when the game is over or
+training never reached the position. Training needs NumPy; playing from
+the policy file does not.
+"""
+
+import mmap
+import os
+import random
+import struct
+import time
+import zlib
+
+from tictactoe import bitboard, lookup
+
+MAGIC = b'TTTQ'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<4sHHII')
+ENTRY_COUNT = lookup.ENTRY_COUNT
+NO_MOVE = lookup.NO_MOVE
+
+LEARNING_RATE = 0.5
+# Below 1 so the greedy move is the fastest win, or the slowest loss
+DISCOUNT = 0.9
+# Exploration decays linearly from the first value to the second over training
+EPSILON = (1.0, 0.1)
+DEFAULT_GAMES = 500000
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'learned_policy.bin')
+
+
+class Trainer:
+    """Action-value table and ``batch`` games in progress, advanced by ``step``."""
+
+    def __init__(self, batch=4096, seed=None):
+        # Imported here: only training needs them
+        import numpy as np
+
+        from tictactoe import batch as batch_module
+
+        self.np = np
+        self.batch_module = batch_module
+        self.rng = np.random.default_rng(seed)
+        self.q = np.zeros((ENTRY_COUNT, bitboard.CELLS), dtype=np.float32)
+        self.visited = np.zeros(ENTRY_COUNT, dtype=bool)
+        self.boards = np.zeros((batch, bitboard.CELLS), dtype=np.int8)
+        self.mover = np.full(batch, batch_module.X, dtype=np.int8)
+        self.powers = 3 ** np.arange(bitboard.CELLS, dtype=np.int32)
+        self.rows = np.arange(batch)
+        self.games = 0
+
+    def ranks(self, boards):
+        # X = 1 and O = -1 are the base-3 digits 1 and 2
+        return (boards % 3).astype(self.np.int32) @ self.powers
+
+    def best_values(self, ranks, legal):
+        """Return the best value and move for the side to move; ``-inf`` where no move is legal."""
+        np = self.np
+        values = np.where(legal, self.q[ranks], -np.inf)
+        moves = values.argmax(axis=1)
+        return values[self.rows, moves], moves
+
+    def step(self, epsilon):
+        """Play one ply of every game and update the values of the moves played; return games finished."""
+        np = self.np
+        boards, rows = self.boards, self.rows
+        ranks = self.ranks(boards)
+        legal = boards == self.batch_module.EMPTY
+        _, greedy = self.best_values(ranks, legal)
+        # A random legal move: the legal cell with the highest random key
+        explore = np.where(legal, self.rng.random(legal.shape), -1.0).argmax(axis=1)
+        moves = np.where(self.rng.random(len(rows)) < epsilon, explore, greedy)
+
+        boards[rows, moves] = self.mover
+        won = self.batch_module.winners(boards.reshape(-1, bitboard.SIZE, bitboard.SIZE)) != self.batch_module.EMPTY
+        full = (boards != self.batch_module.EMPTY).all(axis=1)
+        next_best, _ = self.best_values(self.ranks(boards), boards == self.batch_module.EMPTY)
+        with np.errstate(invalid='ignore'):
+            target = np.where(won, 1.0, np.where(full, 0.0, -DISCOUNT * next_best))
+        # Games sharing a position and move in this step keep one update; the next step refines it
+        self.q[ranks, moves] += LEARNING_RATE * (target - self.q[ranks, moves])
+        self.visited[ranks] = True
+
+        done = won | full
+        boards[done] = self.batch_module.EMPTY
+        self.mover = np.where(done, self.batch_module.X, -self.mover).astype(np.int8)
+        finished = int(done.sum())
+        self.games += finished
+        return finished
+
+    def policy(self):
+        """Return the greedy policy as ``ENTRY_COUNT`` bytes."""
+        np = self.np
+        ranks = np.arange(ENTRY_COUNT)
+        digits = ranks[:, None] // self.powers % 3
+        legal = digits == 0
+        values = np.where(legal, self.q, -np.inf)
+        moves = values.argmax(axis=1).astype(np.uint8)
+        moves[~(self.visited & legal.any(axis=1))] = NO_MOVE
+        return moves.tobytes()
+
+
+class Reference:
+    """Which moves keep the perfect-play game value, for every reachable position."""
+
+    def __init__(self, np):
+        self.np = np
+        entries = np.frombuffer(lookup.solve(), dtype=np.uint8)
+        powers = 3 ** np.arange(bitboard.CELLS)
+        playable = (entries != lookup.UNREACHABLE) & ((entries & 0x0F) != NO_MOVE)
+        self.ranks = np.nonzero(playable)[0]
+        digits = self.ranks[:, None] // powers % 3
+        x_count = (digits == 1).sum(axis=1)
+        mover_digit = np.where(x_count == (digits == 2).sum(axis=1), 1, 2)
+        value = (entries[self.ranks] >> 4).astype(np.int8) - 1
+        # A move is optimal if the opponent's value in the child is minus ours
+        children = self.ranks[:, None] + mover_digit[:, None] * powers
+        child_value = (entries[np.where(digits == 0, children, 0)] >> 4).astype(np.int8) - 1
+        self.optimal = (digits == 0) & (child_value == -value[:, None])
+
+    def agreement(self, policy):
+        """Share of reachable positions whose policy move is optimal."""
+        moves = policy[self.ranks]
+        (played,) = self.np.nonzero(moves != NO_MOVE)
+        return int(self.optimal[played, moves[played]].sum()) / len(self.ranks)
+
+
+def train(games, batch=4096, seed=None, report_every=50000, progress=None):
+    """Train until ``games`` games have finished; return the greedy policy bytes.
+
+    ``progress(games, games_per_sec, agreement)`` is called about every
+    ``report_every`` games and at the end.
+    """
+    trainer = Trainer(batch, seed)
+    np = trainer.np
+    reference = Reference(np) if progress else None
+    # Training time only; agreement checks are not counted
+    elapsed = 0.0
+    next_report = report_every
+    while trainer.games < games:
+        epsilon = EPSILON[0] + (EPSILON[1] - EPSILON[0]) * trainer.games / games
+        start = time.perf_counter()
+        trainer.step(epsilon)
+        elapsed += time.perf_counter() - start
+        if progress and (trainer.games >= next_report or trainer.games >= games):
+            policy = np.frombuffer(trainer.policy(), dtype=np.uint8)
+            progress(trainer.games, trainer.games / elapsed, reference.agreement(policy))
+            next_report += report_every
+    return trainer.policy()
+
+
+def write(path=DEFAULT_PATH, entries=None):
+    if entries is None:
+        entries = train(DEFAULT_GAMES)
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, bitboard.SIZE, len(entries), zlib.crc32(entries))
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(header)
+        f.write(entries)
+    os.replace(tmp_path, path)
+    return path
+
+
+class LearnedPolicy:
+    """Read-only, memory-mapped view of a policy file; an engine (see ``tictactoe.engines``)."""
+
+    name = 'learned'
+
+    def __init__(self, path=DEFAULT_PATH):
+        with open(path, 'rb') as f:
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._data) < HEADER.size:
+            self.close()
+            raise ValueError(f"{path}: truncated header")
+        magic, version, size, count, crc = HEADER.unpack_from(self._data)
+        if magic != MAGIC or version != FORMAT_VERSION or size != bitboard.SIZE or count != ENTRY_COUNT:
+            self.close()
+            raise ValueError(f"{path}: unsupported policy (magic={magic!r}, version={version}, size={size})")
+        if len(self._data) != HEADER.size + count or zlib.crc32(self._data[HEADER.size:]) != crc:
+            self.close()
+            raise ValueError(f"{path}: checksum mismatch")
+        self.path = path
+
+    def probe(self, x, o):
+        """Return the greedy move for the side to move (X first), or ``None`` if there is none."""
+        move = self._data[HEADER.size + lookup.rank(x, o)]
+        return None if move == NO_MOVE else move
+
+    def __call__(self, grid, cancel=None):
+        """Return ``(row, col)`` for 'O'; a random empty cell in positions training never reached."""
+        x, o = bitboard.from_grid(grid)
+        if bin(x).count('1') == bin(o).count('1'):
+            # 'O' moved first: an engine playing X shown its own marks as 'O'.
+            # The table has X moving first, so swap the sides
+            x, o = o, x
+        cell = self.probe(x, o)
+        if cell is None:
+            cells = list(bitboard.iter_cells(bitboard.empty_mask(x, o)))
+            if not cells:
+                return None
+            cell = random.choice(cells)
+        return divmod(cell, bitboard.SIZE)
+
+    def close(self):
+        self._data.close()
+
+
+def load(path=DEFAULT_PATH):
+    """Open the policy at ``path``; return ``None`` if it is missing or invalid."""
+    try:
+        return LearnedPolicy(path)
+    except (OSError, ValueError):
+        return None
+
+
+def engine_factory(rules):
+    """Return the ``LearnedPolicy`` from the default path; it only plays 3x3."""
+    if (rules.size, rules.k) != (bitboard.SIZE, 3):
+        raise ValueError(f"The learned policy plays 3x3, not {rules.name}")
+    policy = load()
+    if policy is None:
+        raise ValueError(f"No learned policy at {DEFAULT_PATH}; train one with python -m tictactoe.qlearn")
+    return policy
+
+
+# (grid, only good move) pairs that once went wrong: with equal mark counts
+# the policy played X's best move for 'O' and missed the win at (0, 2)
+REGRESSION_POSITIONS = (
+    ([['O', 'O', None], ['X', 'X', None], [None, None, None]], (0, 2)),
+)
+
+
+def check(policy):
+    """Return the ``(grid, move)`` pairs where ``policy`` gives up game value.
+
+    Every reachable position of the perfect-play table is shown to the
+    policy with the side to move as 'O', as the front ends and the simulator
+    do, and ``REGRESSION_POSITIONS`` must get their move.
+    """
+    entries = lookup.solve()
+    failures = [(grid, policy(grid)) for grid, move in REGRESSION_POSITIONS if policy(grid) != move]
+    for rank, entry in enumerate(entries):
+        if entry == lookup.UNREACHABLE or entry & 0x0F == NO_MOVE:
+            continue
+        x = o = 0
+        for cell in range(bitboard.CELLS):
+            digit = rank // 3 ** cell % 3
+            x |= (digit == 1) << cell
+            o |= (digit == 2) << cell
+        x_to_move = bin(x).count('1') == bin(o).count('1')
+        me, opp = (x, o) if x_to_move else (o, x)
+        grid = bitboard.to_grid(opp, me)
+        move = policy(grid)
+        child = me | 1 << (move[0] * bitboard.SIZE + move[1])
+        child_entry = entries[lookup.rank(child, opp) if x_to_move else lookup.rank(opp, child)]
+        if (child_entry >> 4) - 1 != -((entry >> 4) - 1):
+            failures.append((grid, move))
+    return failures
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Train the 3x3 policy by batched self-play Q-learning.")
+    parser.add_argument('--games', type=int, default=DEFAULT_GAMES, help="games to train for")
+    parser.add_argument('--batch', type=int, default=4096, help="games played in parallel")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--report-every', type=int, default=50000, help="games between progress lines")
+    parser.add_argument('--output', default=DEFAULT_PATH, help="destination file")
+    parser.add_argument('--check', action='store_true',
+                        help="only check the policy at --output against perfect play, as both X and O")
+    args = parser.parse_args(argv)
+
+    if not args.check:
+        print(f"{'Games':>10}{'Games/sec':>12}{'Optimal':>10}")
+
+        def progress(games, rate, agreement):
+            print(f"{games:>10,}{rate:>12,.0f}{agreement:>10.1%}", flush=True)
+
+        entries = train(args.games, args.batch, args.seed, args.report_every, progress)
+        # Checked before it replaces --output, so a failed run keeps the old policy
+        path = write(args.output + '.new', entries)
+    else:
+        path = args.output
+
+    policy = LearnedPolicy(path)
+    failures = check(policy)
+    policy.close()
+    for grid, move in failures[:10]:
+        print(f"Suboptimal move {move} in {grid}")
+    print(f"Check against perfect play: {len(failures)} suboptimal moves")
+    if failures:
+        if not args.check:
+            os.remove(path)
+            print(f"{args.output} left unchanged")
+        raise SystemExit(1)
+    if not args.check:
+        os.replace(path, args.output)
+        moves = sum(entry != NO_MOVE for entry in entries)
+        print(f"Wrote {moves} positions ({HEADER.size + len(entries)} bytes) to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
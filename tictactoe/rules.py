@@ -0,0 +1,164 @@
+"""N x N, k-in-a-row rules on bitboards.
+
+This generalises ``tictactoe.bitboard`` to any board size and line length.
+Cell ``row * size + col`` is that bit of a player's mask. Every k-cell line
+(horizontal, vertical and both diagonals) is precomputed as a mask, along
+with the lines through each cell, so a win check after a move only tests the
+handful of lines through the cell that was just played.
+
+The variant used by the front ends is chosen with the ``TICTACTOE_VARIANT``
+environment variable (one of ``VARIANTS``, default ``3x3``).
+"""
+
+import functools
+import os
+
+from tictactoe import bitboard
+
+# Standard variants: name -> (size, k)
+VARIANTS = {
+    '3x3': (3, 3),
+    '4x4': (4, 4),
+    '5x5': (5, 4),
+    '7x7': (7, 5),
+}
+
+# Whole-mask lookup tables are only precomputed for boards up to this many cells
+TABLE_CELLS = 12
+
+DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))
+
+
+class Rules:
+    """Line tables and win detection for a ``size`` x ``size`` board, ``k`` in a row."""
+
+    def __init__(self, size=3, k=3):
+        if not 1 <= k <= size:
+            raise ValueError(f"k must be between 1 and {size}, got {k}")
+        self.size = size
+        self.k = k
+        self.cells = size * size
+        self.full_mask = (1 << self.cells) - 1
+
+        lines = []
+        for r in range(size):
+            for c in range(size):
+                for dr, dc in DIRECTIONS:
+                    end_r, end_c = r + dr * (k - 1), c + dc * (k - 1)
+                    if 0 <= end_r < size and 0 <= end_c < size:
+                        lines.append(sum(1 << ((r + dr * i) * size + c + dc * i) for i in range(k)))
+        self.lines = tuple(lines)
+        self.lines_through = tuple(
+            tuple(line for line in self.lines if line >> cell & 1) for cell in range(self.cells)
+        )
+        # Centre cells lie on the most lines, so this doubles as a static move ordering
+        self.line_counts = tuple(len(through) for through in self.lines_through)
+
+        self._winning = self._completing = None
+        if self.cells <= TABLE_CELLS:
+            self._winning = bytes(self._scan_win(mask) for mask in range(1 << self.cells))
+            self._completing = tuple(self._scan_completing(mask) for mask in range(1 << self.cells))
+
+    def __repr__(self):
+        return f"Rules(size={self.size}, k={self.k})"
+
+    @property
+    def name(self):
+        return f"{self.size}x{self.size} k={self.k}"
+
+    def _scan_win(self, mask):
+        return any(mask & line == line for line in self.lines)
+
+    def _scan_completing(self, mask):
+        cells = 0
+        for line in self.lines:
+            missing = line & ~mask
+            if missing and not missing & (missing - 1):
+                cells |= missing
+        return cells
+
+    def bit(self, row, col):
+        return 1 << (row * self.size + col)
+
+    def from_grid(self, grid):
+        """Pack a list of lists into ``(x_mask, o_mask)``; '' and ``None`` are empty."""
+        x = o = 0
+        size = self.size
+        for r, row in enumerate(grid):
+            for c, cell in enumerate(row):
+                if cell == 'X':
+                    x |= 1 << (r * size + c)
+                elif cell == 'O':
+                    o |= 1 << (r * size + c)
+        return x, o
+
+    def to_grid(self, x, o, empty=None):
+        size = self.size
+        return [
+            ['X' if x >> (r * size + c) & 1 else 'O' if o >> (r * size + c) & 1 else empty
+             for c in range(size)]
+            for r in range(size)
+        ]
+
+    def empty_mask(self, x, o):
+        return ~(x | o) & self.full_mask
+
+    def is_full(self, x, o):
+        return x | o == self.full_mask
+
+    def empty_cells(self, x, o):
+        """Return the empty cells as a list of ``(row, col)`` tuples."""
+        return [divmod(i, self.size) for i in bitboard.iter_cells(self.empty_mask(x, o))]
+
+    def is_win(self, mask):
+        if self._winning is not None:
+            return bool(self._winning[mask])
+        return self._scan_win(mask)
+
+    def is_win_at(self, mask, cell):
+        """Return True if ``mask`` has a complete line through ``cell``."""
+        for line in self.lines_through[cell]:
+            if mask & line == line:
+                return True
+        return False
+
+    def winner(self, x, o):
+        if self.is_win(x):
+            return 'X'
+        if self.is_win(o):
+            return 'O'
+        return None
+
+    def winning_cells(self, mask, empty):
+        """Return the mask of empty cells that would complete a line for ``mask``."""
+        if self._completing is not None:
+            return self._completing[mask] & empty
+        return self._scan_completing(mask) & empty
+
+
+@functools.lru_cache(maxsize=None)
+def get(size=3, k=3):
+    """Return the shared ``Rules`` instance for ``size`` and ``k``."""
+    return Rules(size, k)
+
+
+def variant(name):
+    try:
+        return get(*VARIANTS[name])
+    except KeyError:
+        raise ValueError(f"Unknown variant {name!r}; choose from {', '.join(VARIANTS)}") from None
+
+
+def for_size(size):
+    """Return the standard variant for a board of side ``size``."""
+    for n, k in VARIANTS.values():
+        if n == size:
+            return get(n, k)
+    return get(size, min(size, 5))
+
+
+def from_env(default='3x3'):
+    return variant(os.environ.get('TICTACTOE_VARIANT', default))
+
+
+CLASSIC = get(3, 3)
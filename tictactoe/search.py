@@ -0,0 +1,338 @@
+"""Negamax alpha-beta search over bitboards for any ``tictactoe.rules.Rules``.
+
+Scores are from the side to move's point of view and depth-adjusted: a win
+is worth one more than the number of cells left empty once it is made, so
+the search always prefers the fastest win and the slowest loss. Because the
+adjustment depends only on the position, scores can be shared through the
+transposition table regardless of how deep they were found.
+
+``AlphaBeta.search`` is the anytime form: given ``time_ms`` it deepens one
+ply at a time and returns the best move of the deepest finished iteration
+when the deadline passes. Below the search horizon positions are scored by
+``evaluate``, which stays strictly between -1 and 1 so it never outranks a
+real win or loss. Difficulty levels are per-move latency budgets:
+
+    searcher = AlphaBeta(transposition.TranspositionTable(), rules.variant('7x7'))
+    result = searcher.search(x, o, O, time_ms=DIFFICULTIES['hard'])
+
+Every search returns a ``tictactoe.stats.SearchReport`` with its result.
+Run ``python -m tictactoe.search`` to compare node counts against the
+original full-width minimax.
+"""
+
+import os
+import time
+from collections import namedtuple
+
+from tictactoe import bitboard, rules as rules_module, stats, transposition, worker
+from tictactoe.transposition import EXACT, LOWER, UPPER, X, O
+
+# Per-move latency budgets in milliseconds; 'perfect' searches to the end of the game
+DIFFICULTIES = {'easy': 2, 'medium': 20, 'hard': 200, 'perfect': None}
+DEFAULT_DIFFICULTY = 'hard'
+# Per-move budget when 'perfect' play meets a board too big to search to the end
+SEARCH_BUDGET_MS = 1000
+
+# The deadline and cancel event are checked every this many nodes (a power of two)
+CHECK_EVERY = 16
+
+# cell and score of the deepest iteration that finished (or improved on the one
+# before it); complete is True when the score is the game-theoretic value
+SearchResult = namedtuple('SearchResult', 'cell score depth complete report')
+
+
+class SearchTimeout(Exception):
+    """Raised inside a search when its deadline has passed."""
+
+
+def difficulty_from_env(default=DEFAULT_DIFFICULTY):
+    """Return the latency budget in ms for ``TICTACTOE_DIFFICULTY``, or ``None`` for 'perfect'."""
+    name = os.environ.get('TICTACTOE_DIFFICULTY', default).lower()
+    if name not in DIFFICULTIES:
+        raise ValueError(f"Unknown difficulty {name!r}; expected one of {', '.join(DIFFICULTIES)}")
+    return DIFFICULTIES[name]
+
+
+class AlphaBeta:
+    """Alpha-beta searcher with move ordering and a transposition table.
+
+    Moves are tried in the order: win now, block the opponent's win, killer
+    moves for the ply, then by number of lines through the cell (centre,
+    corners, edges) with the history heuristic breaking ties. Killer and
+    history tables persist between searches; ``nodes``, ``leaves``,
+    ``cutoffs``, ``tt_hits`` and ``max_depth`` count the work of the most
+    recent search. Only the lines through the last move are tested for a win.
+
+    A search with a deadline checks the clock every ``CHECK_EVERY`` nodes,
+    so it overruns its budget by at most that many nodes.
+    """
+
+    def __init__(self, table=None, rules=None):
+        self.rules = rules or rules_module.CLASSIC
+        self.table = table
+        self.zobrist = transposition.zobrist_keys(self.rules.size)
+        self.infinity = self.rules.cells + 2
+        self.history = [0] * self.rules.cells
+        self.killers = [[None, None] for _ in range(self.rules.cells + 1)]
+        # Open lines weighted by the square of their marks, scaled into (-1, 1)
+        self.eval_scale = len(self.rules.lines) * self.rules.k ** 2 + 1
+        self.nodes = self.leaves = self.cutoffs = self.tt_hits = self.max_depth = 0
+        self.deadline = None
+        self.cancel = None
+        self._partial = None
+
+    def best_move(self, x, o, player=O):
+        """Return ``(cell, score)`` for ``player`` to move, or ``(None, score)`` if the game is over."""
+        result = self.search(x, o, player)
+        return result.cell, result.score
+
+    def search(self, x, o, player=O, time_ms=None, max_depth=None, cancel=None):
+        """Search for ``player``'s move and return a ``SearchResult``.
+
+        Without ``time_ms`` or ``max_depth`` this is one search to the end of
+        the game. Otherwise it deepens one ply at a time, trying the previous
+        iteration's best move first, and returns the best move found before
+        the deadline; if not even depth 1 finishes, the first move in move
+        order. ``cancel`` is a ``threading.Event`` that stops the search with
+        ``tictactoe.worker.SearchCancelled``.
+        """
+        with stats.measure('alphabeta') as counters:
+            self.reset_counters()
+            try:
+                cell, score, depth, complete = self._deepen(x, o, player, time_ms, max_depth, cancel)
+            finally:
+                self.copy_counters(counters)
+        return SearchResult(cell, score, depth, complete, counters.report)
+
+    def score_move(self, x, o, player, cell, alpha=None, depth=None, time_ms=None):
+        """Score ``player`` playing ``cell``, as one root move of a split search.
+
+        The window is (``alpha``, +infinity), so a score at or below ``alpha``
+        is only an upper bound. ``depth`` counts ``cell`` itself, ``None``
+        searches to the end. Raises ``SearchTimeout`` after ``time_ms``.
+        Counters accumulate until ``reset_counters``.
+        """
+        me, opp = (x, o) if player == X else (o, x)
+        keys = transposition.toggle(transposition.keys_from_masks(x, o, self.zobrist), player, cell, self.zobrist)
+        self.deadline = None if time_ms is None else time.perf_counter() + time_ms / 1000
+        if alpha is None:
+            alpha = -self.infinity
+        try:
+            if self.deadline is not None and time_ms <= 0:
+                raise SearchTimeout()
+            return -self.negamax(opp, me | 1 << cell, 1 - player, keys, -self.infinity, -alpha, 1, cell,
+                                 None if depth is None else depth - 1)
+        finally:
+            self.deadline = None
+
+    def reset_counters(self):
+        self.nodes = self.leaves = self.cutoffs = self.tt_hits = self.max_depth = 0
+
+    def copy_counters(self, counters):
+        """Copy the counters into a ``tictactoe.stats.SearchStats``."""
+        counters.nodes, counters.leaves, counters.cutoffs = self.nodes, self.leaves, self.cutoffs
+        counters.tt_hits, counters.max_depth = self.tt_hits, self.max_depth
+
+    def _deepen(self, x, o, player, time_ms, max_depth, cancel):
+        start = time.perf_counter()
+        me, opp = (x, o) if player == X else (o, x)
+        empty = self.rules.empty_mask(me, opp)
+        self.nodes += 1
+        if self.rules.is_win(opp):
+            self.leaves += 1
+            return None, -(bin(empty).count('1') + 1), 0, True
+        if not empty:
+            self.leaves += 1
+            return None, 0, 0, True
+        keys = transposition.keys_from_masks(x, o, self.zobrist)
+        remaining = bin(empty).count('1')
+        if time_ms is None and max_depth is None:
+            depths = (remaining,)
+        else:
+            depths = range(1, min(max_depth or remaining, remaining) + 1)
+        order = self.order_moves(me, opp, empty, 0)
+        cell, score, reached = order[0], None, 0
+        self.deadline = None if time_ms is None else start + time_ms / 1000
+        self.cancel = cancel
+        try:
+            for depth in depths:
+                self._partial = None
+                cell, score = self._search_root(me, opp, player, keys, order, depth)
+                reached = depth
+                if abs(score) >= 1:
+                    # A forced win or loss; searching deeper cannot change it
+                    break
+                order.remove(cell)
+                order.insert(0, cell)
+        except SearchTimeout:
+            # The previous best move was searched first, so anything that beat it is better
+            if self._partial is not None:
+                cell, score = self._partial
+        finally:
+            self.deadline = None
+            self.cancel = None
+        return cell, score, reached, score is not None and (reached == remaining or abs(score) >= 1)
+
+    def _search_root(self, me, opp, player, keys, order, depth):
+        alpha, beta = -self.infinity, self.infinity
+        best_cell = None
+        for cell in order:
+            child_keys = transposition.toggle(keys, player, cell, self.zobrist)
+            score = -self.negamax(opp, me | 1 << cell, 1 - player, child_keys, -beta, -alpha, 1, cell, depth - 1)
+            if score > alpha:
+                alpha, best_cell = score, cell
+                self._partial = best_cell, alpha
+        return best_cell, alpha
+
+    def _check_deadline(self):
+        if self.deadline is not None and time.perf_counter() >= self.deadline:
+            raise SearchTimeout()
+        worker.check_cancelled(self.cancel)
+
+    def evaluate(self, me, opp):
+        """Heuristic score for ``me`` strictly between -1 and 1, for positions at the search horizon."""
+        score = 0
+        for line in self.rules.lines:
+            mine, theirs = me & line, opp & line
+            if not theirs:
+                score += bin(mine).count('1') ** 2
+            elif not mine:
+                score -= bin(theirs).count('1') ** 2
+        return score / self.eval_scale
+
+    def negamax(self, me, opp, player, keys, alpha, beta, ply, last, depth=None):
+        """Score the position for ``me`` to move; ``last`` is the cell ``opp`` just played.
+
+        ``depth`` is the number of plies left before the horizon, ``None``
+        to search to the end of the game.
+        """
+        self.nodes += 1
+        if not self.nodes % CHECK_EVERY and (self.deadline is not None or self.cancel is not None):
+            self._check_deadline()
+        if ply > self.max_depth:
+            self.max_depth = ply
+        rules = self.rules
+        empty = rules.empty_mask(me, opp)
+        if rules.is_win_at(opp, last):
+            self.leaves += 1
+            return -(bin(empty).count('1') + 1)
+        if not empty:
+            self.leaves += 1
+            return 0
+        if rules.winning_cells(me, empty):
+            self.leaves += 1
+            return bin(empty).count('1')
+        # Entries are stored with the plies searched below them, capped at the
+        # plies left in the game; a value searched to the end serves any depth
+        draft = bin(empty).count('1')
+        if depth is not None:
+            if depth <= 0:
+                self.leaves += 1
+                return self.evaluate(me, opp)
+            draft = min(depth, draft)
+            depth -= 1
+
+        key = None
+        alpha_orig = alpha
+        if self.table is not None:
+            key = transposition.canonical(keys, player == O)
+            entry = self.table.probe(key)
+            if entry is not None and entry[1] >= draft:
+                self.tt_hits += 1
+                value, _, flag = entry
+                if flag == EXACT:
+                    return value
+                if flag == LOWER:
+                    alpha = max(alpha, value)
+                else:
+                    beta = min(beta, value)
+                if alpha >= beta:
+                    return value
+
+        best = -self.infinity
+        for cell in self.order_moves(me, opp, empty, ply):
+            child_keys = transposition.toggle(keys, player, cell, self.zobrist)
+            score = -self.negamax(opp, me | 1 << cell, 1 - player, child_keys, -beta, -alpha, ply + 1, cell, depth)
+            if score > best:
+                best = score
+            if best > alpha:
+                alpha = best
+            if alpha >= beta:
+                self.cutoffs += 1
+                killers = self.killers[ply]
+                if killers[0] != cell:
+                    killers[0], killers[1] = cell, killers[0]
+                self.history[cell] += bin(empty).count('1') ** 2
+                break
+
+        if key is not None:
+            if best <= alpha_orig:
+                flag = UPPER
+            elif best >= beta:
+                flag = LOWER
+            else:
+                flag = EXACT
+            self.table.store(key, best, draft, flag)
+        return best
+
+    def order_moves(self, me, opp, empty, ply):
+        wins = self.rules.winning_cells(me, empty)
+        blocks = self.rules.winning_cells(opp, empty)
+        killers = self.killers[ply]
+        history = self.history
+        line_counts = self.rules.line_counts
+
+        def priority(cell):
+            return (
+                wins >> cell & 1,
+                blocks >> cell & 1,
+                cell in killers,
+                line_counts[cell],
+                history[cell],
+            )
+
+        return sorted(bitboard.iter_cells(empty), key=priority, reverse=True)
+
+
+def full_width_nodes(x, o, player=O):
+    """Count the nodes the original full-width minimax visits from this position."""
+    me, opp = (x, o) if player == X else (o, x)
+    empty = bitboard.empty_mask(me, opp)
+    if bitboard.is_win(opp) or not empty:
+        return 1
+    return 1 + sum(full_width_nodes(*((x | 1 << cell, o) if player == X else (x, o | 1 << cell)), 1 - player)
+                   for cell in bitboard.iter_cells(empty))
+
+
+# (description, grid, player to move)
+REPORT_POSITIONS = (
+    ("Empty board, X to move", [[None] * 3 for _ in range(3)], X),
+    ("X in the corner, O to move", [['X', None, None], [None, None, None], [None, None, None]], O),
+    ("X in the centre, O to move", [[None, None, None], [None, 'X', None], [None, None, None]], O),
+    ("Must block, O to move", [['X', 'X', None], [None, 'O', None], [None, None, None]], O),
+)
+
+
+def node_report():
+    """Yield ``(description, full_width, alpha_beta, alpha_beta_with_table)`` node counts."""
+    for description, grid, player in REPORT_POSITIONS:
+        x, o = bitboard.from_grid(grid)
+        plain = AlphaBeta()
+        plain.best_move(x, o, player)
+        cached = AlphaBeta(transposition.TranspositionTable())
+        cached.best_move(x, o, player)
+        yield description, full_width_nodes(x, o, player), plain.nodes, cached.nodes
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compare minimax and alpha-beta node counts.")
+    parser.parse_args(argv)
+    print(f"{'Position':<30}{'Minimax':>10}{'Alpha-beta':>12}{'+ table':>10}{'Saved':>9}")
+    for description, full, plain, cached in node_report():
+        print(f"{description:<30}{full:>10}{plain:>12}{cached:>10}{1 - cached / full:>9.1%}")
+
+
+if __name__ == '__main__':
+    main()
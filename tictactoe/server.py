@@ -0,0 +1,355 @@
+"""asyncio game server: many concurrent sessions in one process.
+
+Clients connect over TCP or a Unix socket and exchange one JSON object per
+line. Each connection owns one session (one board). AI moves run on a
+process pool so a slow search never blocks the event loop, and at most
+``--max-pending`` searches are queued at once; further requests wait.
+
+Requests (an optional ``"id"`` is echoed back in the response):
+
+* ``{"op": "new", "variant": "3x3", "engine": "alphabeta", "human": "X"}`` -
+  start a new game; every field is optional. ``engine`` must be one the
+  server was started with (``--engines``). If the human plays O the AI
+  moves first.
+* ``{"op": "move", "row": 1, "col": 1}`` - play a move; the AI's reply is
+  made before the response is sent.
+* ``{"op": "state"}`` - the current board, without changing it.
+* ``{"op": "stats"}`` - server metrics: sessions, moves, AI move latency
+  percentiles and memory.
+
+With ``--game-log DIR`` every finished game is appended to a
+``tictactoe.gamelog`` file in DIR, one file per variant.
+
+Game responses look like ``{"ok": true, "board": ["X..", ".O.", "..."],
+"to_move": "X", "winner": null, "draw": false, "ai_move": [1, 1]}``. Errors
+are ``{"ok": false, "error": "..."}`` and leave the session unchanged.
+
+    python -m tictactoe.server --port 8765
+    python -m tictactoe.loadgen --port 8765 --sessions 10000
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from tictactoe import engines, gamelog, log as log_setup, rules as rules_module, stats
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+log = logging.getLogger(__name__)
+
+DEFAULT_ENGINE = 'alphabeta'
+MAX_PENDING = 256
+LATENCY_WINDOW = 10_000
+# asyncio's default listen backlog is too small for connection bursts
+BACKLOG = 4096
+# Sessions sampled for the mean per-session memory in stats
+MEMORY_SAMPLE = 100
+
+
+def raise_fd_limit():
+    """Raise the open-file soft limit to the hard limit; each session holds a socket."""
+    if resource is None:
+        return None
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if hard != resource.RLIM_INFINITY and soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+        soft = hard
+    return soft
+
+
+# Engines loaded once per worker process, keyed by (spec, variant)
+_engines = {}
+
+
+def _init_worker():
+    # Engine output is discarded in worker processes
+    sys.stdout = open(os.devnull, 'w')
+
+
+def _engine_move(spec, variant, grid):
+    key = (spec, variant)
+    engine = _engines.get(key)
+    if engine is None:
+        engine = _engines[key] = engines.load(spec, rules_module.variant(variant))
+    return engine(grid)
+
+
+class Session:
+    """One connection's game: bitboards plus the move list."""
+
+    __slots__ = ('id', 'variant', 'rules', 'engine', 'human', 'x', 'o', 'moves', 'winner', 'draw',
+                 'forfeit', 'started')
+
+    def __init__(self, session_id, variant='3x3', engine=DEFAULT_ENGINE, human='X'):
+        if human not in ('X', 'O'):
+            raise ValueError(f"human must be 'X' or 'O', got {human!r}")
+        self.id = session_id
+        self.variant = variant
+        self.rules = rules_module.variant(variant)
+        self.engine = engine
+        self.human = human
+        self.x = self.o = 0
+        self.moves = []
+        self.winner = None
+        self.draw = False
+        self.forfeit = False
+        self.started = time.time()
+
+    @property
+    def to_move(self):
+        return 'X' if len(self.moves) % 2 == 0 else 'O'
+
+    @property
+    def over(self):
+        return self.winner is not None or self.draw
+
+    def play(self, cell):
+        """Play ``cell`` for the side to move; raise ``ValueError`` if it is illegal."""
+        if self.over:
+            raise ValueError("game is over; send a 'new' request")
+        if not 0 <= cell < self.rules.cells or (self.x | self.o) >> cell & 1:
+            raise ValueError(f"illegal move {list(divmod(cell, self.rules.size))}")
+        player = self.to_move
+        if player == 'X':
+            self.x |= 1 << cell
+            won = self.rules.is_win_at(self.x, cell)
+        else:
+            self.o |= 1 << cell
+            won = self.rules.is_win_at(self.o, cell)
+        self.moves.append(cell)
+        if won:
+            self.winner = player
+        elif self.rules.is_full(self.x, self.o):
+            self.draw = True
+
+    def engine_grid(self):
+        # Engines play 'O', so the side to move always sees its own marks as 'O'
+        if self.to_move == 'X':
+            return self.rules.to_grid(self.o, self.x)
+        return self.rules.to_grid(self.x, self.o)
+
+    def board(self):
+        return [''.join(cell or '.' for cell in row) for row in self.rules.to_grid(self.x, self.o)]
+
+    def state(self):
+        return {
+            'ok': True,
+            'board': self.board(),
+            'to_move': None if self.over else self.to_move,
+            'winner': self.winner,
+            'draw': self.draw,
+        }
+
+    def memory(self):
+        """Bytes held by this session alone; rules tables and engines are shared."""
+        return (sys.getsizeof(self) + sys.getsizeof(self.moves) + sys.getsizeof(self.x)
+                + sys.getsizeof(self.o))
+
+
+class GameServer:
+    """Sessions, the AI executor and metrics for one listening socket."""
+
+    def __init__(self, workers=None, max_pending=MAX_PENDING, engines=(DEFAULT_ENGINE,), variant='3x3',
+                 game_log_dir=None):
+        # Clients may only pick from these; a spec can name any file to import
+        self.engines = tuple(engines)
+        self.engine = self.engines[0]
+        self.workers = workers or os.cpu_count() or 1
+        self.variant = variant
+        self.max_pending = max_pending
+        self.executor = ProcessPoolExecutor(self.workers, initializer=_init_worker)
+        self.sessions = {}
+        self.opened = 0
+        self.moves = 0
+        self.ai_moves = 0
+        self.peak_sessions = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.started = time.monotonic()
+        self.game_log_dir = game_log_dir
+        self.game_logs = {}
+        self._pending = None
+
+    async def start(self, host='127.0.0.1', port=8765, path=None):
+        # Created here so it binds to the running loop on older Pythons
+        self._pending = asyncio.Semaphore(self.max_pending)
+        if path:
+            return await asyncio.start_unix_server(self.handle, path, backlog=BACKLOG)
+        return await asyncio.start_server(self.handle, host, port, backlog=BACKLOG)
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+        for game_log in self.game_logs.values():
+            game_log.close()
+
+    def record(self, session):
+        """Append a finished game to the variant's game log, if logging is on."""
+        if self.game_log_dir is None:
+            return
+        game_log = self.game_logs.get(session.variant)
+        if game_log is None:
+            path = os.path.join(self.game_log_dir, os.path.basename(gamelog.default_path(session.rules)))
+            game_log = self.game_logs[session.variant] = gamelog.GameLog(path, session.rules)
+        engine_x, engine_o = ('human', session.engine) if session.human == 'X' else (session.engine, 'human')
+        duration_ms = (time.time() - session.started) * 1000
+        game_log.append(session.moves, session.winner, engine_x, engine_o, session.started, duration_ms,
+                        session.forfeit)
+
+    async def handle(self, reader, writer):
+        self.opened += 1
+        session = Session(self.opened, self.variant, self.engine)
+        self.sessions[session.id] = session
+        self.peak_sessions = max(self.peak_sessions, len(self.sessions))
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                request_id = None
+                try:
+                    request = json.loads(line)
+                    request_id = request.get('id')
+                    response, session = await self.dispatch(session, request)
+                except (ValueError, TypeError, AttributeError, KeyError) as exc:
+                    response = {'ok': False, 'error': str(exc)}
+                if request_id is not None:
+                    response['id'] = request_id
+                writer.write(json.dumps(response, separators=(',', ':')).encode() + b'\n')
+                await writer.drain()
+        except (ConnectionError, ValueError):
+            # ValueError: a line longer than the stream limit
+            pass
+        finally:
+            del self.sessions[session.id]
+            writer.close()
+
+    async def dispatch(self, session, request):
+        """Return ``(response, session)``; a 'new' request replaces the session."""
+        op = request.get('op')
+        if op == 'new':
+            engine = request.get('engine', self.engine)
+            if engine not in self.engines:
+                raise ValueError(f"engine {engine!r} is not enabled; choose from {', '.join(self.engines)}")
+            session = Session(session.id, request.get('variant', self.variant),
+                              engine, request.get('human', 'X'))
+            self.sessions[session.id] = session
+            response = session.state()
+            if session.to_move != session.human:
+                response['ai_move'] = await self.ai_move(session)
+                response.update(session.state())
+                if session.over:
+                    self.record(session)
+            return response, session
+        if op == 'move':
+            if session.to_move != session.human and not session.over:
+                raise ValueError("not your turn")
+            row, col = int(request['row']), int(request['col'])
+            size = session.rules.size
+            if not (0 <= row < size and 0 <= col < size):
+                raise ValueError(f"move {[row, col]} is off the {size}x{size} board")
+            session.play(row * size + col)
+            self.moves += 1
+            response = session.state()
+            if not session.over:
+                response['ai_move'] = await self.ai_move(session)
+                response.update(session.state())
+            if session.over:
+                self.record(session)
+            return response, session
+        if op == 'state':
+            return session.state(), session
+        if op == 'stats':
+            return self.stats(), session
+        raise ValueError(f"unknown op {op!r}")
+
+    async def ai_move(self, session):
+        """Run the session's engine on the executor and play its move.
+
+        An engine that fails or returns an illegal move forfeits the game.
+        """
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        try:
+            async with self._pending:
+                move = await loop.run_in_executor(
+                    self.executor, _engine_move, session.engine, session.variant, session.engine_grid())
+            self.latencies.append((time.perf_counter() - start) * 1000)
+            row, col = move
+            session.play(row * session.rules.size + col)
+        except Exception:
+            log.exception("Engine %s forfeits session %s", session.engine, session.id)
+            session.winner = session.human
+            session.forfeit = True
+            return None
+        self.ai_moves += 1
+        return [row, col]
+
+    def stats(self):
+        latencies = sorted(self.latencies)
+        sample = list(self.sessions.values())[:MEMORY_SAMPLE]
+        elapsed = time.monotonic() - self.started
+        return {
+            'ok': True,
+            'sessions': len(self.sessions),
+            'peak_sessions': self.peak_sessions,
+            'sessions_opened': self.opened,
+            'moves': self.moves,
+            'ai_moves': self.ai_moves,
+            'ai_moves_per_sec': self.ai_moves / elapsed if elapsed > 0 else 0.0,
+            'latency_ms': {
+                'p50': stats.percentile(latencies, 50),
+                'p90': stats.percentile(latencies, 90),
+                'p99': stats.percentile(latencies, 99),
+                'max': latencies[-1] if latencies else None,
+            },
+            'session_bytes': sum(s.memory() for s in sample) / len(sample) if sample else None,
+            'max_rss_kib': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else None,
+        }
+
+
+async def serve(args):
+    server = GameServer(args.workers, args.max_pending, args.engines, args.variant, args.game_log)
+    listener = await server.start(args.host, args.port, args.unix)
+    print(f"Serving on {args.unix or f'{args.host}:{args.port}'} with {server.workers} AI workers", flush=True)
+    try:
+        async with listener:
+            while True:
+                await asyncio.sleep(args.stats_interval)
+                log.info("Stats %s", json.dumps(server.stats()))
+    finally:
+        server.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Line-delimited JSON tic-tac-toe server.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', metavar='PATH', help="listen on a Unix socket instead of TCP")
+    parser.add_argument('--workers', type=int, default=None, help="AI worker processes (default: all cores)")
+    parser.add_argument('--max-pending', type=int, default=MAX_PENDING, help="most AI moves queued at once")
+    parser.add_argument('--engines', nargs='+', default=[DEFAULT_ENGINE],
+                        help="engine specs clients may choose; the first is the default")
+    parser.add_argument('--variant', default='3x3', choices=sorted(rules_module.VARIANTS))
+    parser.add_argument('--game-log', metavar='DIR', help="append finished games to game logs in DIR")
+    parser.add_argument('--stats-interval', type=float, default=10.0, help="seconds between INFO stats logs")
+    args = parser.parse_args(argv)
+
+    log_setup.configure()
+    raise_fd_limit()
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,214 @@
+"""Headless self-play: pit two move functions against each other on a process pool.
+
+Engines are named as for ``tictactoe.engines.load``:
+
+* ``path/to/file.py:function`` or ``package.module:function`` for any move
+  function taking a grid (list of lists) and returning ``(row, col)``, such as
+  ``windsurf/ai.py:make_decision`` or ``openai_roo_code/ai_agent.py:get_ai_move``.
+* ``random``, ``alphabeta``, ``mcts``, ``perfect``
+  (``tictactoe.players.PerfectPlayer``) and ``learned`` (the
+  ``tictactoe.qlearn`` policy) for the built-in engines,
+  ``easy``, ``medium`` or ``hard`` for an anytime alpha-beta search with
+  that difficulty's latency budget, or ``copilot``, ``windsurf`` or
+  ``openai`` for those front ends' AIs (``copilot`` follows
+  ``TICTACTOE_DIFFICULTY`` as the copilot front end does).
+
+The front-end AIs all play 'O', so every engine is shown the board with its
+own marks as 'O'. Engine A plays X in even-numbered games and O in odd ones.
+
+With ``--log PATH`` every game is appended to a ``tictactoe.gamelog`` file.
+
+Example::
+
+    python -m tictactoe.simulate windsurf/ai.py:make_decision alphabeta --games 100000
+"""
+
+import argparse
+import contextlib
+import math
+import os
+import random
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from tictactoe import engines, gamelog, rules as rules_module
+
+# winner is 'A', 'B' or None; moves are the cells played, in order
+GameResult = namedtuple('GameResult', 'index a_plays winner moves forfeit duration_ms')
+
+WIN, DRAW, LOSS = 'win', 'draw', 'loss'
+
+
+def play_game(engine_x, engine_o, rules):
+    """Play one game; return ``(winner, moves, forfeit)`` with winner 'X', 'O' or None.
+
+    An engine that returns an illegal move forfeits the game.
+    """
+    x = o = 0
+    moves = []
+    for ply in range(rules.cells):
+        x_to_move = ply % 2 == 0
+        engine = engine_x if x_to_move else engine_o
+        # The mover always sees its own marks as 'O'
+        grid = rules.to_grid(o, x) if x_to_move else rules.to_grid(x, o)
+        move = engine(grid)
+        try:
+            row, col = move
+            cell = row * rules.size + col
+            legal = 0 <= row < rules.size and 0 <= col < rules.size and not (x | o) >> cell & 1
+        except (TypeError, ValueError):
+            legal = False
+        if not legal:
+            return ('O' if x_to_move else 'X'), moves, True
+        moves.append(cell)
+        if x_to_move:
+            x |= 1 << cell
+            if rules.is_win_at(x, cell):
+                return 'X', moves, False
+        else:
+            o |= 1 << cell
+            if rules.is_win_at(o, cell):
+                return 'O', moves, False
+    return None, moves, False
+
+
+# Engines loaded once per worker process by _init_worker
+_worker_state = {}
+
+
+def _init_worker(spec_a, spec_b, variant):
+    rules = rules_module.variant(variant)
+    # Engine output is discarded in worker processes
+    _worker_state['devnull'] = open(os.devnull, 'w')
+    with contextlib.redirect_stdout(_worker_state['devnull']):
+        _worker_state['engines'] = (engines.load(spec_a, rules), engines.load(spec_b, rules))
+    _worker_state['rules'] = rules
+
+
+def _play_chunk(task):
+    start, count, seed = task
+    # Seeded per chunk so results do not depend on which worker ran it
+    random.seed(seed)
+    engine_a, engine_b = _worker_state['engines']
+    rules = _worker_state['rules']
+    results = []
+    with contextlib.redirect_stdout(_worker_state['devnull']):
+        for index in range(start, start + count):
+            a_plays = 'X' if index % 2 == 0 else 'O'
+            engine_x, engine_o = (engine_a, engine_b) if a_plays == 'X' else (engine_b, engine_a)
+            t0 = time.perf_counter()
+            winner, moves, forfeit = play_game(engine_x, engine_o, rules)
+            duration_ms = (time.perf_counter() - t0) * 1000
+            if winner is not None:
+                winner = 'A' if winner == a_plays else 'B'
+            results.append(GameResult(index, a_plays, winner, tuple(moves), forfeit, duration_ms))
+    return results
+
+
+def simulate(spec_a, spec_b, games, variant='3x3', workers=None, seed=0, chunk_size=200):
+    """Play ``games`` games across a process pool and yield each ``GameResult``.
+
+    Results are streamed as chunks finish, so they are not in game order.
+    """
+    rules = rules_module.variant(variant)
+    # Resolved here first: in the pool initializer a bad spec only shows as BrokenProcessPool
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        engines.load(spec_a, rules)
+        engines.load(spec_b, rules)
+    workers = workers or os.cpu_count() or 1
+    tasks = [
+        (start, min(chunk_size, games - start), seed * 1_000_003 + start // chunk_size)
+        for start in range(0, games, chunk_size)
+    ]
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(spec_a, spec_b, variant)) as pool:
+        for future in as_completed([pool.submit(_play_chunk, task) for task in tasks]):
+            yield from future.result()
+
+
+def wilson_interval(successes, trials, z=1.96):
+    """Return the Wilson score interval for a binomial proportion (95% by default)."""
+    if trials == 0:
+        return 0.0, 1.0
+    p = successes / trials
+    denominator = 1 + z * z / trials
+    centre = (p + z * z / (2 * trials)) / denominator
+    margin = z * math.sqrt(p * (1 - p) / trials + z * z / (4 * trials * trials)) / denominator
+    return max(0.0, centre - margin), min(1.0, centre + margin)
+
+
+class Tally:
+    """Win/draw/loss counts from engine A's point of view."""
+
+    def __init__(self):
+        self.counts = {WIN: 0, DRAW: 0, LOSS: 0}
+        self.forfeits = 0
+        self.plies = 0
+        self.started = time.monotonic()
+
+    @property
+    def games(self):
+        return sum(self.counts.values())
+
+    def add(self, result):
+        outcome = DRAW if result.winner is None else WIN if result.winner == 'A' else LOSS
+        self.counts[outcome] += 1
+        self.forfeits += result.forfeit
+        self.plies += len(result.moves)
+
+    def games_per_second(self):
+        elapsed = time.monotonic() - self.started
+        return self.games / elapsed if elapsed > 0 else 0.0
+
+    def summary(self):
+        games = self.games
+        lines = [f"{games} games, {self.games_per_second():,.0f} games/sec, "
+                 f"{self.plies / games if games else 0:.2f} plies/game, {self.forfeits} forfeits"]
+        for outcome in (WIN, DRAW, LOSS):
+            low, high = wilson_interval(self.counts[outcome], games)
+            rate = self.counts[outcome] / games if games else 0.0
+            lines.append(f"  A {outcome:<4} {rate:7.2%}  (95% CI {low:.2%} - {high:.2%})")
+        return '\n'.join(lines)
+
+
+def _log_result(game_log, result, spec_a, spec_b):
+    engine_x, engine_o = (spec_a, spec_b) if result.a_plays == 'X' else (spec_b, spec_a)
+    winner = None
+    if result.winner is not None:
+        b_plays = 'O' if result.a_plays == 'X' else 'X'
+        winner = result.a_plays if result.winner == 'A' else b_plays
+    game_log.append(result.moves, winner, engine_x, engine_o, time.time(), result.duration_ms, result.forfeit)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless self-play between two engines.")
+    parser.add_argument('engine_a', help="engine spec, e.g. windsurf/ai.py:make_decision")
+    parser.add_argument('engine_b', help="engine spec, e.g. alphabeta")
+    parser.add_argument('--games', type=int, default=10_000)
+    parser.add_argument('--variant', default='3x3', choices=sorted(rules_module.VARIANTS))
+    parser.add_argument('--workers', type=int, default=None, help="default: all cores")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--chunk-size', type=int, default=200)
+    parser.add_argument('--progress', type=int, default=0, help="print a summary every N games")
+    parser.add_argument('--log', default=None, help="append every game to this game log")
+    args = parser.parse_args(argv)
+
+    game_log = gamelog.GameLog(args.log, rules_module.variant(args.variant)) if args.log else None
+    tally = Tally()
+    try:
+        for result in simulate(args.engine_a, args.engine_b, args.games, args.variant,
+                               args.workers, args.seed, args.chunk_size):
+            tally.add(result)
+            if game_log is not None:
+                _log_result(game_log, result, args.engine_a, args.engine_b)
+            if args.progress and tally.games % args.progress == 0:
+                print(tally.summary(), flush=True)
+    finally:
+        if game_log is not None:
+            game_log.close()
+    print(f"A = {args.engine_a}, B = {args.engine_b}, {args.variant}")
+    print(tally.summary())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""Pre-rendered board surfaces for the pygame front ends.
+
+A ``SurfaceCache`` draws the grid once, one sprite each for X and O and any
+text label the first time it is asked for them; after that a frame is a
+handful of blits. The cache is keyed on a ``Layout`` (sizes in pixels) and a
+``Theme`` (colours): ``resize`` and ``set_theme`` drop every cached surface so
+the next frame re-renders with the new values.
+"""
+
+from collections import OrderedDict, namedtuple
+
+import pygame
+
+# width is the side of the square board area; square is one cell
+Layout = namedtuple('Layout', 'size width square line_width circle_radius circle_width cross_width space')
+Theme = namedtuple('Theme', 'background line cross circle')
+
+# Status labels are few, but animated ones ("AI is thinking...") add up
+TEXT_CAPACITY = 64
+
+
+class SurfaceCache:
+    """Grid, mark sprites and rendered text for one layout and theme."""
+
+    def __init__(self, layout, theme, text_capacity=TEXT_CAPACITY):
+        self.layout = layout
+        self.theme = theme
+        self.text_capacity = text_capacity
+        self._grid = None
+        self._sprites = {}
+        self._text = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def invalidate(self):
+        """Drop every cached surface; they are re-rendered on next use."""
+        self._grid = None
+        self._sprites.clear()
+        self._text.clear()
+
+    def resize(self, layout):
+        self.layout = layout
+        self.invalidate()
+
+    def set_theme(self, theme):
+        self.theme = theme
+        self.invalidate()
+
+    def grid(self):
+        """The empty board: background plus grid lines, ``width`` pixels square."""
+        if self._grid is None:
+            layout, theme = self.layout, self.theme
+            surface = _converted(pygame.Surface((layout.width, layout.width)))
+            surface.fill(theme.background)
+            for i in range(1, layout.size):
+                offset = i * layout.square
+                pygame.draw.line(surface, theme.line, (0, offset), (layout.width, offset), layout.line_width)
+                pygame.draw.line(surface, theme.line, (offset, 0), (offset, layout.width), layout.line_width)
+            self._grid = surface
+        return self._grid
+
+    def sprite(self, mark):
+        """A transparent cell-sized surface holding an 'X' or 'O'."""
+        surface = self._sprites.get(mark)
+        if surface is None:
+            layout, theme = self.layout, self.theme
+            square, space = layout.square, layout.space
+            surface = _converted(pygame.Surface((square, square), pygame.SRCALPHA), alpha=True)
+            if mark == 'X':
+                pygame.draw.line(surface, theme.cross, (space, space), (square - space, square - space), layout.cross_width)
+                pygame.draw.line(surface, theme.cross, (space, square - space), (square - space, space), layout.cross_width)
+            else:
+                pygame.draw.circle(surface, theme.circle, (square // 2, square // 2),
+                                   layout.circle_radius, layout.circle_width)
+            self._sprites[mark] = surface
+        return surface
+
+    def text(self, font, message, color, antialias=True):
+        """``font.render`` with the result kept for the next identical call."""
+        key = (font, message, color, antialias)
+        surface = self._text.get(key)
+        if surface is not None:
+            self.hits += 1
+            self._text.move_to_end(key)
+            return surface
+        self.misses += 1
+        surface = font.render(message, antialias, color)
+        self._text[key] = surface
+        if len(self._text) > self.text_capacity:
+            self._text.popitem(last=False)
+        return surface
+
+    def draw_board(self, screen, board, origin=(0, 0)):
+        """Blit the grid and every mark of ``board`` (rows of 'X', 'O' or empty)."""
+        left, top = origin
+        square = self.layout.square
+        blits = [(self.grid(), origin)]
+        for row, cells in enumerate(board):
+            for col, cell in enumerate(cells):
+                if cell in ('X', 'O'):
+                    blits.append((self.sprite(cell), (left + col * square, top + row * square)))
+        screen.blits(blits, doreturn=False)
+
+
+def _converted(surface, alpha=False):
+    # Match the display's pixel format once a window exists, for fast blits
+    if pygame.display.get_surface() is None:
+        return surface
+    return surface.convert_alpha() if alpha else surface.convert()
@@ -0,0 +1,147 @@
+"""Per-search reports, report hooks and single-move profiling.
+
+Every engine measures a move with ``measure``, which yields a
+``SearchStats`` for the search to fill in and, on exit, freezes it into a
+``SearchReport``. Measures nest: a move function that delegates to another
+engine (the copilot AI falling back to alpha-beta, say) folds the inner
+counts into its own, and only the outermost report in a thread goes to the
+hooks. Wall time is ``time.perf_counter``; CPU time is ``time.thread_time``
+of the searching thread.
+
+    histogram = stats.Histogram()
+    stats.add_hook(histogram)
+    ...
+    print(histogram.format())
+
+``profile`` runs one move under cProfile for hot-spot analysis; from the
+command line use ``python -m tictactoe.bench --profile SPEC``.
+"""
+
+import contextlib
+import math
+import threading
+import time
+from collections import defaultdict, namedtuple
+
+# Counts for one move. nodes are positions visited, leaves the ones scored
+# without searching further (terminal, horizon or playout), tt_hits the
+# transposition (or reused tree) entries that answered a position
+SearchReport = namedtuple('SearchReport', 'engine nodes leaves cutoffs tt_hits max_depth wall_ms cpu_ms')
+
+COUNTERS = ('nodes', 'leaves', 'cutoffs', 'tt_hits')
+
+_hooks = []
+_local = threading.local()
+
+
+class SearchStats:
+    """Counters one search fills in; ``report`` is set when its ``measure`` exits."""
+
+    __slots__ = ('engine', 'nodes', 'leaves', 'cutoffs', 'tt_hits', 'max_depth', 'report')
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.nodes = self.leaves = self.cutoffs = self.tt_hits = self.max_depth = 0
+        self.report = None
+
+    def add(self, report):
+        """Fold another search's report into these counters."""
+        for name in COUNTERS:
+            setattr(self, name, getattr(self, name) + getattr(report, name))
+        self.max_depth = max(self.max_depth, report.max_depth)
+
+
+def add_hook(hook):
+    """Call ``hook(report)`` with the ``SearchReport`` of every move, from the thread that searched."""
+    _hooks.append(hook)
+
+
+def remove_hook(hook):
+    _hooks.remove(hook)
+
+
+@contextlib.contextmanager
+def measure(engine):
+    """Time one move and yield its ``SearchStats``; see the module docstring for nesting."""
+    counters = SearchStats(engine)
+    outer = getattr(_local, 'current', None)
+    _local.current = counters
+    wall, cpu = time.perf_counter(), time.thread_time()
+    try:
+        yield counters
+    finally:
+        _local.current = outer
+        counters.report = SearchReport(
+            engine, counters.nodes, counters.leaves, counters.cutoffs, counters.tt_hits, counters.max_depth,
+            (time.perf_counter() - wall) * 1000, (time.thread_time() - cpu) * 1000,
+        )
+        if outer is not None:
+            outer.add(counters.report)
+        else:
+            for hook in list(_hooks):
+                hook(counters.report)
+
+
+@contextlib.contextmanager
+def capture():
+    """Collect the reports published in the block into a list."""
+    reports = []
+    add_hook(reports.append)
+    try:
+        yield reports
+    finally:
+        remove_hook(reports.append)
+
+
+class Histogram:
+    """Report hook counting moves per engine in power-of-two buckets of each field."""
+
+    FIELDS = ('nodes', 'max_depth', 'wall_ms', 'cpu_ms')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.moves = defaultdict(int)
+        # (engine, field) -> {bucket upper bound: moves}
+        self.buckets = defaultdict(lambda: defaultdict(int))
+
+    def __call__(self, report):
+        with self.lock:
+            self.moves[report.engine] += 1
+            for field in self.FIELDS:
+                self.buckets[report.engine, field][bucket(getattr(report, field))] += 1
+
+    def format(self, field='wall_ms'):
+        lines = []
+        with self.lock:
+            for engine, moves in sorted(self.moves.items()):
+                lines.append(f"{engine}: {moves} moves, {field}")
+                for bound, count in sorted(self.buckets[engine, field].items()):
+                    lines.append(f"  <= {bound:<10g}{count:>8}  {'#' * max(1, 40 * count // moves)}")
+        return '\n'.join(lines)
+
+
+def bucket(value):
+    """Upper bound of the power-of-two bucket holding ``value``."""
+    return 0 if value <= 0 else 2.0 ** math.ceil(math.log2(value))
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * q // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def profile(fn, *args, sort='cumulative', limit=25):
+    """Run ``fn(*args)`` once under cProfile; return ``(result, printed stats)``."""
+    # Imported here: only profiling runs need them
+    import cProfile
+    import io
+    import pstats
+
+    profiler = cProfile.Profile()
+    result = profiler.runcall(fn, *args)
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats(sort).print_stats(limit)
+    return result, out.getvalue()
@@ -0,0 +1,642 @@
+"""Retrograde-analysis tablebases for boards too large to search forward.
+
+Every move adds one mark, so a position's value depends only on positions
+with one more mark. The generator solves the full board first and works
+back to the empty one, one ply (mark count) at a time, backing each ply's
+values up from the ply after it. Game values never come from a search.
+
+Within a ply, a position's rank is a perfect hash: X's cells ranked among
+all ``C(n, x)`` subsets in colex order (which is plain numeric order of the
+masks), times ``C(n - x, o)``, plus O's cells ranked among the cells X left
+empty. Only the canonical member of each symmetry class (the one with the
+lowest rank among its 8 rotations and reflections) is stored. A shard file
+covers a range of ranks with a bitmap of the canonical ones, a running
+count per 64-bit word and one byte per canonical position, so a probe is
+canonicalise, rank, and one rank/select: O(1) whatever the table size.
+
+Entries hold the value for the side to move in bits 6-7 (``LOSS_CODE``,
+``DRAW_CODE``, ``WIN_CODE`` or ``INVALID`` for positions no game reaches)
+and in bits 0-5 the plies until the game ends with best play: the fastest
+win, the slowest loss, or the moves left to fill the board in a draw.
+
+Shards are written to a temporary name and renamed once complete, so an
+interrupted run resumes by skipping the shards already on disk; the shards
+of one ply are solved in parallel. A manifest with every ply's shard count
+is written last, and only a table with a manifest and all its shards loads;
+each shard's CRC is checked when it is first opened. Generation needs
+NumPy; probing does not.
+
+    python -m tictactoe.tablebase --size 4 --k 4 --workers 4
+    python -m tictactoe.tablebase --size 4 --k 4 --probe "X...,.O..,....,...."
+"""
+
+import contextlib
+import functools
+import math
+import mmap
+import os
+import struct
+import time
+import zlib
+
+from tictactoe import rules as rules_module, transposition
+
+MAGIC = b'TTTB'
+FORMAT_VERSION = 1
+# magic, version, size, k, ply, shard, stride (ranks per shard), positions, stored entries, crc32
+HEADER = struct.Struct('<4sHBBBxHQQQI6x')
+WORD = struct.Struct('<Q')
+COUNT = struct.Struct('<I')
+# magic, version, size, k, shard positions; then one COUNT of shards per ply, empty board first
+MANIFEST = struct.Struct('<4sHBBxxQ')
+MANIFEST_MAGIC = b'TTTM'
+MANIFEST_NAME = 'manifest.bin'
+
+LOSS, DRAW, WIN = -1, 0, 1
+LOSS_CODE, DRAW_CODE, WIN_CODE, INVALID = 0, 1, 2, 3
+DISTANCE_MASK = 0x3F
+
+# Ranks of positions in one shard; bounds generation memory per worker
+SHARD_POSITIONS = 1 << 20
+# Largest board whose ranks fit in 64 bits
+MAX_CELLS = 36
+
+DEFAULT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'tablebase')
+
+
+def table_dir(rules, directory=None):
+    return os.path.join(directory or DEFAULT_DIR, f"{rules.size}x{rules.size}k{rules.k}")
+
+
+def shard_path(root, ply, shard):
+    return os.path.join(root, f"ply-{ply:02d}-{shard:04d}.tb")
+
+
+def ply_counts(ply):
+    """Return ``(x, o)`` mark counts at ``ply``; X moves first."""
+    return (ply + 1) // 2, ply // 2
+
+
+def manifest_path(root):
+    return os.path.join(root, MANIFEST_NAME)
+
+
+def write_manifest(rules, root, shard_positions=SHARD_POSITIONS):
+    """Record the table in ``root`` as complete; call only once every shard is on disk."""
+    counts = b''.join(COUNT.pack(ply_layout(rules, ply, shard_positions)[3]) for ply in range(rules.cells + 1))
+    path = manifest_path(root)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(MANIFEST.pack(MANIFEST_MAGIC, FORMAT_VERSION, rules.size, rules.k, shard_positions))
+        f.write(counts)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def read_manifest(rules, root):
+    """Return the shard count of every ply; raises ``OSError`` or ``ValueError`` if the table is incomplete."""
+    path = manifest_path(root)
+    with open(path, 'rb') as f:
+        data = f.read()
+    if len(data) != MANIFEST.size + COUNT.size * (rules.cells + 1):
+        raise ValueError(f"{path}: truncated manifest")
+    magic, version, size, k, _ = MANIFEST.unpack_from(data)
+    if (magic, version, size, k) != (MANIFEST_MAGIC, FORMAT_VERSION, rules.size, rules.k):
+        raise ValueError(f"{path}: not a manifest for {rules.name}")
+    return [COUNT.unpack_from(data, MANIFEST.size + COUNT.size * ply)[0] for ply in range(rules.cells + 1)]
+
+
+def ply_layout(rules, ply, shard_positions=SHARD_POSITIONS):
+    """Return ``(x_subsets, o_subsets, x_per_shard, shards)`` for one ply."""
+    nx, no = ply_counts(ply)
+    x_subsets = math.comb(rules.cells, nx)
+    o_subsets = math.comb(rules.cells - nx, no)
+    x_per_shard = max(1, shard_positions // o_subsets)
+    return x_subsets, o_subsets, x_per_shard, -(-x_subsets // x_per_shard)
+
+
+def total_positions(rules):
+    return sum(x_subsets * o_subsets for x_subsets, o_subsets, _, _ in
+               (ply_layout(rules, ply) for ply in range(rules.cells + 1)))
+
+
+def _check_rules(rules):
+    if rules.cells > MAX_CELLS:
+        raise ValueError(f"Tablebases go up to {MAX_CELLS} cells; {rules.name} has {rules.cells}")
+
+
+def encode(value, distance):
+    return (value + 1) << 6 | distance
+
+
+def decode(entry):
+    """Return ``(value, distance)`` for an entry byte, or ``None`` if the position is invalid."""
+    code = entry >> 6
+    if code == INVALID:
+        return None
+    return code - 1, entry & DISTANCE_MASK
+
+
+# -- Scalar ranking, used by probes ---------------------------------------------------------
+
+def _colex_rank(mask):
+    rank = 0
+    j = 0
+    cell = 0
+    while mask:
+        if mask & 1:
+            j += 1
+            rank += math.comb(cell, j)
+        mask >>= 1
+        cell += 1
+    return rank
+
+
+def _pext(mask, free, cells):
+    """Pack the bits of ``mask`` at the set positions of ``free`` into the low bits."""
+    out = 0
+    shift = 0
+    for cell in range(cells):
+        if free >> cell & 1:
+            out |= (mask >> cell & 1) << shift
+            shift += 1
+    return out
+
+
+def _permute(mask, perm):
+    out = 0
+    for cell, target in enumerate(perm):
+        if mask >> cell & 1:
+            out |= 1 << target
+    return out
+
+
+def position_rank(x, o, rules):
+    """Rank of (x, o) within its ply."""
+    nx, no = bin(x).count('1'), bin(o).count('1')
+    free = rules.full_mask & ~x
+    return _colex_rank(x) * math.comb(rules.cells - nx, no) + _colex_rank(_pext(o, free, rules.cells))
+
+
+def canonical_rank(x, o, rules):
+    """Lowest rank among the 8 symmetric images of (x, o)."""
+    return min(position_rank(_permute(x, perm), _permute(o, perm), rules)
+               for perm in transposition.symmetries(rules.size))
+
+
+# -- Reader ---------------------------------------------------------------------------------
+
+class Tablebase:
+    """Memory-mapped shards of one variant's tablebase, opened as they are first probed.
+
+    Raises ``OSError`` or ``ValueError`` unless generation finished: the
+    manifest and every shard it lists must be on disk.
+    """
+
+    def __init__(self, rules, directory=None):
+        _check_rules(rules)
+        self.rules = rules
+        self.root = table_dir(rules, directory)
+        if not os.path.isdir(self.root):
+            raise FileNotFoundError(f"No tablebase for {rules.name} in {self.root}")
+        try:
+            counts = read_manifest(rules, self.root)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Tablebase for {rules.name} in {self.root} is incomplete; rerun the generator") from None
+        for ply, shards in enumerate(counts):
+            for shard in range(shards):
+                if not os.path.isfile(shard_path(self.root, ply, shard)):
+                    raise FileNotFoundError(f"{shard_path(self.root, ply, shard)}: missing shard")
+        self._shards = {}
+
+    def close(self):
+        for shard in self._shards.values():
+            shard[0].close()
+        self._shards.clear()
+
+    def _shard(self, ply, index):
+        shard = self._shards.get((ply, index))
+        if shard is None:
+            with open(shard_path(self.root, ply, index), 'rb') as f:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            path = shard_path(self.root, ply, index)
+            if len(data) < HEADER.size:
+                data.close()
+                raise ValueError(f"{path}: truncated header")
+            magic, version, size, k, file_ply, file_index, stride, positions, stored, crc = HEADER.unpack_from(data)
+            if (magic, version, size, k, file_ply, file_index) != (
+                    MAGIC, FORMAT_VERSION, self.rules.size, self.rules.k, ply, index):
+                data.close()
+                raise ValueError(f"{path}: not shard {index} of ply {ply}")
+            words = -(-positions // 64)
+            if len(data) != HEADER.size + 12 * words + stored or zlib.crc32(data[HEADER.size:]) != crc:
+                data.close()
+                raise ValueError(f"{path}: checksum mismatch")
+            shard = self._shards[(ply, index)] = (data, stride, words)
+        return shard
+
+    def _stride(self, ply):
+        return self._shard(ply, 0)[1]
+
+    def entry(self, x, o):
+        """Return the raw entry byte for (x, o); raises ``OSError`` or ``ValueError`` if its shard is unreadable."""
+        ply = bin(x | o).count('1')
+        rank = canonical_rank(x, o, self.rules)
+        stride = self._stride(ply)
+        data, _, words = self._shard(ply, rank // stride)
+        local = rank % stride
+        word = local >> 6
+        bits = WORD.unpack_from(data, HEADER.size + 8 * word)[0] & ((1 << (local & 63)) - 1)
+        index = COUNT.unpack_from(data, HEADER.size + 8 * words + 4 * word)[0] + bin(bits).count('1')
+        return data[HEADER.size + 12 * words + index]
+
+    def probe(self, x, o):
+        """Return ``(value, distance)`` for the side to move, or ``None`` if no game reaches (x, o).
+
+        ``value`` is ``WIN``, ``DRAW`` or ``LOSS``; ``distance`` is the number
+        of plies left with best play (0 once the game is over).
+        """
+        nx, no = bin(x).count('1'), bin(o).count('1')
+        if x & o or nx - no not in (0, 1):
+            return None
+        return decode(self.entry(x, o))
+
+    def best_move(self, x, o):
+        """Return ``(cell, value, distance)`` of the best move for the side to move, or ``None``."""
+        result = self.probe(x, o)
+        if result is None or result[1] == 0:
+            return None
+        x_to_move = bin(x).count('1') == bin(o).count('1')
+        for cell in range(self.rules.cells):
+            if (x | o) >> cell & 1:
+                continue
+            child = self.probe(x | 1 << cell, o) if x_to_move else self.probe(x, o | 1 << cell)
+            if child is not None and (-child[0], child[1] + 1) == result:
+                return cell, result[0], result[1]
+        return None
+
+
+def load(rules, directory=None):
+    """Open the tablebase for ``rules``; return ``None`` if it has not been generated."""
+    try:
+        return Tablebase(rules, directory)
+    except (OSError, ValueError):
+        return None
+
+
+# -- Generator ------------------------------------------------------------------------------
+
+class _Tables:
+    """Byte-at-a-time lookup tables for vectorised ranking, packing and symmetry."""
+
+    def __init__(self, rules):
+        import numpy as np
+
+        n = rules.cells
+        self.np = np
+        self.rules = rules
+        self.chunks = -(-n // 8)
+        byte = np.arange(256)
+        self.pop8 = np.array([bin(b).count('1') for b in range(256)], dtype=np.uint64)
+        # colex[chunk, byte, marks below the chunk]: that byte's share of the colex rank
+        self.colex = np.zeros((self.chunks, 256, n + 2), dtype=np.int64)
+        for chunk in range(self.chunks):
+            for b in range(256):
+                for before in range(n + 1):
+                    total, j = 0, before
+                    for i in range(8):
+                        if b >> i & 1:
+                            j += 1
+                            total += math.comb(8 * chunk + i, j)
+                    self.colex[chunk, b, before] = total
+        # pext8[free, bits] packs bits at free's set positions; pdep8 is the inverse
+        self.pext8 = np.zeros((256, 256), dtype=np.uint64)
+        self.pdep8 = np.zeros((256, 256), dtype=np.uint64)
+        for free in range(256):
+            positions = [i for i in range(8) if free >> i & 1]
+            for bits in range(256):
+                self.pext8[free, bits] = sum((bits >> p & 1) << i for i, p in enumerate(positions))
+                if bits < 1 << len(positions):
+                    self.pdep8[free, bits] = sum((bits >> i & 1) << p for i, p in enumerate(positions))
+        self.perms = np.zeros((8, self.chunks, 256), dtype=np.uint64)
+        for s, perm in enumerate(transposition.symmetries(rules.size)):
+            for chunk in range(self.chunks):
+                for i in range(8):
+                    cell = 8 * chunk + i
+                    if cell < n:
+                        self.perms[s, chunk, (byte >> i & 1) == 1] |= np.uint64(1 << perm[cell])
+        self.lines = [np.uint64(line) for line in rules.lines]
+        self.full = np.uint64(rules.full_mask)
+        # C(c, j) by j then c, for unranking with searchsorted
+        self.binomials = np.array([[math.comb(c, j) for c in range(n + 1)] for j in range(n + 1)],
+                                  dtype=np.int64)
+
+    def _byte(self, mask, chunk):
+        return ((mask >> self.np.uint64(8 * chunk)) & self.np.uint64(0xFF)).astype(self.np.intp)
+
+    def rank(self, mask):
+        np = self.np
+        rank = np.zeros(len(mask), dtype=np.int64)
+        before = np.zeros(len(mask), dtype=np.intp)
+        for chunk in range(self.chunks):
+            b = self._byte(mask, chunk)
+            rank += self.colex[chunk, b, before]
+            before += self.pop8[b].astype(np.intp)
+        return rank
+
+    def pext(self, mask, free):
+        np = self.np
+        out = np.zeros(len(mask), dtype=np.uint64)
+        shift = np.zeros(len(mask), dtype=np.uint64)
+        for chunk in range(self.chunks):
+            f = self._byte(free, chunk)
+            out |= self.pext8[f, self._byte(mask, chunk)] << shift
+            shift += self.pop8[f]
+        return out
+
+    def pdep(self, bits, free):
+        np = self.np
+        out = np.zeros(len(bits), dtype=np.uint64)
+        used = np.zeros(len(bits), dtype=np.uint64)
+        for chunk in range(self.chunks):
+            f = self._byte(free, chunk)
+            count = self.pop8[f]
+            take = ((bits >> used) & ((np.uint64(1) << count) - np.uint64(1))).astype(np.intp)
+            out |= self.pdep8[f, take] << np.uint64(8 * chunk)
+            used += count
+        return out
+
+    def permute(self, mask, sym):
+        out = self.np.zeros(len(mask), dtype=self.np.uint64)
+        for chunk in range(self.chunks):
+            out |= self.perms[sym, chunk, self._byte(mask, chunk)]
+        return out
+
+    def unrank(self, ranks, marks, cells):
+        """Masks of ``marks`` cells out of ``cells`` for colex ``ranks``."""
+        np = self.np
+        ranks = ranks.astype(np.int64).copy()
+        out = np.zeros(len(ranks), dtype=np.uint64)
+        for j in range(marks, 0, -1):
+            column = self.binomials[j, :cells]
+            cell = np.searchsorted(column, ranks, side='right') - 1
+            ranks -= column[cell]
+            out |= np.uint64(1) << cell.astype(np.uint64)
+        return out
+
+    def ply_rank(self, x, o, o_subsets):
+        return self.rank(x) * o_subsets + self.rank(self.pext(o, self.full & ~x))
+
+    def canonical_rank(self, x, o, o_subsets):
+        best = self.ply_rank(x, o, o_subsets)
+        for sym in range(1, 8):
+            self.np.minimum(best, self.ply_rank(self.permute(x, sym), self.permute(o, sym), o_subsets), out=best)
+        return best
+
+    def has_line(self, mask):
+        won = self.np.zeros(len(mask), dtype=bool)
+        for line in self.lines:
+            won |= (mask & line) == line
+        return won
+
+    def popcount(self, words):
+        np = self.np
+        if hasattr(np, 'bitwise_count'):
+            return np.bitwise_count(words).astype(np.int64)
+        return self.pop8[words.view(np.uint8)].reshape(len(words), 8).sum(axis=1).astype(np.int64)
+
+
+@functools.lru_cache(maxsize=None)
+def _tables(size, k):
+    return _Tables(rules_module.get(size, k))
+
+
+class _PlyReader:
+    """Vectorised entry lookups in one solved ply, for backing values up to the ply before."""
+
+    def __init__(self, tables, root, ply, shard_positions):
+        np = tables.np
+        self.tables = tables
+        _, self.o_subsets, x_per_shard, shards = ply_layout(tables.rules, ply, shard_positions)
+        self.stride = x_per_shard * self.o_subsets
+        self.shards = []
+        for shard in range(shards):
+            path = shard_path(root, ply, shard)
+            header = HEADER.unpack(open(path, 'rb').read(HEADER.size))
+            positions, stored = header[7], header[8]
+            words = -(-positions // 64)
+            data = np.memmap(path, dtype=np.uint8, mode='r')
+            self.shards.append((
+                data[HEADER.size:HEADER.size + 8 * words].view(np.uint64),
+                data[HEADER.size + 8 * words:HEADER.size + 12 * words].view(np.uint32),
+                data[HEADER.size + 12 * words:HEADER.size + 12 * words + stored],
+            ))
+
+    def entries(self, x, o):
+        np = self.tables.np
+        rank = self.tables.canonical_rank(x, o, self.o_subsets)
+        shard = rank // self.stride
+        local = rank - shard * self.stride
+        out = np.empty(len(rank), dtype=np.uint8)
+        for index in np.unique(shard):
+            bitmap, counts, entries = self.shards[index]
+            sel = shard == index
+            word = local[sel] >> 6
+            below = (np.uint64(1) << (local[sel] & 63).astype(np.uint64)) - np.uint64(1)
+            out[sel] = entries[counts[word].astype(np.int64) + self.tables.popcount(bitmap[word] & below)]
+        return out
+
+
+_readers = {}
+
+
+def _reader(tables, root, ply, shard_positions):
+    key = (root, ply, shard_positions)
+    if key not in _readers:
+        _readers.clear()
+        _readers[key] = _PlyReader(tables, root, ply, shard_positions)
+    return _readers[key]
+
+
+def solve_shard(task):
+    """Solve one shard and write it; returns ``(ply, shard, positions, stored)``.
+
+    Needs the next ply to be complete on disk.
+    """
+    size, k, root, ply, shard, shard_positions = task
+    tables = _tables(size, k)
+    np = tables.np
+    rules = tables.rules
+    nx, no = ply_counts(ply)
+    x_subsets, o_subsets, x_per_shard, _ = ply_layout(rules, ply, shard_positions)
+    x_lo, x_hi = shard * x_per_shard, min(x_subsets, (shard + 1) * x_per_shard)
+
+    # Every position in the shard, in rank order
+    xs = tables.unrank(np.arange(x_lo, x_hi), nx, rules.cells)
+    x = np.repeat(xs, o_subsets)
+    o = tables.pdep(np.tile(tables.unrank(np.arange(o_subsets), no, rules.cells - nx), len(xs)),
+                    tables.full & ~x)
+    rank = np.arange(x_lo * o_subsets, x_hi * o_subsets, dtype=np.int64)
+    canonical = tables.canonical_rank(x, o, o_subsets) == rank
+    x, o = x[canonical], o[canonical]
+
+    me, opp = (x, o) if nx == no else (o, x)
+    # A drawn game runs until the board is full
+    entries = np.full(len(x), encode(DRAW, rules.cells - ply), dtype=np.uint8)
+    me_won, opp_won = tables.has_line(me), tables.has_line(opp)
+    entries[opp_won] = encode(LOSS, 0)
+    # The side to move cannot already have a line: the game would have ended a move earlier
+    entries[me_won] = INVALID << 6
+    open_ = ~(me_won | opp_won)
+    if ply < rules.cells and open_.any():
+        reader = _reader(tables, root, ply + 1, shard_positions)
+        x_open, o_open = x[open_], o[open_]
+        # Best score so far: wins as 64 - distance, losses as distance - 64, draws as 0
+        best = np.full(len(x_open), -1000, dtype=np.int16)
+        for cell in range(rules.cells):
+            bit = np.uint64(1 << cell)
+            free = ((x_open | o_open) & bit) == 0
+            if not free.any():
+                continue
+            child_x, child_o = x_open[free], o_open[free]
+            if nx == no:
+                child_x = child_x | bit
+            else:
+                child_o = child_o | bit
+            child = reader.entries(child_x, child_o)
+            code = (child >> 6).astype(np.int16)
+            distance = (child & DISTANCE_MASK).astype(np.int16) + 1
+            # The child's value is for the opponent
+            score = np.where(code == LOSS_CODE, 64 - distance, np.where(code == WIN_CODE, distance - 64, 0))
+            best[free] = np.maximum(best[free], score)
+        entries[open_] = np.where(best > 0, encode(WIN, 0) + 64 - best,
+                                  np.where(best < 0, encode(LOSS, 0) + best + 64, encode(DRAW, rules.cells - ply)))
+
+    bits = np.zeros(-(-len(rank) // 64) * 64, dtype=bool)
+    bits[:len(rank)] = canonical
+    bitmap = np.packbits(bits.reshape(-1, 8), axis=1, bitorder='little').reshape(-1).view(np.uint64)
+    counts = np.concatenate(([0], np.cumsum(tables.popcount(bitmap))[:-1])).astype(np.uint32)
+    payload = bitmap.astype('<u8').tobytes() + counts.astype('<u4').tobytes() + entries.tobytes()
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, size, k, ply, shard, x_per_shard * o_subsets,
+                         len(rank), len(entries), zlib.crc32(payload))
+    path = shard_path(root, ply, shard)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(header)
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return ply, shard, len(rank), len(entries)
+
+
+def shard_complete(rules, root, ply, shard, shard_positions=SHARD_POSITIONS):
+    """True if the shard is on disk with the expected layout and a matching CRC."""
+    path = shard_path(root, ply, shard)
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return False
+    if len(data) < HEADER.size:
+        return False
+    magic, version, size, k, file_ply, file_shard, stride, positions, stored, crc = HEADER.unpack_from(data)
+    _, o_subsets, x_per_shard, _ = ply_layout(rules, ply, shard_positions)
+    words = -(-positions // 64)
+    return ((magic, version, size, k, file_ply, file_shard, stride) ==
+            (MAGIC, FORMAT_VERSION, rules.size, rules.k, ply, shard, x_per_shard * o_subsets)
+            and len(data) == HEADER.size + 12 * words + stored
+            and zlib.crc32(data[HEADER.size:]) == crc)
+
+
+def generate(rules, directory=None, workers=1, shard_positions=SHARD_POSITIONS, progress=None):
+    """Solve every ply of ``rules`` from the full board back to the empty one.
+
+    Shards already on disk are kept, so an interrupted run picks up where it
+    stopped. ``progress(ply, done, shards, elapsed)`` is called as shards finish.
+    The manifest is written once every ply is solved.
+    Returns ``(positions, stored, solved_shards)``.
+    """
+    _check_rules(rules)
+    root = table_dir(rules, directory)
+    os.makedirs(root, exist_ok=True)
+    # Incomplete until this run finishes
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(manifest_path(root))
+    positions = stored = solved = 0
+    start = time.perf_counter()
+    executor = None
+    if workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        executor = ProcessPoolExecutor(workers)
+    try:
+        for ply in range(rules.cells, -1, -1):
+            shards = ply_layout(rules, ply, shard_positions)[3]
+            tasks = [(rules.size, rules.k, root, ply, shard, shard_positions) for shard in range(shards)
+                     if not shard_complete(rules, root, ply, shard, shard_positions)]
+            results = map(solve_shard, tasks) if executor is None else executor.map(solve_shard, tasks)
+            for done, (_, _, count, kept) in enumerate(results, 1):
+                positions += count
+                stored += kept
+                solved += 1
+                if progress:
+                    progress(ply, done + shards - len(tasks), shards, time.perf_counter() - start)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    write_manifest(rules, root, shard_positions)
+    return positions, stored, solved
+
+
+def _parse_board(text, rules):
+    rows = [row.strip() for row in text.split(',')]
+    if len(rows) != rules.size or any(len(row) != rules.size for row in rows):
+        raise SystemExit(f"--probe needs {rules.size} comma-separated rows of {rules.size} cells")
+    grid = [[cell if cell in 'XO' else None for cell in row.upper()] for row in rows]
+    return rules.from_grid(grid)
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generate or probe a retrograde tablebase.")
+    # Defaults are the 4x4 variant; the AI only loads tables for rules.VARIANTS
+    parser.add_argument('--size', type=int, default=4)
+    parser.add_argument('--k', type=int, default=4)
+    parser.add_argument('--dir', default=None, help=f"tablebase root (default {DEFAULT_DIR})")
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--shard-positions', type=int, default=SHARD_POSITIONS)
+    parser.add_argument('--probe', metavar='ROWS', help="probe a position instead, e.g. 'X...,.O..,....,....'")
+    args = parser.parse_args(argv)
+
+    rules = rules_module.get(args.size, args.k)
+    if args.probe:
+        table = Tablebase(rules, args.dir)
+        x, o = _parse_board(args.probe, rules)
+        result = table.probe(x, o)
+        if result is None:
+            print("No game reaches this position")
+            return
+        value, distance = result
+        best = table.best_move(x, o)
+        move = divmod(best[0], rules.size) if best else None
+        print(f"{['loss', 'draw', 'win'][value + 1]} for the side to move in {distance} plies, best move {move}")
+        return
+
+    print(f"{rules.name}: {total_positions(rules):,} positions in {rules.cells + 1} plies")
+
+    def progress(ply, done, shards, elapsed):
+        print(f"  ply {ply:2d}: shard {done}/{shards}  ({elapsed:.1f}s)", flush=True)
+
+    positions, stored, solved = generate(rules, args.dir, args.workers, args.shard_positions, progress)
+    table = Tablebase(rules, args.dir)
+    value, distance = table.probe(0, 0)
+    print(f"Solved {solved} shards ({positions:,} positions, {stored:,} stored after symmetry) "
+          f"into {table.root}")
+    print(f"Empty board: {['loss', 'draw', 'win'][value + 1]} for X in {distance} plies")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+"""Zobrist hashing, D4 symmetry canonicalization and a bounded transposition table.
+
+Every position is hashed under all 8 rotations/reflections of the board at
+once. Placing or removing a mark XORs one precomputed key into each of the 8
+hashes, so the hashes are updated incrementally, and the smallest of them is a
+canonical key shared by every symmetric variant of the position.
+"""
+
+import functools
+import random
+
+from tictactoe import bitboard
+
+X, O = 0, 1
+
+# Bound flags stored with a value. Full-width searches only store EXACT values.
+EXACT, LOWER, UPPER = 0, 1, 2
+
+
+@functools.lru_cache(maxsize=None)
+def symmetries(size=bitboard.SIZE):
+    """Return the 8 D4 cell permutations of a ``size`` x ``size`` board.
+
+    ``perm[cell]`` is the index the cell moves to under that symmetry.
+    """
+    def rotate(r, c):
+        return c, size - 1 - r
+
+    def reflect(r, c):
+        return r, size - 1 - c
+
+    perms = []
+    for flip in (False, True):
+        for turns in range(4):
+            perm = []
+            for cell in range(size * size):
+                r, c = divmod(cell, size)
+                if flip:
+                    r, c = reflect(r, c)
+                for _ in range(turns):
+                    r, c = rotate(r, c)
+                perm.append(r * size + c)
+            perms.append(tuple(perm))
+    return tuple(perms)
+
+
+@functools.lru_cache(maxsize=None)
+def zobrist_keys(size=bitboard.SIZE, seed=0x7A0B):
+    """Return ``keys[player][cell]``: the 8 per-symmetry Zobrist values for a mark."""
+    rng = random.Random(seed)
+    base = [[rng.getrandbits(64) for _ in range(size * size)] for _ in (X, O)]
+    perms = symmetries(size)
+    return tuple(
+        tuple(tuple(base[player][perm[cell]] for perm in perms) for cell in range(size * size))
+        for player in (X, O)
+    )
+
+
+SYMMETRIES = symmetries()
+ZOBRIST = zobrist_keys()
+EMPTY_KEYS = (0,) * len(SYMMETRIES)
+# XORed into the canonical key when O is to move
+O_TO_MOVE = random.Random(0x5EED).getrandbits(64)
+
+
+def toggle(keys, player, cell, zobrist=ZOBRIST):
+    """Place or remove ``player``'s mark on ``cell`` in all 8 symmetric hashes."""
+    return tuple(k ^ z for k, z in zip(keys, zobrist[player][cell]))
+
+
+def keys_from_masks(x, o, zobrist=ZOBRIST):
+    keys = EMPTY_KEYS
+    for cell in bitboard.iter_cells(x):
+        keys = toggle(keys, X, cell, zobrist)
+    for cell in bitboard.iter_cells(o):
+        keys = toggle(keys, O, cell, zobrist)
+    return keys
+
+
+def canonical(keys, o_to_move=False):
+    return min(keys) ^ (O_TO_MOVE if o_to_move else 0)
+
+
+class TranspositionTable:
+    """Fixed-size hash table of search results keyed by canonical Zobrist hash.
+
+    The table has ``capacity`` slots (rounded up to a power of two) and never
+    grows. When two positions map to the same slot, ``replace='depth'`` keeps
+    the entry with the larger remaining depth (the more expensive subtree),
+    while ``replace='always'`` keeps the newest one.
+    """
+
+    def __init__(self, capacity=1 << 16, replace='depth'):
+        if replace not in ('depth', 'always'):
+            raise ValueError(f"Unknown replacement policy: {replace!r}")
+        size = 1
+        while size < capacity:
+            size <<= 1
+        self._mask = size - 1
+        self._slots = [None] * size
+        self.replace = replace
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return sum(slot is not None for slot in self._slots)
+
+    @property
+    def capacity(self):
+        return self._mask + 1
+
+    def probe(self, key):
+        """Return ``(value, depth, flag)`` for ``key``, or ``None`` on a miss."""
+        slot = self._slots[key & self._mask]
+        if slot is not None and slot[0] == key:
+            self.hits += 1
+            return slot[1:]
+        self.misses += 1
+        return None
+
+    def store(self, key, value, depth=0, flag=EXACT):
+        index = key & self._mask
+        slot = self._slots[index]
+        if slot is not None and slot[0] != key:
+            if self.replace == 'depth' and slot[2] > depth:
+                return
+            self.evictions += 1
+        self._slots[index] = (key, value, depth, flag)
+        self.stores += 1
+
+    def clear(self):
+        self._slots = [None] * (self._mask + 1)
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.hits = self.misses = self.stores = self.evictions = 0
+
+    def stats(self):
+        probes = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / probes if probes else 0.0,
+            'stores': self.stores,
+            'evictions': self.evictions,
+            'capacity': self.capacity,
+        }
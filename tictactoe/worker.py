@@ -0,0 +1,96 @@
+"""Background AI search jobs for front ends that must keep their event loop running.
+
+A ``SearchWorker`` owns one worker thread. ``submit`` starts a move function
+on it and returns a ``SearchJob`` that the UI polls once per frame. Searches
+are cancelled cooperatively: the move function receives a ``cancel`` event
+and raises ``SearchCancelled`` once it is set.
+"""
+
+import threading
+import time
+
+# concurrent.futures is imported where it is used: search imports this module
+# for check_cancelled, and concurrent.futures (with the logging it imports)
+# would be a third of its import time
+
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+CANCELLED = 'cancelled'
+FAILED = 'failed'
+
+
+class SearchCancelled(Exception):
+    """Raised inside a search when its job has been cancelled."""
+
+
+def check_cancelled(cancel):
+    if cancel is not None and cancel.is_set():
+        raise SearchCancelled()
+
+
+class SearchJob:
+    """Handle on one submitted search."""
+
+    def __init__(self, future, cancel):
+        self.future = future
+        self._cancel = cancel
+        self.started_at = time.monotonic()
+
+    @classmethod
+    def completed(cls, result):
+        """Return a job that is already done with ``result``, for a move that needs no search."""
+        from concurrent.futures import Future
+
+        future = Future()
+        future.set_result(result)
+        return cls(future, threading.Event())
+
+    @property
+    def state(self):
+        if self._cancel.is_set():
+            return CANCELLED
+        if self.future.running():
+            return RUNNING
+        if not self.future.done():
+            return PENDING
+        return FAILED if self.future.exception() is not None else DONE
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.started_at
+
+    def done(self):
+        return self.future.done()
+
+    def cancel(self):
+        """Ask the search to stop; a job that has not started yet never runs."""
+        self._cancel.set()
+        self.future.cancel()
+
+    def result(self, timeout=None):
+        """Return the move, or ``None`` if the job was cancelled."""
+        from concurrent.futures import CancelledError
+
+        try:
+            return self.future.result(timeout)
+        except (CancelledError, SearchCancelled):
+            return None
+
+
+class SearchWorker:
+    """Runs move functions one at a time on a dedicated background thread."""
+
+    def __init__(self, name='ai-search'):
+        from concurrent.futures import ThreadPoolExecutor
+
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=name)
+
+    def submit(self, fn, *args, **kwargs):
+        """Start ``fn(*args, cancel=event, **kwargs)`` and return its ``SearchJob``."""
+        cancel = threading.Event()
+        future = self._executor.submit(fn, *args, cancel=cancel, **kwargs)
+        return SearchJob(future, cancel)
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
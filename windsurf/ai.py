@@ -1,9 +1,15 @@
+import os
 import random
+import sys
+
+# Make the shared engine package at the repository root importable
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from tictactoe import players, rules, search
 
 def ai_move(board):
     possible_moves = []
-    for row in range(3):
-        for col in range(3):
+    for row in range(len(board)):
+        for col in range(len(board[row])):
             if board[row][col] is None:
                 possible_moves.append((row, col))
 
@@ -11,6 +17,35 @@ def ai_move(board):
     return move
 
 
-def make_decision(board):
-    move = ai_move(board)
-    return move
+# One player per variant, so its search tables stay warm between moves
+_players = {}
+
+
+def _player_from_env(variant):
+    # TICTACTOE_DIFFICULTY=learned plays the 3x3 policy trained by tictactoe.qlearn,
+    # if it loads and passes qlearn's check against perfect play; without one, and
+    # on larger boards, it plays as the default easy level
+    if os.environ.get('TICTACTOE_DIFFICULTY', '').lower() != 'learned':
+        return players.from_env(variant, default='easy')
+    # Imported here: only the learned level reads a policy
+    from tictactoe import qlearn
+
+    policy = qlearn.load() if variant is rules.CLASSIC else None
+    if policy is not None and qlearn.check(policy):
+        policy.close()
+        policy = None
+    return policy or players.AnytimePlayer(variant, search.DIFFICULTIES['easy'])
+
+
+def make_decision(board, cancel=None):
+    # Monte Carlo tree search when TICTACTOE_ENGINE=mcts, otherwise the learned
+    # policy or an anytime search with the TICTACTOE_DIFFICULTY latency budget
+    # (default easy)
+    variant = rules.for_size(len(board))
+    engine = players.mcts_from_env(variant)
+    if engine is not None:
+        return engine(board, cancel)
+    player = _players.get(variant)
+    if player is None:
+        player = _players[variant] = _player_from_env(variant)
+    return player(board, cancel)
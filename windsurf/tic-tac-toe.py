@@ -1,22 +1,30 @@
+import logging
+import os
 import sys
 import pygame
-import random
+
+# Make the shared engine package at the repository root importable
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from tictactoe import engines, gamelog, idle, linecount, log as log_setup, overlay, rules, sprites
 import ai
 
-# Initialize Pygame
-pygame.init()
+log = logging.getLogger(__name__)
+
+# Rules for the selected variant (TICTACTOE_VARIANT, default 3x3)
+RULES = rules.from_env()
 
 # Constants
 WIDTH, HEIGHT = 600, 600
 LINE_WIDTH = 15
 WIN_LINE_WIDTH = 15
-BOARD_ROWS = 3
-BOARD_COLS = 3
-SQUARE_SIZE = 200
-CIRCLE_RADIUS = 60
-CIRCLE_WIDTH = 15
-CROSS_WIDTH = 25
-SPACE = 55
+BOARD_ROWS = RULES.size
+BOARD_COLS = RULES.size
+# Sizes below match the original 3x3 layout (200px cells) and scale with the cell size
+SQUARE_SIZE = WIDTH // BOARD_COLS
+CIRCLE_RADIUS = SQUARE_SIZE * 3 // 10
+CIRCLE_WIDTH = SQUARE_SIZE * 3 // 40
+CROSS_WIDTH = SQUARE_SIZE // 8
+SPACE = SQUARE_SIZE * 11 // 40
 
 # Colors
 RED = (255, 0, 0)
@@ -25,164 +33,162 @@ LINE_COLOR = (23, 145, 135)
 CIRCLE_COLOR = (239, 231, 200)
 CROSS_COLOR = (66, 66, 66)
 
-# Screen
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption('TIC TAC TOE')
-screen.fill(BG_COLOR)
-
-# Board
-board = [[None] * BOARD_COLS for _ in range(BOARD_ROWS)]
-
-# Clock
-clock = pygame.time.Clock()
-
-def draw_lines():
-    pygame.draw.line(screen, LINE_COLOR, (0, SQUARE_SIZE), (WIDTH, SQUARE_SIZE), LINE_WIDTH)
-    pygame.draw.line(screen, LINE_COLOR, (0, 2 * SQUARE_SIZE), (WIDTH, 2 * SQUARE_SIZE), LINE_WIDTH)
-    pygame.draw.line(screen, LINE_COLOR, (SQUARE_SIZE, 0), (SQUARE_SIZE, HEIGHT), LINE_WIDTH)
-    pygame.draw.line(screen, LINE_COLOR, (2 * SQUARE_SIZE, 0), (2 * SQUARE_SIZE, HEIGHT), LINE_WIDTH)
-
-def draw_figures():
-    for row in range(BOARD_ROWS):
-        for col in range(BOARD_COLS):
-            if board[row][col] == 'X':
-                pygame.draw.line(screen, CROSS_COLOR, (col * SQUARE_SIZE + SPACE, row * SQUARE_SIZE + SQUARE_SIZE - SPACE),
-                                 (col * SQUARE_SIZE + SQUARE_SIZE - SPACE, row * SQUARE_SIZE + SPACE), CROSS_WIDTH)
-                pygame.draw.line(screen, CROSS_COLOR, (col * SQUARE_SIZE + SPACE, row * SQUARE_SIZE + SPACE),
-                                 (col * SQUARE_SIZE + SQUARE_SIZE - SPACE, row * SQUARE_SIZE + SQUARE_SIZE - SPACE), CROSS_WIDTH)
-            elif board[row][col] == 'O':
-                pygame.draw.circle(screen, CIRCLE_COLOR,
-                                   (col * SQUARE_SIZE + SQUARE_SIZE // 2, row * SQUARE_SIZE + SQUARE_SIZE // 2),
-                                   CIRCLE_RADIUS, CIRCLE_WIDTH)
-
-def mark_square(row, col, player):
-    board[row][col] = player
-
-def available_square(row, col):
-    return board[row][col] is None
-
-def is_board_full():
-    for row in range(BOARD_ROWS):
-        for col in range(BOARD_COLS):
-            if board[row][col] is None:
-                return False
-    return True
-
-def check_win(player):
-    for col in range(BOARD_COLS):
-        if board[0][col] == player and board[1][col] == player and board[2][col] == player:
-            return True
-    for row in range(BOARD_ROWS):
-        if board[row][0] == player and board[row][1] == player and board[row][2] == player:
-            return True
-    if board[2][0] == player and board[1][1] == player and board[0][2] == player:
-        return True
-    if board[0][0] == player and board[1][1] == player and board[2][2] == player:
-        return True
-    return False
-
-def restart():
-    screen.fill(BG_COLOR)
-    draw_lines()
-    for row in range(BOARD_ROWS):
-        for col in range(BOARD_COLS):
-            board[row][col] = None
-    return 'X'
-
-def ai_move():
-    possible_moves = [(r, c) for r in range(BOARD_ROWS) for c in range(BOARD_COLS) if board[r][c] is None]
-    if possible_moves:
-        row, col = random.choice(possible_moves)
-        mark_square(row, col, 'O')
-        return (row, col)
-    return None
+# Rendering
+FPS = 60  # Used while a message fades, or always in continuous render mode
+REPAINT_EVENTS = (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED)
+MESSAGE_MS = 2000  # Result message, including the fade in and out
+INPUT_EVENTS = (pygame.MOUSEBUTTONDOWN, pygame.KEYDOWN)  # Queued or dropped during the message
+
+# Screen and message font, created by init_display so the module imports without a window
+screen = None
+message_font = None
+
+# Grid and marks are rendered once and blitted every frame
+surfaces = sprites.SurfaceCache(
+    sprites.Layout(BOARD_ROWS, WIDTH, SQUARE_SIZE, LINE_WIDTH, CIRCLE_RADIUS, CIRCLE_WIDTH, CROSS_WIDTH, SPACE),
+    sprites.Theme(BG_COLOR, LINE_COLOR, CROSS_COLOR, CIRCLE_COLOR))
 
 # Draw the marks
 def draw_marks(board):
-    for row in range(BOARD_ROWS):
-        for col in range(BOARD_COLS):
-            if board[row][col] == 'X':
-                pygame.draw.line(screen, CROSS_COLOR, (col * SQUARE_SIZE + SPACE, row * SQUARE_SIZE + SQUARE_SIZE - SPACE), (col * SQUARE_SIZE + SQUARE_SIZE - SPACE, row * SQUARE_SIZE + SPACE), CROSS_WIDTH)  
-                pygame.draw.line(screen, CROSS_COLOR, (col * SQUARE_SIZE + SPACE, row * SQUARE_SIZE + SPACE), (col * SQUARE_SIZE + SQUARE_SIZE - SPACE, row * SQUARE_SIZE + SQUARE_SIZE - SPACE), CROSS_WIDTH)
-            elif board[row][col] == 'O':
-                pygame.draw.circle(screen, CIRCLE_COLOR, (col * SQUARE_SIZE + SQUARE_SIZE // 2, row * SQUARE_SIZE + SQUARE_SIZE // 2), CIRCLE_RADIUS, CIRCLE_WIDTH)
-
-# Check for a winner
-def check_winner(board):
-    for row in range(BOARD_ROWS):
-        if board[row][0] == board[row][1] == board[row][2] and board[row][0] is not None:
-            return board[row][0]
-    for col in range(BOARD_COLS):
-        if board[0][col] == board[1][col] == board[2][col] and board[0][col] is not None:
-            return board[0][col]
-    if board[0][0] == board[1][1] == board[2][2] and board[0][0] is not None:
-        return board[0][0]
-    if board[0][2] == board[1][1] == board[2][0] and board[0][2] is not None:
-        return board[0][2]
+    surfaces.draw_board(screen, board)
+
+# Message for a finished game, or None while it is still going
+def game_result(counts):
+    winner = counts.winner
+    if winner is not None:
+        return f"Player {winner} wins!"
+    if counts.is_full:
+        return "It's a tie!"
     return None
 
-# Check for a tie
-def check_tie(board):
-    for row in range(BOARD_ROWS):
-        for col in range(BOARD_COLS):
-            if board[row][col] is None:
-                return False
-    return True
-
 # Show a message
-def show_message(message):
+message_surfaces = {}
+def show_message(message, opacity=1.0):
+    surface = message_surfaces.get(message)
+    if surface is None:
+        surface = pygame.Surface((WIDTH, HEIGHT))
+        surface.fill(BG_COLOR)
+        text = surfaces.text(message_font, message, (0, 0, 0))
+        text_rect = text.get_rect(center=(WIDTH // 2, HEIGHT // 2))
+        surface.blit(text, text_rect)
+        message_surfaces[message] = surface
+    surface.set_alpha(int(255 * opacity))
+    screen.blit(surface, (0, 0))
+
+def init_display():
+    global screen, message_font
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption('TIC TAC TOE')
     screen.fill(BG_COLOR)
-    font = pygame.font.Font(None, 40)
-    text = font.render(message, True, (0, 0, 0))
-    text_rect = text.get_rect(center=(WIDTH // 2, HEIGHT // 2))
-    screen.blit(text, text_rect)
-    pygame.display.update()
-    pygame.time.wait(2000)
+    message_font = pygame.font.Font(None, 40)
+
+def wait_events(timeout_ms):
+    # Block until something happens, then drain whatever else is queued
+    event = pygame.event.wait(timeout_ms)
+    if event.type == pygame.NOEVENT:
+        return []
+    return [event] + pygame.event.get()
 
 # Main game loop
 def game_loop():
+    log_setup.configure()
+    init_display()
     clock = pygame.time.Clock()
     board = [[None]*BOARD_COLS for _ in range(BOARD_ROWS)]
+    counts = linecount.LineCounter(RULES)
     player = 'X'
+    render_on_change = idle.render_mode() == idle.ON_CHANGE
+    cpu = idle.CpuMeter()
+    message = overlay.Overlay(MESSAGE_MS)
+    # TICTACTOE_AI plays any registered engine instead of ai.make_decision
+    ai_engine = engines.from_env(RULES) or ai.make_decision
+    ai_name = engines.spec_from_env() or ('mcts' if ai.players.mcts_from_env(RULES) else 'windsurf')
+    # Finished games are appended to the game log (TICTACTOE_GAME_LOG_DIR)
+    recorder = gamelog.from_env(RULES, 'human', ai_name)
+    pending = []  # Input queued during the last message
+    dirty = True
     while True:
-        for event in pygame.event.get():
+        if pending:
+            events, pending = pending + pygame.event.get(), []
+        # Only block when waiting on the human; the AI moves straight away
+        elif render_on_change and player == 'X' and not message.active:
+            events = wait_events(int(cpu.interval * 1000))
+        else:
+            events = pygame.event.get()
+        for event in events:
             if event.type == pygame.QUIT:
                 pygame.quit()
                 sys.exit()
+            if event.type in REPAINT_EVENTS:
+                dirty = True
+            if message.active:
+                if event.type in INPUT_EVENTS:
+                    message.intercept(event)
+                continue
             if event.type == pygame.MOUSEBUTTONDOWN and player == 'X':
-                mouseX = event.pos[0] // SQUARE_SIZE
-                mouseY = event.pos[1] // SQUARE_SIZE
+                # Clamp: WIDTH is not always a multiple of the cell size
+                mouseX = min(event.pos[0] // SQUARE_SIZE, BOARD_COLS - 1)
+                mouseY = min(event.pos[1] // SQUARE_SIZE, BOARD_ROWS - 1)
                 if board[mouseY][mouseX] is None:
                     board[mouseY][mouseX] = player
+                    counts.mark(mouseY * BOARD_COLS + mouseX, player)
+                    recorder.move(mouseY * BOARD_COLS + mouseX)
                     player = 'O'
-
-        # AI's turn
-        if player == 'O':
-            move = ai.make_decision(board)
-            if move is not None:
-                board[move[1]][move[0]] = player
+                    dirty = True
+
+        now = pygame.time.get_ticks()
+        if message.active:
+            # New game once the message has faded out
+            queued = message.finished(now)
+            if queued is not None:
+                board = [[None]*BOARD_COLS for _ in range(BOARD_ROWS)]
+                counts.reset()
+                player = 'X'
+                pending = queued
+            dirty = True
+        else:
+            # Win and tie checks are reads of the running line counts
+            result = game_result(counts)
+
+            # AI's turn
+            if result is None and player == 'O':
+                move = ai_engine(engines.BoardView(board))
+                if move is None or board[move[0]][move[1]] is not None:
+                    # Play the first empty cell rather than writing over a mark
+                    fallback = RULES.empty_cells(*RULES.from_grid(board))[0]
+                    log.warning("AI move invalid or cell occupied: %s; playing %s instead", move, fallback)
+                    move = fallback
+                row, col = move
+                cell = row * BOARD_COLS + col
+                board[row][col] = player
+                counts.mark(cell, player)
+                recorder.move(cell)
                 player = 'X'
+                dirty = True
+                result = game_result(counts)
+
+            if result is not None:
+                recorder.finish(counts.winner)
+                message.show(result, now)
+
+        if dirty or not render_on_change:
+            # Draw the game board (the grid blit covers the whole window)
+            draw_marks(board)
+            if message.active:
+                show_message(message.message, message.opacity(now))
+
+            # Update the display
+            pygame.display.update()
+            dirty = False
+
+        if message.active or not render_on_change:
+            # Cap the frame rate
+            clock.tick(FPS)
+
+        usage = cpu.poll()
+        if usage is not None:
+            log.info("CPU usage %.1f%% over the last %.0fs", usage, cpu.interval)
 
-        # Check for a winner
-        winner = check_winner(board)
-        if winner is not None:
-            show_message(f"Player {winner} wins!")
-            board = [[None]*BOARD_COLS for _ in range(BOARD_ROWS)]
-            player = 'X'
-        elif check_tie(board):
-            show_message("It's a tie!")
-            board = [[None]*BOARD_COLS for _ in range(BOARD_ROWS)]
-            player = 'X'
-
-        # Draw the game board
-        screen.fill(BG_COLOR)
-        draw_lines()
-        draw_marks(board)
-
-        # Update the display
-        pygame.display.update()
-
-        # Cap the frame rate
-        clock.tick(60)
-
-game_loop()
\ No newline at end of file
+if __name__ == '__main__':
+    game_loop()